@@ -0,0 +1,32 @@
+#!/usr/bin/python3
+"""
+Measures the time to clone and flatten generated hierarchical models (see
+:func:`common.hierarchy`) of increasing size. The time per block should remain
+constant, i.e., the operations should scale linearly.
+
+Usage::
+
+	python clone_benchmark.py [blocks]
+"""
+import sys
+import time
+from common import hierarchy, report
+
+
+def measure(func):
+	start = time.perf_counter()
+	func()
+	return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+	largest = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+	for n in [largest // 10, largest // 2, largest]:
+		model = hierarchy(n)
+		rows = [
+			("clone", measure(model.clone)),
+			("flattened", measure(model.flattened)),
+			("flatten", measure(model.flatten)),
+		]
+		report("%d blocks" % n, [(name, "%.3f s (%.1f us/block)" % (t, t / n * 1e6)) for name, t in rows])
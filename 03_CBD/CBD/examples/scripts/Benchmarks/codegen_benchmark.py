@@ -0,0 +1,42 @@
+#!/usr/bin/python3
+"""
+Compares the throughput (steps/second) of the interpreted step loop to the
+generated Python and C code (see :func:`pyCBD.simulator.Simulator.setCodeGeneration`)
+on the example models and on a long chain of gain blocks.
+
+The C libraries are compiled before the measurement, so only cache hits are
+measured. The best of three runs is reported.
+
+Usage::
+
+	python codegen_benchmark.py [steps]
+"""
+import sys
+from common import example_models, chain, steps_per_second, report
+
+
+def generated(backend):
+	return lambda sim: sim.setCodeGeneration(backend=backend)
+
+
+def measure(factory, steps, setup=None):
+	try:
+		return "%.1f" % max(steps_per_second(factory(), steps, setup=setup) for _ in range(3))
+	except NotImplementedError:
+		return "unsupported"
+
+
+def compare(factory, steps):
+	measure(factory, 2, generated("c"))
+	return " / ".join([measure(factory, steps), measure(factory, steps, generated("python")),
+	                   measure(factory, steps, generated("c"))])
+
+
+if __name__ == '__main__':
+	steps = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+	rows = []
+	for name, factory in example_models().items():
+		rows.append((name, compare(factory, steps)))
+	rows.append(("chain(500)", compare(lambda: chain(500), max(steps // 2, 10))))
+	report("Steps/second, interpreted / Python / C (%d steps)" % steps, rows)
@@ -0,0 +1,127 @@
+"""
+Shared helpers for the pyCBD benchmark scripts.
+
+The example models are loaded from the sibling example folders, which
+allows the benchmarks to be executed from anywhere.
+"""
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+for folder in ["SinGen", "Fibonacci", "LCG", "BouncingBall", "EvenNumberGen"]:
+	sys.path.append(os.path.join(HERE, "..", folder))
+sys.path.append(os.path.join(HERE, "..", "..", "..", "..", "src", "python_models"))
+
+from pyCBD.Core import CBD
+from pyCBD.lib.std import ConstantBlock, GainBlock
+from pyCBD.simulator import Simulator
+
+
+def example_models():
+	"""
+	Obtains the example models as a dictionary of :code:`name -> factory`.
+	"""
+	from SinGen import SinGen
+	from Fibonacci import FibonacciGen
+	from LCG import LCG
+	from BouncingBall import BouncingBall
+	from Models import CBDA, ERROR_A, g_tComp
+
+	return {
+		"SinGen": lambda: SinGen("SinGen"),
+		"Fibonacci": lambda: FibonacciGen("Fibonacci"),
+		"LCG": lambda: LCG("LCG"),
+		"BouncingBall": lambda: BouncingBall(),
+		"HarmonicOscillator": lambda: CBDA("CBDA"),
+		"OscillatorError": lambda: ERROR_A("ERROR_A"),
+		"IntegratorComparison": lambda: g_tComp("g_tComp"),
+	}
+
+
+def chain(n, name="chain"):
+	"""
+	Builds a flat CBD of :code:`n` gain blocks in series, fed by a constant.
+
+	Args:
+		n (int):    The amount of gain blocks.
+		name (str): The name of the model.
+	"""
+	model = CBD(name, [], ["OUT1"])
+	model.addBlock(ConstantBlock("c", 1.0))
+	prev = "c"
+	for i in range(n):
+		model.addBlock(GainBlock("g%d" % i, 1.0))
+		model.addConnection(prev, "g%d" % i)
+		prev = "g%d" % i
+	model.addConnection(prev, "OUT1")
+	return model
+
+
+def hierarchy(n, width=100, name="hierarchy"):
+	"""
+	Builds a hierarchical CBD of :code:`n` gain blocks. The gains are divided over
+	submodels of :code:`width` blocks in series, which are connected in series
+	as well and fed by a constant.
+
+	Args:
+		n (int):        The amount of gain blocks.
+		width (int):    The amount of gain blocks per submodel. Defaults to 100.
+		name (str):     The name of the model.
+	"""
+	model = CBD(name, [], ["OUT1"])
+	model.addBlock(ConstantBlock("c", 1.0))
+	prev = "c"
+	for k in range(max(n // width, 1)):
+		child = CBD("child%d" % k, ["IN1"], ["OUT1"])
+		inner = "IN1"
+		for i in range(width):
+			child.addBlock(GainBlock("g%d" % i, 1.0))
+			child.addConnection(inner, "g%d" % i)
+			inner = "g%d" % i
+		child.addConnection(inner, "OUT1")
+		model.addBlock(child)
+		model.addConnection(prev, child.getBlockName())
+		prev = child.getBlockName()
+	model.addConnection(prev, "OUT1")
+	return model
+
+
+def steps_per_second(model, steps, delta=0.1, setup=None):
+	"""
+	Simulates a model for a fixed amount of steps and measures the throughput.
+
+	Args:
+		model (CBD):        The model to simulate.
+		steps (int):        The amount of steps to simulate.
+		delta (float):      The step size. Defaults to 0.1.
+		setup (callable):   Optional function that receives the simulator before
+							the simulation starts. Defaults to :code:`None`.
+
+	Returns:
+		The amount of simulated steps per second (wall-clock).
+	"""
+	sim = Simulator(model)
+	sim.setDeltaT(delta)
+	if setup is not None:
+		setup(sim)
+	start = time.perf_counter()
+	sim.run(steps * delta)
+	return steps / (time.perf_counter() - start)
+
+
+def report(title, rows):
+	"""
+	Prints a table of benchmark results.
+
+	Args:
+		title (str):    The title of the table.
+		rows (iter):    Iterable of :code:`(label, value)` tuples.
+	"""
+	print(title)
+	print("-" * len(title))
+	for label, value in rows:
+		if isinstance(value, float):
+			value = "%.1f" % value
+		print("  {:<30} {:>15}".format(label, value))
+	print()
@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""
+Measures the costs of reading a large CSV file with :class:`pyCBD.lib.io.ReadCSV`,
+both in memory and through a memory-mapped binary cache. Afterwards, the block
+is rewound and recomputed at random times, as happens when locating state
+events; each lookup should take a constant amount of time.
+
+Usage::
+
+	python csv_benchmark.py [records]
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from common import report
+from pyCBD.Core import CBD
+from pyCBD.lib.io import ReadCSV, Interpolation
+from pyCBD.simulator import Simulator
+
+
+def generate(file_name, records):
+	with open(file_name, "w") as file:
+		file.write("time,x,y,z\n")
+		for i in range(1, records + 1):
+			file.write("%d.0,%f,%f,%f\n" % (i, i * 0.5, -i * 0.25, i % 7))
+
+
+def load(file_name, **kwargs):
+	start = time.perf_counter()
+	block = ReadCSV("csv", file_name, Interpolation.LINEAR, **kwargs)
+	return block, time.perf_counter() - start
+
+
+def peak(file_name, **kwargs):
+	tracemalloc.start()
+	ReadCSV("csv", file_name, Interpolation.LINEAR, **kwargs)
+	result = tracemalloc.get_traced_memory()[1]
+	tracemalloc.stop()
+	return result / 2**20
+
+
+def lookups(block, records, count=1000):
+	model = CBD("model")
+	model.addBlock(block)
+	sim = Simulator(model)
+	sim.setDeltaT(records / count)
+	sim.run(records)
+	# Recompute the iterations in a random order
+	iterations = list(range(count))
+	random.seed(42)
+	random.shuffle(iterations)
+	start = time.perf_counter()
+	for i in iterations:
+		block._rewind()
+		block.compute(i)
+	return (time.perf_counter() - start) / count * 1e6
+
+
+if __name__ == '__main__':
+	records = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+	directory = tempfile.mkdtemp()
+	try:
+		file_name = os.path.join(directory, "data.csv")
+		cache = os.path.join(directory, "data.bin")
+		generate(file_name, records)
+		memory, memory_load = load(file_name)
+		_, cache_load = load(file_name, cache=cache)
+		mapped, mapped_load = load(file_name, cache=cache)
+		report("Load %d records" % records, [
+			("in memory", "%.2f s, %.1f MB" % (memory_load, peak(file_name))),
+			("create cache", "%.2f s" % cache_load),
+			("reuse cache", "%.2f s, %.1f MB" % (mapped_load, peak(file_name, cache=cache))),
+		])
+		report("Random lookup", [
+			("in memory", "%.1f us" % lookups(memory, records)),
+			("cache", "%.1f us" % lookups(mapped, records)),
+		])
+	finally:
+		shutil.rmtree(directory)
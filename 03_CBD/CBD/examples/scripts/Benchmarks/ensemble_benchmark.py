@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Compares simulating a mass-spring system for K different spring constants
+with one simulator per sample against a single ensemble simulation.
+
+Usage::
+
+	python ensemble_benchmark.py [K] [steps]
+"""
+import sys
+import time
+import numpy as np
+from common import report
+from pyCBD.Core import CBD
+from pyCBD.lib.std import ConstantBlock, ProductBlock, NegatorBlock, IntegratorBlock
+from pyCBD.simulator import Simulator
+from pyCBD.ensemble import EnsembleSimulator
+
+
+def spring(k=1.0):
+	model = CBD("spring", [], ["x"])
+	model.addBlock(ConstantBlock("k", k))
+	model.addBlock(ConstantBlock("x0", 1.0))
+	model.addBlock(ConstantBlock("v0", 0.0))
+	model.addBlock(ProductBlock("kx"))
+	model.addBlock(NegatorBlock("a"))
+	model.addBlock(IntegratorBlock("v"))
+	model.addBlock(IntegratorBlock("pos"))
+	model.addConnection("k", "kx")
+	model.addConnection("pos", "kx")
+	model.addConnection("kx", "a")
+	model.addConnection("a", "v")
+	model.addConnection("v0", "v", input_port_name="IC")
+	model.addConnection("v", "pos")
+	model.addConnection("x0", "pos", input_port_name="IC")
+	model.addConnection("pos", "x")
+	return model
+
+
+if __name__ == '__main__':
+	K = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+	steps = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+	delta = 0.01
+	ks = np.linspace(0.5, 2.0, K)
+
+	start = time.perf_counter()
+	for k in ks:
+		sim = Simulator(spring(k))
+		sim.setDeltaT(delta)
+		sim.run(steps * delta)
+	separate = time.perf_counter() - start
+
+	start = time.perf_counter()
+	sim = EnsembleSimulator(spring(), K)
+	sim.setDeltaT(delta)
+	sim.setParameter("k", ks)
+	sim.run(steps * delta)
+	ensemble = time.perf_counter() - start
+
+	report("Mass-spring, K = %d, %d steps" % (K, steps), [
+		("one simulator per sample", "%.3f s" % separate),
+		("ensemble simulator", "%.3f s" % ensemble),
+		("speedup", "%.1fx" % (separate / ensemble)),
+	])
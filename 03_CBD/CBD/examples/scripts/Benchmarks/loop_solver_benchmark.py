@@ -0,0 +1,44 @@
+#!/usr/bin/python3
+"""
+Compares the Gauss-Jordan elimination of the :class:`LinearSolver` with the
+cached factorization of the :class:`NumpyLinearSolver` on algebraic loops of
+increasing size. Each loop is a ring of adders, where each adder adds a
+constant to half of the previous adder's output. The coefficients remain the
+same, hence only a single factorization is needed.
+
+Usage::
+
+	python loop_solver_benchmark.py [steps]
+"""
+import sys
+from common import report, steps_per_second
+from pyCBD.Core import CBD
+from pyCBD.lib.std import ConstantBlock, AdderBlock, ProductBlock
+from pyCBD.loopsolvers.linearsolver import LinearSolver, NumpyLinearSolver
+
+
+def ring(n):
+	model = CBD("ring", [], ["OUT1"])
+	model.addBlock(ConstantBlock("half", 0.5))
+	for i in range(n):
+		model.addBlock(ConstantBlock("c%d" % i, float(i)))
+		model.addBlock(AdderBlock("a%d" % i))
+		model.addBlock(ProductBlock("p%d" % i))
+		model.addConnection("c%d" % i, "a%d" % i)
+		model.addConnection("p%d" % i, "a%d" % i)
+		model.addConnection("half", "p%d" % i)
+	for i in range(n):
+		model.addConnection("a%d" % i, "p%d" % ((i + 1) % n))
+	model.addConnection("a0", "OUT1")
+	return model
+
+
+if __name__ == '__main__':
+	steps = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+	for n in [1, 5, 25, 50]:
+		rows = []
+		for name, solver in [("LinearSolver", LinearSolver), ("NumpyLinearSolver", NumpyLinearSolver)]:
+			sps = steps_per_second(ring(n), steps, setup=lambda sim: sim.setAlgebraicLoopSolver(solver()))
+			rows.append((name, "%.1f steps/s" % sps))
+		report("Loop of %d blocks, %d steps" % (2 * n, steps), rows)
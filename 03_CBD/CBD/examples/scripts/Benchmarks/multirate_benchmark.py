@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+"""
+Measures the cost of slow blocks on the fast steps of a multi-rate simulation.
+A chain of gain blocks is computed at every step, while the "supervisory"
+blocks that observe the chain only fire every 100 steps. Ideally, the throughput is
+the same as without the supervisory chain.
+
+Usage::
+
+	python multirate_benchmark.py [steps]
+"""
+import sys
+from common import chain, steps_per_second, report
+from pyCBD.lib.std import GainBlock
+
+
+def supervised(fast, slow):
+	model = chain(fast)
+	for i in range(slow):
+		model.addBlock(GainBlock("s%d" % i, 1.0))
+		model.addConnection("g%d" % (i % fast), "s%d" % i)
+	return model
+
+
+def rates(slow, rate):
+	def setup(sim):
+		for i in range(slow):
+			sim.setBlockRate("chain.s%d" % i, rate)
+	return setup
+
+
+if __name__ == '__main__':
+	steps = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+	rows = [
+		("fast chain only", max(steps_per_second(chain(50), steps, 0.01) for _ in range(3))),
+		("supervised, every step", max(steps_per_second(supervised(50, 500), steps, 0.01) for _ in range(3))),
+		("supervised, rate 1.0", max(steps_per_second(supervised(50, 500), steps, 0.01, rates(500, 1.0))
+		                             for _ in range(3))),
+	]
+	report("Steps/second (%d steps)" % steps, rows)
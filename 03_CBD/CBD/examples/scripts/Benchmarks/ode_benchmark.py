@@ -0,0 +1,55 @@
+#!/usr/bin/python3
+"""
+Compares the integration of a mass-spring system with the integrator blocks,
+the Runge-Kutta preprocessor and the native ODE solver of the simulator
+(see :func:`pyCBD.simulator.Simulator.setODESolver`).
+
+The error is the maximal deviation from the exact solution :math:`cos(t)`.
+
+Usage::
+
+	python ode_benchmark.py [duration] [delta]
+"""
+import sys
+import math
+import time
+from common import report
+from ensemble_benchmark import spring
+from pyCBD.simulator import Simulator
+from pyCBD.ode import RungeKuttaSolver
+from pyCBD.preprocessing.butcher import ButcherTableau
+from pyCBD.preprocessing.rungekutta import RKPreprocessor
+
+
+def measure(model, duration, solver=None):
+	sim = Simulator(model)
+	if solver is not None:
+		sim.setODESolver(solver)
+	start = time.perf_counter()
+	sim.run(duration)
+	wall = time.perf_counter() - start
+	history = model.getSignalHistory("x")
+	return len(history), max(abs(x - math.cos(t)) for t, x in history), wall
+
+
+if __name__ == '__main__':
+	duration = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+	delta = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+
+	def model(delta_t):
+		res = spring()
+		res.addFixedRateClock("clock", delta_t)
+		return res
+
+	for name, steps, error, wall in [
+		("integrator blocks", *measure(model(delta), duration)),
+		("RK4 preprocessor", *measure(RKPreprocessor(ButcherTableau.RK4(), hmin=delta).preprocess(model(delta)),
+		                              duration)),
+		("RK4 solver", *measure(model(delta), duration, RungeKuttaSolver(ButcherTableau.RK4()))),
+		("DOPRI solver (atol=1e-8)", *measure(model(0.5), duration, RungeKuttaSolver(atol=1e-8))),
+	]:
+		report("%s, %.0f s" % (name, duration), [
+			("steps", steps),
+			("max error", "%.3e" % error),
+			("wall-clock", "%.3f s" % wall),
+		])
@@ -0,0 +1,57 @@
+#!/usr/bin/python3
+"""
+Measures the throughput (steps/second) of a fleet of independent plant models,
+computed serially and with a pool of threads (see
+:func:`pyCBD.simulator.Simulator.setParallel`). Each plant solves a small
+linear system with NumPy, which releases the GIL.
+
+Usage::
+
+	python parallel_benchmark.py [vehicles] [steps]
+"""
+import os
+import sys
+import numpy as np
+from common import steps_per_second, report
+from pyCBD.Core import CBD, BaseBlock
+from pyCBD.lib.std import ConstantBlock
+
+
+class SolveBlock(BaseBlock):
+	"""
+	Solves a random, but fixed, linear system scaled by the input.
+	"""
+	def __init__(self, block_name, size=200):
+		BaseBlock.__init__(self, block_name, ["IN1"], ["OUT1"])
+		rng = np.random.default_rng(len(block_name))
+		self.A = rng.random((size, size)) + size * np.eye(size)
+		self.b = rng.random(size)
+
+	def compute(self, curIteration):
+		x = np.linalg.solve(self.A, self.b * self.getInputSignal(curIteration, "IN1").value)
+		self.appendToSignal(float(x[0]))
+
+
+def fleet(vehicles):
+	model = CBD("fleet", [], ["v%d" % i for i in range(vehicles)])
+	for i in range(vehicles):
+		plant = CBD("plant%d" % i, [], ["OUT1"])
+		plant.addBlock(ConstantBlock("c", float(i + 1)))
+		plant.addBlock(SolveBlock("solve"))
+		plant.addConnection("c", "solve")
+		plant.addConnection("solve", "OUT1")
+		model.addBlock(plant)
+		model.addConnection("plant%d" % i, "v%d" % i)
+	return model
+
+
+if __name__ == '__main__':
+	vehicles = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+	steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+	rows = [("serial", max(steps_per_second(fleet(vehicles), steps) for _ in range(3)))]
+	for workers in sorted({2, os.cpu_count() or 1}):
+		setup = lambda sim: sim.setParallel(workers)
+		rows.append(("%d threads" % workers, max(steps_per_second(fleet(vehicles), steps, setup=setup)
+		                                          for _ in range(3))))
+	report("Steps/second (%d vehicles, %d steps)" % (vehicles, steps), rows)
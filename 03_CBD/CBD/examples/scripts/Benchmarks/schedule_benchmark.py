@@ -0,0 +1,43 @@
+#!/usr/bin/python3
+"""
+Measures the time spent in each phase of a simulation (see
+:func:`pyCBD.simulator.Simulator.getTimings`) for long chains of gain blocks.
+The blocks of the "reversed" chains are added in the opposite order of their
+dependencies, which makes the depth-first search of the scheduler as deep as
+the chain.
+
+Usage::
+
+	python schedule_benchmark.py [blocks] [steps]
+"""
+import sys
+from common import report
+from pyCBD.Core import CBD
+from pyCBD.lib.std import ConstantBlock, GainBlock
+from pyCBD.simulator import Simulator
+
+
+def chain(n, reverse=False):
+	model = CBD("chain", [], ["OUT1"])
+	for i in (reversed(range(n)) if reverse else range(n)):
+		model.addBlock(GainBlock("g%d" % i, 1.0))
+	model.addBlock(ConstantBlock("c", 1.0))
+	prev = "c"
+	for i in range(n):
+		model.addConnection(prev, "g%d" % i)
+		prev = "g%d" % i
+	model.addConnection(prev, "OUT1")
+	return model
+
+
+if __name__ == '__main__':
+	largest = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+	steps = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+	for n in [largest // 50, largest // 5, largest]:
+		for reverse in [False, True]:
+			sim = Simulator(chain(n, reverse))
+			sim.setDeltaT(0.1)
+			sim.run(steps * 0.1)
+			report("%d blocks%s, %d steps" % (n, " (reversed)" if reverse else "", steps),
+			       [(phase, "%.3f s" % t) for phase, t in sim.getTimings().items()])
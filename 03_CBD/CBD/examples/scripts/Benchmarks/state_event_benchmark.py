@@ -0,0 +1,109 @@
+#!/usr/bin/python3
+"""
+Counts the model evaluations that are required to locate the bounces of a
+bouncing ball. The ball is extended with a chain of blocks that post-process
+the velocity, but that do not influence the height (i.e., the monitored signal).
+
+The amount of evaluations is expressed in "full models": the amount of block
+computations divided by the amount of blocks in the model.
+
+Afterwards, the ball is simulated with cold and warm restarts after each
+bounce (see :func:`pyCBD.simulator.Simulator.setWarmRestart`).
+
+Usage::
+
+	python state_event_benchmark.py [chain] [duration]
+"""
+import sys
+import time
+from common import report, example_models
+from pyCBD.Core import CBD
+from pyCBD.lib.std import GainBlock
+from pyCBD.simulator import Simulator
+from pyCBD.state_events import StateEvent, Direction
+from pyCBD.state_events.locators import BisectionStateEventLocator, RegulaFalsiStateEventLocator, \
+	ITPStateEventLocator
+
+
+def ball(chain):
+	model = example_models()["BouncingBall"]()
+	prev = "v"
+	for i in range(chain):
+		model.addBlock(GainBlock("g%d" % i, 1.0))
+		model.addConnection(prev, "g%d" % i)
+		prev = "g%d" % i
+	return model
+
+
+def leaves(model):
+	for block in model.getBlocks():
+		if isinstance(block, CBD):
+			yield from leaves(block)
+		else:
+			yield block
+
+
+def count_computes(model):
+	counter = [0]
+	for block in leaves(model):
+		def compute(curIteration, compute=block.compute):
+			counter[0] += 1
+			compute(curIteration)
+		block.compute = compute
+	return counter
+
+
+def measure(locator, chain, duration, delta=0.1, warm=False):
+	model = ball(chain)
+	size = len(list(leaves(model)))
+	counter = count_computes(model)
+	bounces = []
+	steps = [0]
+
+	def bounce(e, t, m):
+		bounces.append(t)
+		m.bounce()
+
+	sim = Simulator(model)
+
+	def step(do_single_step=sim._do_single_step):
+		steps[0] += 1
+		do_single_step()
+	sim._do_single_step = step
+
+	sim.setDeltaT(delta)
+	sim.setWarmRestart(warm)
+	sim.setStateEventLocator(locator)
+	sim.registerStateEvent(StateEvent("height", direction=Direction.FROM_ABOVE, event=bounce))
+	start = time.perf_counter()
+	sim.run(duration)
+	duration = time.perf_counter() - start
+
+	# Every step evaluates the model once, the remainder is used by the locator
+	extra = counter[0] / size - steps[0]
+	return len(bounces), extra / max(1, len(bounces)), duration, bounces, len(model.getSignalHistory("height"))
+
+
+if __name__ == '__main__':
+	chain = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+	duration = float(sys.argv[2]) if len(sys.argv) > 2 else 30.0
+
+	for name, locator in [("bisection", BisectionStateEventLocator()),
+	                      ("regula falsi", RegulaFalsiStateEventLocator()),
+	                      ("ITP", ITPStateEventLocator())]:
+		events, evaluations, wall, bounces, _ = measure(locator, chain, duration)
+		report("%s, %d chained blocks, %g s" % (name, chain, duration), [
+			("bounces", events),
+			("model evaluations per bounce", "%.2f" % evaluations),
+			("first bounce", "%.6f" % bounces[0] if bounces else "-"),
+			("wall-clock", "%.3f s" % wall),
+		])
+
+	for warm in [False, True]:
+		events, _, wall, bounces, history = measure(RegulaFalsiStateEventLocator(), chain, duration, warm=warm)
+		report("%s restarts, %d chained blocks, %g s" % ("warm" if warm else "cold", chain, duration), [
+			("bounces", events),
+			("last bounce", "%.6f" % bounces[-1] if bounces else "-"),
+			("retained samples", history),
+			("wall-clock", "%.3f s" % wall),
+		])
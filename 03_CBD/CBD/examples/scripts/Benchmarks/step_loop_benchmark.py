@@ -0,0 +1,20 @@
+#!/usr/bin/python3
+"""
+Measures the throughput (steps/second) of the simulator's step loop on the
+example models and on a long chain of gain blocks.
+
+Usage::
+
+	python step_loop_benchmark.py [steps]
+"""
+import sys
+from common import example_models, chain, steps_per_second, report
+
+if __name__ == '__main__':
+	steps = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+	rows = []
+	for name, factory in example_models().items():
+		rows.append((name, steps_per_second(factory(), steps)))
+	rows.append(("chain(500)", steps_per_second(chain(500), max(steps // 50, 10))))
+	report("Steps/second (%d steps)" % steps, rows)
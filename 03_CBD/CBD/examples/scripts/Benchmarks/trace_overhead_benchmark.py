@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+"""
+Measures the overhead of tracing, expressed per block computation. A long
+chain of gain blocks is simulated without tracers, with a tracer that does
+nothing (on multiple trace levels) and with a CSV tracer that writes to
+:code:`os.devnull`. Each setup is measured three times; the best run is
+reported.
+
+Usage::
+
+	python trace_overhead_benchmark.py [blocks] [steps]
+"""
+import os
+import sys
+from common import chain, steps_per_second, report
+from pyCBD.tracers import TraceLevel
+from pyCBD.tracers.baseTracer import BaseTracer
+from pyCBD.tracers.tracerCSV import CSVTracer
+
+
+class NullTracer(BaseTracer):
+	"""
+	Tracer that ignores all events.
+	"""
+	def openFile(self, recover=False):
+		pass
+
+	def closeFile(self):
+		pass
+
+	def traceCompute(self, curIt, block):
+		pass
+
+	def traceEndNewIteration(self, curIt, time):
+		pass
+
+
+if __name__ == '__main__':
+	blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+	steps = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+	# +1 for the constant, +1 for the model itself
+	computes = steps * (blocks + 2)
+
+	setups = {
+		"no tracer": None,
+		"null tracer": lambda sim: sim.setCustomTracer(NullTracer()),
+		"null tracer, STEP level": lambda sim: (sim.setCustomTracer(NullTracer()), sim.setTraceLevel(TraceLevel.STEP)),
+		"CSV tracer": lambda sim: sim.setCustomTracer(CSVTracer(filename=os.devnull)),
+	}
+	base = None
+	rows = []
+	for name, setup in setups.items():
+		sps = max(steps_per_second(chain(blocks), steps, setup=setup) for _ in range(3))
+		if base is None:
+			base = sps
+		overhead = (steps / sps - steps / base) / computes
+		rows.append((name, "%.1f steps/s" % sps))
+		rows.append(("  overhead", "%.1f ns/compute" % (overhead * 1e9)))
+	report("Trace overhead, chain(%d), %d steps" % (blocks, steps), rows)
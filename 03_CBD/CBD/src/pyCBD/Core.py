@@ -2,8 +2,8 @@ import re
 import pyCBD.naivelog as naivelog
 import logging
 from copy import deepcopy
-from .util import enum, hash64
-from collections import namedtuple
+from .util import enum, hash64, RingBuffer
+from collections import namedtuple, deque
 
 InputLink = namedtuple("InputLink", ["block", "output_port"])
 Signal = namedtuple("Signal", ["time", "value"])
@@ -23,6 +23,12 @@ class Port:
     Direction = enum(IN=0, OUT=1)
     """Possible port directions."""
 
+    MIN_HISTORY = 2
+    """Minimal history limit. The :class:`pyCBD.lib.std.DelayBlock` (and therefore
+    also the :class:`pyCBD.lib.std.DerivatorBlock` and
+    :class:`pyCBD.lib.std.IntegratorBlock`), the clock and the state event
+    locators look one iteration back in time."""
+
     def __init__(self, name, direction, block):
         self.name = name
         self.direction = direction
@@ -82,6 +88,48 @@ class Port:
         """
         return self.__history
 
+    def setHistoryLimit(self, size=None, overflow=None):
+        """
+        Sets the retention policy of the signal history. By default, all values
+        are kept for the entire simulation.
+
+        Args:
+            size (int):             The amount of signals to retain. Must be at least
+                                    :attr:`MIN_HISTORY`. When :code:`None`, the history
+                                    is unbounded. Defaults to :code:`None`.
+            overflow (callable):    Function that is called with this port and the
+                                    signal whenever a signal is dropped from the
+                                    history. Can be used to stream older values to
+                                    a file or a tracer. Defaults to :code:`None`.
+
+        Note:
+            The history will still be indexed on the iteration number, but values
+            outside of the retained window will yield an :code:`IndexError`.
+
+        Warning:
+            The tracers access the history from a separate thread. When they cannot
+            keep up with the simulation, make sure the window is sufficiently large,
+            or use the :attr:`overflow` argument instead.
+        """
+        assert len(self.__history) == 0, "Cannot change the history limit of a port with signals."
+        if size is None:
+            self.__history = []
+        else:
+            assert size >= Port.MIN_HISTORY, "At least %d signals must be retained." % Port.MIN_HISTORY
+            if overflow is not None:
+                func = overflow
+                overflow = lambda signal: func(self, signal)
+            self.__history = RingBuffer(size, overflow)
+
+    def getHistoryLimit(self):
+        """
+        Obtains the amount of signals that are retained, or :code:`None` if the
+        history is unbounded.
+        """
+        if isinstance(self.__history, RingBuffer):
+            return self.__history.getSize()
+        return None
+
     def getPreviousPortClosure(self):
         """
         Find the previous port to which this port is connected that has no incoming connections.
@@ -104,13 +152,13 @@ class Port:
         I.e., it obtains the ports to whom this port transfers signals.
         """
         res = []
-        loop_for = [self]
-        visited = []
+        loop_for = deque([self])
+        visited = set()
         while len(loop_for) > 0:
-            elm = loop_for.pop(0)
+            elm = loop_for.popleft()
             if elm in visited:
                 raise ValueError("Loop Detected!")
-            visited.append(elm)
+            visited.add(elm)
             for out in elm.getOutgoing():
                 port = out.target
                 # End only in input ports
@@ -294,6 +342,19 @@ class BaseBlock:
     def hasOutputPortWithName(self, name):
         return name in self.__outputs
 
+    def getPortByName(self, name, direction):
+        """
+        Gets a port by its name and direction.
+
+        Args:
+            name (str):             The name of the port.
+            direction (Direction):  The direction of the port, i.e.,
+                                    :attr:`Port.Direction.IN` or :attr:`Port.Direction.OUT`.
+        """
+        if direction == Port.Direction.IN:
+            return self.getInputPortByName(name)
+        return self.getOutputPortByName(name)
+
     def reparentPorts(self):
         for port in self.getInputPorts() + self.getOutputPorts():
             port.block = self
@@ -303,12 +364,28 @@ class BaseBlock:
         (Deep) copies the current block, ignoring all connections or links
         that were set on this block.
         """
-        other = deepcopy(self)
+        other = deepcopy(self, self._cloneMemo())
         other.reparentPorts()
         other.resetPorts()
         other._parent = None
         return other
 
+    def _cloneMemo(self):
+        """
+        Obtains the :func:`copy.deepcopy` memo for :func:`clone`. It maps the
+        parent and the connections onto :code:`None`, such that the copy does
+        not follow them into the rest of the model, and the signal histories
+        onto empty ones, such that the cost of a clone does not depend on the
+        length of the previous simulation.
+        """
+        memo = {id(self._parent): None}
+        for port in self.getInputPorts() + self.getOutputPorts():
+            memo[id(port.getOutgoing())] = []
+            memo[id(port.getIncoming())] = None
+            history = port.getHistory()
+            memo[id(history)] = history.emptyCopy() if isinstance(history, RingBuffer) else []
+        return memo
+
     def getBlockName(self):
         """
         Gets the name of the block.
@@ -342,6 +419,14 @@ class BaseBlock:
         """
         self._parent = parent
 
+    def _structureChanged(self):
+        """
+        Notifies the parent(s) that the blocks or connections of the model have
+        changed. This invalidates all cached dependency graphs and schedules.
+        """
+        if self._parent is not None:
+            self._parent._structureChanged()
+
     def getBlockType(self):
         """
         Gets the type of the block. This is the name of the class.
@@ -379,6 +464,24 @@ class BaseBlock:
         name_output = "OUT1" if name_output is None else name_output
         return self.getOutputPortByName(name_output).getHistory()
 
+    def setHistoryLimit(self, size=None, overflow=None):
+        """
+        Sets the retention policy of the signal history of all ports of this block.
+
+        Args:
+            size (int):             The amount of signals to retain per port. When
+                                    :code:`None`, the histories are unbounded.
+                                    Defaults to :code:`None`.
+            overflow (callable):    Function that is called with the port and the
+                                    signal whenever a signal is dropped from a history.
+                                    Defaults to :code:`None`.
+
+        See Also:
+            :func:`Port.setHistoryLimit`
+        """
+        for port in self.getInputPorts() + self.getOutputPorts():
+            port.setHistoryLimit(size, overflow)
+
     def clearPorts(self):
         """
         Clears all signal data from the ports.
@@ -521,6 +624,7 @@ class BaseBlock:
         else:
             raise ValueError("Could not connect ports %s and %s!" % (name_input, name_output))
         Port.connect(source, target)
+        self._structureChanged()
 
     def unlinkInput(self, name_input):
         """
@@ -533,6 +637,7 @@ class BaseBlock:
         if target.getIncoming() is not None:
             source = target.getIncoming().source
             Port.disconnect(source, target)
+            self._structureChanged()
 
     def __repr__(self):
         return self.getPath() + ":" + self.getBlockType()
@@ -584,36 +689,39 @@ class CBD(BaseBlock):
         self.__blocks = []
         self.__blocksDict = {}
         self.__clock = None
+        self.__history_policy = None
+        self.__structure_version = 0
 
     def clone(self):
-        # Clone all fields
+        # Clone all fields, except for the blocks
         other: CBD = BaseBlock.clone(self)
-        # other.setClock(deepcopy(self.getClock()))
 
         # Re-add all blocks to ensure deep cloning
-        other.clearBlocks()
+        clones = {self: other}
         for block in self.getBlocks():
-            other.addBlock(block.clone())
+            clones[block] = other.addBlock(block.clone())
 
-        # Reconnect all blocks in the clone
+        # Reconnect all blocks in the clone, i.e., all ports that can have an incoming connection
+        targets = self.getOutputPorts()
         for block in self.getBlocks():
-            for inp in block.getInputPorts():
-                prev = inp.getIncoming().source
-                if prev.block == self: continue
-                other.addConnection(prev.block.getBlockName(), inp.block.getBlockName(), output_port_name=prev.name, input_port_name=inp.name)
-        for inp in self.getInputPorts():
-            for target in inp.getOutgoing():
-                nxt = target.target
-                if other.getBlockName() == nxt.block.getBlockName():
-                    other.addConnection(inp.name, nxt.name)
-                else:
-                    other.addConnection(other, nxt.block.getBlockName(), output_port_name=inp.name, input_port_name=nxt.name)
-        for out in self.getOutputPorts():
-            prev = out.getIncoming().source
-            if other.getBlockName() == prev.block.getBlockName(): continue
-            other.addConnection(prev.block.getBlockName(), other, output_port_name=prev.name, input_port_name=out.name)
+            targets.extend(block.getInputPorts())
+        for port in targets:
+            if port.getIncoming() is None:
+                continue
+            source = port.getIncoming().source
+            Port.connect(clones[source.block].getPortByName(source.name, source.direction),
+                         clones[port.block].getPortByName(port.name, port.direction))
+        other._structureChanged()
         return other
 
+    def _cloneMemo(self):
+        memo = BaseBlock._cloneMemo(self)
+        # The blocks are cloned individually
+        memo[id(self.__blocks)] = []
+        memo[id(self.__blocksDict)] = {}
+        memo[id(self.__clock)] = None
+        return memo
+
     def getTopCBD(self):
         """
         Finds the highest-level :class:`CBD` instance.
@@ -636,24 +744,32 @@ class CBD(BaseBlock):
         """
         if ignore is None: ignore = []
 
-        blocks = self.__blocks[:]
-        for block in blocks:
+        # The blocks that remain keep their order, the children of the flattened blocks are appended
+        blocks = []
+        children = []
+        for block in self.__blocks:
             if isinstance(block, CBD) and not block.getBlockType() in ignore:
                 block.flatten(ignore, psep)
                 for child in block.getBlocks():
                     child.setBlockName(block.getBlockName() + psep + child.getBlockName())
-                    self.addBlock(child)
+                    children.append(child)
                 for port in block.getInputPorts() + block.getOutputPorts():
                     if port.getIncoming() is not None:
                         source = port.getIncoming().source
                         Port.disconnect(source, port)
-                        outgoing = port.getOutgoing()[:]
-                        for conn in outgoing:
+                        for conn in port.getOutgoing()[:]:
                             target = conn.target
                             Port.disconnect(port, target)
-                            self.addConnection(source.block, target.block, input_port_name=target.name,
-                                               output_port_name=source.name)
-                self.removeBlock(block)
+                            Port.connect(source, target)
+                del self.__blocksDict[block.getBlockName()]
+            else:
+                blocks.append(block)
+
+        if len(blocks) < len(self.__blocks):
+            self.__blocks[:] = blocks
+            for child in children:
+                self.addBlock(child)
+            self._structureChanged()
 
     def flattened(self, ignore=None, psep="."):
         """
@@ -699,6 +815,20 @@ class CBD(BaseBlock):
         """
         self.__blocks.clear()
         self.__blocksDict.clear()
+        self._structureChanged()
+
+    def _structureChanged(self):
+        self.__structure_version += 1
+        BaseBlock._structureChanged(self)
+
+    def getStructureVersion(self):
+        """
+        Gets a counter that is increased whenever a block or a connection is added
+        to or removed from this model (or any of its submodels). It allows the
+        simulator to reuse dependency graphs and schedules for as long as the
+        structure of the model remains the same.
+        """
+        return self.__structure_version
 
     def getClock(self):
         """
@@ -763,8 +893,11 @@ class CBD(BaseBlock):
                 block.getBlockName() not in self.getOutputPortNames() + self.getInputPortNames():
             self.__blocks.append(block)
             self.__blocksDict[block.getBlockName()] = block
+            if self.__history_policy is not None:
+                block.setHistoryLimit(*self.__history_policy)
             if isinstance(block, Clock):
                 self.__clock = block
+            self._structureChanged()
         else:
             logger = logging.getLogger("CBD")
             logger.warning("Did not add this block as it has the same name '%s' as an already existing block/port." % block.getBlockName(), extra={ "block":self})
@@ -783,6 +916,7 @@ class CBD(BaseBlock):
         if block.getBlockName() in self.__blocksDict:
             self.__blocks.remove(self.__blocksDict[block.getBlockName()])
             del self.__blocksDict[block.getBlockName()]
+            self._structureChanged()
         else:
             exit("Warning: did not remove this block %s as it was not found" % block.getBlockName())
 
@@ -925,6 +1059,32 @@ class CBD(BaseBlock):
             res[port] = self.getSignalHistory(port)
         return res
 
+    def setHistoryLimit(self, size=None, overflow=None):
+        """
+        Sets the retention policy of the signal history of all ports in this
+        model, recursively.
+
+        Args:
+            size (int):             The amount of signals to retain per port. When
+                                    :code:`None`, the histories are unbounded.
+                                    Defaults to :code:`None`.
+            overflow (callable):    Function that is called with the port and the
+                                    signal whenever a signal is dropped from a history.
+                                    Defaults to :code:`None`.
+
+        Note:
+            The policy is remembered, i.e., it will also be applied to all blocks
+            that are added afterwards (e.g., the clock that is added by the
+            simulator).
+
+        See Also:
+            :func:`Port.setHistoryLimit`
+        """
+        self.__history_policy = None if size is None else (size, overflow)
+        for block in self.getBlocks():
+            block.setHistoryLimit(size, overflow)
+        BaseBlock.setHistoryLimit(self, size, overflow)
+
     def clearSignals(self):
         """
         Clears the output signals of all blocks and ports.
@@ -982,12 +1142,11 @@ class CBD(BaseBlock):
                             :code:`False`, the identifier will start at 1 and
                             no hashing will be done. Defaults to :code:`False`.
         """
-        names = set([x.getBlockName() for x in self.getBlocks()] + self.getInputPortNames() + self.getOutputPortNames())
         uid = 1
         if hash:
             uid = id(self)
         name = prefix
-        while name in names:
+        while name in self.__blocksDict or self.hasInputPortWithName(name) or self.hasOutputPortWithName(name):
             suffix = str(uid)
             if hash:
                 suffix = hash64(uid)
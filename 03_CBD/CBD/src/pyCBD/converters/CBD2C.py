@@ -0,0 +1,483 @@
+"""
+Generates C code that computes a single iteration of a CBD model, compiles it
+into a shared library with the system C compiler and runs it through :mod:`ctypes`.
+
+Like :mod:`pyCBD.converters.CBD2Python`, hierarchical models are flattened
+through the port closures and each signal becomes a variable. All variables
+of an iteration are kept in a single buffer of doubles, which is shared with
+the compiled code. Hence, no values are converted when calling the library:
+the outputs are read from the buffer directly. The values of the delay blocks
+are kept in a second buffer.
+
+The blocks that have no C equivalent (i.e., the clock, blocks outside of the
+standard library and custom steps of an execution plan) are computed by the
+Python interpreter. The plan is split into C functions around these blocks,
+which are called from a small generated Python function. The inputs of such
+a block are appended to their history just before it is computed.
+
+The compiled libraries are cached on disk and in memory, keyed by the hash of
+the generated source. As the values of the constant blocks are read at the
+start of each iteration, the source only depends on the structure of the model
+(and the parameters of the blocks).
+
+Example:
+	The C source code of the second iteration of a model is obtained with::
+
+		gen = CBD2C(model)
+		source, driver, namespace = gen.generate()
+		print(source)
+
+	Use :func:`pyCBD.simulator.Simulator.setCodeGeneration` to simulate a model
+	with compiled code.
+
+Note:
+	The C code computes in double precision. Integer signals (e.g., a Fibonacci
+	sequence) are therefore exact up to :math:`2^{53}` only and numerical edge
+	cases (e.g., overflows) follow the C semantics.
+"""
+
+import os
+import re
+import math
+import ctypes
+import stat
+import hashlib
+import tempfile
+import subprocess
+from collections import Counter
+
+from pyCBD.Core import CBD, Signal
+from pyCBD.depGraph import createDepGraph
+from pyCBD.scheduling import TopologicalScheduler, ExecutionPlan
+from pyCBD.lib.std import Clock, DelayBlock
+from pyCBD.converters.CBD2Python import _fail
+
+__all__ = ['CBD2C']
+
+# hash -> loaded library, shared by all generators
+_LIBRARIES = {}
+
+
+def _default_cache():
+	"""
+	Obtains the per-user cache directory for the compiled libraries.
+	"""
+	base = os.environ.get("XDG_CACHE_HOME", "") or os.path.join(os.path.expanduser("~"), ".cache")
+	return os.path.join(base, "pyCBD")
+
+
+def _check_owner(path):
+	"""
+	Checks that a file or directory belongs to the current user and that no
+	other user can write to it, such that no other user can plant a library.
+
+	Args:
+		path (str): The path to check.
+
+	Raises:
+		RuntimeError: When the path is unsafe.
+	"""
+	info = os.lstat(path)
+	if hasattr(os, "getuid") and info.st_uid != os.getuid():
+		raise RuntimeError("Refusing to use '%s', which is owned by another user." % path)
+	if info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+		raise RuntimeError("Refusing to use '%s', which is writable by other users." % path)
+
+HEADER = """#include <math.h>
+
+static double _min(double a, double b) { return b < a ? b : a; }
+static double _max(double a, double b) { return b > a ? b : a; }
+"""
+
+# Single-argument functions of the math module that behave the same in math.h
+FUNCTIONS = {
+	"sin": "sin", "cos": "cos", "tan": "tan", "asin": "asin", "acos": "acos", "atan": "atan",
+	"sinh": "sinh", "cosh": "cosh", "tanh": "tanh", "asinh": "asinh", "acosh": "acosh", "atanh": "atanh",
+	"exp": "exp", "expm1": "expm1", "log": "log", "log2": "log2", "log10": "log10", "log1p": "log1p",
+	"sqrt": "sqrt", "cbrt": "cbrt", "fabs": "fabs", "floor": "floor", "ceil": "ceil", "trunc": "trunc",
+	"erf": "erf", "erfc": "erfc", "gamma": "tgamma", "lgamma": "lgamma",
+}
+
+
+def _literal(value):
+	"""
+	Obtains the C literal of a number, or :code:`None` if it is not a number.
+	"""
+	if isinstance(value, bool) or not isinstance(value, (int, float)):
+		return None
+	value = float(value)
+	if math.isnan(value):
+		return "NAN"
+	if math.isinf(value):
+		return "INFINITY" if value > 0 else "-INFINITY"
+	return repr(value)
+
+
+def _fold(l, fmt, empty):
+	res = l[-1] if len(l) > 0 else empty
+	for expr in reversed(l[:-1]):
+		res = fmt.format(expr, res)
+	return res
+
+
+def _multiplexer(l, block):
+	select = "(%s + 1)" % l[0] if block.isZeroBased() else l[0]
+	res = l[-1]
+	for i in range(len(l) - 2, 0, -1):
+		res = "((long) %s == %d ? %s : %s)" % (select, i, l[i], res)
+	return res
+
+
+# Block type -> lambda of the input expressions and the block. The result is the
+#   C expression of all output ports, or None when the block has no equivalent.
+EXPRESSIONS = {
+	"NegatorBlock": lambda l, b: "(-%s)" % l[0],
+	"InverterBlock": lambda l, b: "(1.0 / %s)" % l[0],
+	"GainBlock": lambda l, b: _literal(b._value) and "(%s * %s)" % (l[0], _literal(b._value)),
+	"AdderBlock": lambda l, b: "(%s)" % " + ".join(l) if len(l) > 0 else "0.0",
+	"ProductBlock": lambda l, b: "(%s)" % " * ".join(l) if len(l) > 0 else "1.0",
+	"ModuloBlock": lambda l, b: "fmod(%s, %s)" % (l[0], l[1]),
+	"RootBlock": lambda l, b: "pow(%s, 1.0 / %s)" % (l[0], l[1]),
+	"PowerBlock": lambda l, b: "pow(%s, %s)" % (l[0], l[1]),
+	"AbsBlock": lambda l, b: "fabs(%s)" % l[0],
+	"IntBlock": lambda l, b: "trunc(%s)" % l[0],
+	"ClampBlock": lambda l, b: ("_min(_max(%s, %s), %s)" % (l[0], _literal(b.min), _literal(b.max))
+	                            if _literal(b.min) and _literal(b.max) else None) if b._use_const
+	                           else "_min(_max(%s, %s), %s)" % tuple(l),
+	"GenericBlock": lambda l, b: b.getBlockOperator() in FUNCTIONS and "%s(%s)" % (FUNCTIONS[b.getBlockOperator()], l[0]),
+	"MultiplexerBlock": _multiplexer,
+	"MinBlock": lambda l, b: _fold(l, "_min({0}, {1})", None),
+	"MaxBlock": lambda l, b: _fold(l, "_max({0}, {1})", None),
+	"SplitBlock": lambda l, b: l[0],
+	"LessThanBlock": lambda l, b: "(%s < %s ? 1.0 : 0.0)" % (l[0], l[1]),
+	"EqualsBlock": lambda l, b: "(%s == %s ? 1.0 : 0.0)" % (l[0], l[1]),
+	"LessThanOrEqualsBlock": lambda l, b: "(%s <= %s ? 1.0 : 0.0)" % (l[0], l[1]),
+	"NotBlock": lambda l, b: "(%s ? 0.0 : 1.0)" % l[0],
+	"OrBlock": lambda l, b: _fold(l, "({0} ? {0} : {1})", "0.0"),
+	"AndBlock": lambda l, b: _fold(l, "({0} ? {1} : {0})", "1.0"),
+}
+
+# Block type -> lambda of the input expressions, the output expression and the block.
+#   The result is a list of (condition, error, message) tuples that are checked after
+#   the block was computed. The error is raised when the condition holds.
+CHECKS = {
+	"InverterBlock": lambda l, o, b: [("fabs(%s) < %s" % (l[0], _literal(b._tolerance)), ZeroDivisionError,
+	                                   "InverterBlock '%s' received input less than %s." % (b.getPath(), b._tolerance))],
+	"RootBlock": lambda l, o, b: [("fabs(%s) < %s" % (l[1], _literal(b._tolerance)), ZeroDivisionError,
+	                               "RootBlock '%s' received input less than %s." % (b.getPath(), b._tolerance))],
+	"MultiplexerBlock": lambda l, o, b: [("!(%s >= %d && %s <= %d)" % (l[0], 0 if b.isZeroBased() else 1,
+	                                                                   l[0], b.getNumberOfInputs() - b.isZeroBased()),
+	                                      IndexError, "Select input out of range for block %s" % b.getPath())],
+	"GenericBlock": lambda l, o, b: [("isnan(%s) && !isnan(%s)" % (o, l[0]), ValueError, "math domain error")],
+}
+
+
+def _collect(block, res):
+	"""
+	Collects all delay blocks in a (hierarchical) block.
+	"""
+	for child in block.getBlocks():
+		if isinstance(child, DelayBlock):
+			res[child] = len(res)
+		elif isinstance(child, CBD):
+			_collect(child, res)
+	return res
+
+
+class CBD2C:
+	"""
+	Generates and compiles C functions that compute a single iteration of a CBD model.
+
+	Args:
+		model (pyCBD.Core.CBD): The model to generate the code for.
+		exports (iter):         The ports whose history must be kept. When :code:`None`,
+								the output ports of the model are used. Defaults to
+								:code:`None`.
+		cache (str):            The directory in which the compiled libraries are
+								stored. It is created if needed and must only be
+								writable by the current user. When :code:`None`,
+								the :code:`pyCBD` folder in the user's cache
+								directory (:code:`$XDG_CACHE_HOME` or :code:`~/.cache`)
+								is used. Defaults to :code:`None`.
+		compiler (str):         The C compiler to use. When :code:`None`, the :code:`CC`
+								environment variable is used, or :code:`cc` if it is not
+								set. Defaults to :code:`None`.
+
+	Attributes:
+		state:  The outputs of the :class:`pyCBD.lib.std.DelayBlock` instances for the
+				next iteration, as a :mod:`ctypes` array. The state is shared by all
+				functions that are compiled by this instance.
+
+	See Also:
+		:class:`pyCBD.converters.CBD2Python.CBD2Python`
+	"""
+	FLAGS = ["-O2", "-shared", "-fPIC"]
+
+	def __init__(self, model, exports=None, cache=None, compiler=None):
+		self.model = model
+		self.exports = list(model.getOutputPorts()) if exports is None else list(exports)
+		self.cache = _default_cache() if cache is None else cache
+		self.compiler = os.environ.get("CC", "cc") if compiler is None else compiler
+		self.__delays = _collect(model, {})
+		self.state = (ctypes.c_double * max(len(self.__delays), 1))()
+
+	def plan(self, initial=False):
+		"""
+		Creates the execution plan of the model.
+
+		Args:
+			initial (bool): Whether to plan the first iteration or any other.
+							Defaults to :code:`False`.
+		"""
+		curIt = 0 if initial else 1
+		depGraph = createDepGraph(self.model, curIt)
+		scheduler = TopologicalScheduler()
+		return ExecutionPlan(scheduler.schedule(depGraph, curIt, 0.0), depGraph, scheduler)
+
+	def generate(self, plan=None, initial=False, name="step"):
+		"""
+		Generates the C source code and the Python function that computes an
+		iteration. The Python function takes the iteration as its only argument
+		and calls the C functions :code:`<name>_0`, :code:`<name>_1`... These
+		functions take the buffer of variables and the state and return the
+		(1-based) index of the error that occurred, or 0.
+
+		Args:
+			plan (pyCBD.scheduling.ExecutionPlan):  The plan to compute. When :code:`None`,
+													the plan is created with :func:`plan`.
+													Defaults to :code:`None`.
+			initial (bool):                         Whether the plan computes the first
+													iteration. Defaults to :code:`False`.
+			name (str):                             The name of the functions. Defaults
+													to :code:`"step"`.
+
+		Returns:
+			A tuple of the C source code, the Python source code and the globals
+			the latter must be executed in (without the C functions).
+
+		Raises:
+			NotImplementedError: When the plan contains algebraic loops or multi-rate
+								 blocks.
+		"""
+		if plan is None:
+			plan = self.plan(initial)
+		namespace = {"Signal": Signal, "_fail": _fail, "S": self.state, "E": []}
+		names = {}
+
+		def bind(obj):
+			if id(obj) not in names:
+				names[id(obj)] = "B%d" % len(names)
+				namespace[names[id(obj)]] = obj
+			return names[id(obj)]
+
+		def var(port):
+			variables[port] = "V[%d]" % len(variables)
+			return variables[port]
+
+		variables = {}
+		published = set()
+		clocked = False
+		lines = []
+		functions = []
+		segment = None
+		for compute, rate, block in plan.steps:
+			if compute is None:
+				raise NotImplementedError("Cannot generate code for the algebraic loop of %s."
+				                          % ", ".join(b.getPath() for b in block))
+			if rate is not None:
+				raise NotImplementedError("Cannot generate code for block '%s' with rate %s." % (block.getPath(), rate))
+			outputs = block.getOutputPorts()
+			btype = block.getBlockType()
+
+			if compute != block.compute or isinstance(block, Clock):
+				clocked = clocked or isinstance(block, Clock)
+				expr = None
+			elif btype == "ConstantBlock":
+				lines.insert(0, "%s = %s()" % (var(outputs[0]), bind(block.getValue)))
+				continue
+			elif btype == "TimeBlock":
+				clock = block.getClock()
+				lines.insert(0, "%s = %s(i)" % (var(outputs[0]), bind(clock.getTime)))
+				lines.insert(1, "%s = %s(i)" % (var(outputs[1]), bind(clock.getRelativeTime)))
+				continue
+			elif btype == "DeltaTBlock":
+				line = "%s = max(%s(), %s)" % (var(outputs[0]), bind(block.getValue), bind(block.min))
+				if not clocked:
+					# The delta only changes when the clock is computed
+					lines.insert(0, line)
+					continue
+				lines.append("# %s" % block.getPath())
+				lines.append(line)
+				segment = None
+				continue
+			elif isinstance(block, DelayBlock):
+				k = self.__delays[block]
+				expr = self.__source(block.getInputPortByName("IC"), variables) if initial else "S[%d]" % k
+			elif btype in EXPRESSIONS:
+				inputs = [self.__source(port, variables) for port in block.getInputPorts()]
+				expr = EXPRESSIONS[btype](inputs, block)
+			else:
+				expr = None
+
+			if not expr:
+				# Computed by the interpreter
+				lines.append("# %s" % block.getPath())
+				for port in block.getInputPorts():
+					if port.getIncoming() is None:
+						continue
+					source = port.getPreviousPortClosure()
+					if source in variables and source not in published:
+						published.add(source)
+						lines.append("%s(%s, %r)" % (bind(source.block.appendToSignal), variables[source], source.name))
+				lines.append("%s(i)" % bind(compute))
+				for port in outputs:
+					published.add(port)
+					lines.append("%s = %s.get().value" % (var(port), bind(port)))
+				segment = None
+				continue
+
+			if segment is None:
+				segment = []
+				functions.append(segment)
+				lines.append("e = %s_%d(V, S)" % (name, len(functions) - 1))
+				lines.append("if e: _fail(*E[e - 1])")
+			segment.append("/* %s */" % block.getPath().replace("*/", "* /"))
+			for port in outputs:
+				segment.append("%s = %s;" % (var(port), expr if port is outputs[0] else variables[outputs[0]]))
+			if btype in CHECKS:
+				for condition, error, message in CHECKS[btype](inputs, variables[outputs[0]], block):
+					namespace["E"].append((error, message))
+					segment.append("if (%s) return %d;" % (condition, len(namespace["E"])))
+
+		updates = ["S[%d] = %s;" % (k, self.__source(block.getInputPortByName("IN1"), variables))
+		           for block, k in self.__delays.items() if block.getOutputPortByName("OUT1") in variables]
+		if len(updates) > 0:
+			if segment is None:
+				segment = []
+				functions.append(segment)
+				lines.append("%s_%d(V, S)" % (name, len(functions) - 1))
+			segment.extend(updates)
+
+		if len(self.exports) > 0:
+			clock = self.model.getClock()
+			if clock.getOutputPortByName("time") in variables:
+				# The time of the iteration is the value of the clock
+				lines.append("t = %s" % variables[clock.getOutputPortByName("time")])
+			else:
+				lines.append("t = %s(i)" % bind(clock.getTime))
+			exports = set(self.exports)
+			for port in self.exports:
+				if port in published or self.__transferred(port, published | exports):
+					# The history is already set by the connections of another port
+					continue
+				lines.append("%s.set(Signal(t, %s))" % (bind(port), self.__source(port, variables)))
+
+		namespace["V"] = (ctypes.c_double * max(len(variables), 1))()
+		source = HEADER
+		for k, segment in enumerate(functions):
+			source += "\nint %s_%d(double *V, double *S) {\n\t%s\n\treturn 0;\n}\n" % (name, k, "\n\t".join(segment))
+		# Values that are read by the driver, but never used
+		uses = Counter(re.findall(r"V\[\d+\]", source + "\n".join(lines)))
+		lines = [line for line in lines if not (line.startswith("V[") and uses[line.split(" ", 1)[0]] == 1)]
+		driver = "def %s(i):\n\t%s\n" % (name, "\n\t".join(lines) if len(lines) > 0 else "pass")
+		return source, driver, namespace
+
+	def compile(self, plan=None, initial=False, name="step"):
+		"""
+		Generates and compiles the function that computes an iteration.
+
+		Args:
+			plan (pyCBD.scheduling.ExecutionPlan):  The plan to compute. When :code:`None`,
+													the plan is created with :func:`plan`.
+													Defaults to :code:`None`.
+			initial (bool):                         Whether the plan computes the first
+													iteration. Defaults to :code:`False`.
+			name (str):                             The name of the function. Defaults
+													to :code:`"step"`.
+
+		Returns:
+			The function, which takes the iteration as its only argument.
+
+		Raises:
+			RuntimeError: When the C code cannot be compiled.
+
+		See Also:
+			:func:`generate`
+		"""
+		source, driver, namespace = self.generate(plan, initial, name)
+		library = self.load(source)
+		k = 0
+		while hasattr(library, "%s_%d" % (name, k)):
+			namespace["%s_%d" % (name, k)] = getattr(library, "%s_%d" % (name, k))
+			k += 1
+		exec(compile(driver, "<%s:%s>" % (self.model.getPath(), name), "exec"), namespace)
+		return namespace[name]
+
+	def load(self, source):
+		"""
+		Loads the shared library of the C source code. When it is not in the
+		cache, it is compiled first.
+
+		Args:
+			source (str):   The C source code.
+
+		Raises:
+			RuntimeError: When the C code cannot be compiled or loaded, or when the
+						  cache directory or the library is not owned by the current
+						  user.
+		"""
+		key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+		if key in _LIBRARIES:
+			return _LIBRARIES[key]
+		os.makedirs(self.cache, mode=0o700, exist_ok=True)
+		_check_owner(self.cache)
+		path = os.path.join(self.cache, "cbd_%s.so" % key)
+		if not os.path.isfile(path):
+			fd, csource = tempfile.mkstemp(suffix=".c", dir=self.cache)
+			with os.fdopen(fd, 'w') as file:
+				file.write(source)
+			target = csource[:-2] + ".so"
+			try:
+				result = subprocess.run([self.compiler] + self.FLAGS + ["-o", target, csource, "-lm"],
+				                        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+			except OSError as e:
+				raise RuntimeError("Cannot run the C compiler '%s': %s" % (self.compiler, e))
+			finally:
+				os.remove(csource)
+			if result.returncode != 0:
+				raise RuntimeError("Cannot compile the C code of model '%s':\n%s" % (self.model.getPath(), result.stdout))
+			os.chmod(target, 0o700)
+			# Other processes may compile the same library concurrently
+			os.replace(target, path)
+		_check_owner(path)
+		try:
+			_LIBRARIES[key] = ctypes.CDLL(path)
+		except OSError as e:
+			raise RuntimeError("Cannot load the compiled library of model '%s': %s" % (self.model.getPath(), e))
+		return _LIBRARIES[key]
+
+	@staticmethod
+	def __transferred(port, ports):
+		"""
+		Checks if one of the ports transfers its signals to the given port.
+		"""
+		while port.getIncoming() is not None:
+			port = port.getIncoming().source
+			if port in ports:
+				return True
+		return False
+
+	@staticmethod
+	def __source(port, variables):
+		"""
+		Obtains the variable that holds the value of a port.
+		"""
+		if port not in variables:
+			if port.getIncoming() is None:
+				raise NotImplementedError("Cannot generate code for port '%s', which is not connected."
+				                          % port.block.getPath())
+			port = port.getPreviousPortClosure()
+			if port not in variables:
+				raise NotImplementedError("Cannot generate code for port '%s' of '%s', which is not computed."
+				                          % (port.name, port.block.getPath()))
+		return variables[port]
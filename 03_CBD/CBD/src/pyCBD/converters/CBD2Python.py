@@ -0,0 +1,269 @@
+"""
+Generates Python source code that computes a single iteration of a CBD model.
+
+Interpreting a model calls the :code:`compute` method of each block, which reads
+its inputs from and appends its outputs to the signal histories. The generated
+function instead computes all blocks of an execution plan in a single function,
+in which each signal is a local variable and the semantics of the standard
+library blocks (see :mod:`pyCBD.lib.std`) are inlined. The values of the delay
+blocks are kept in a state list. Hierarchical models are flattened through the
+port closures, like the dependency graph does.
+
+Only the histories of the exported ports are kept, which are the output ports
+of the model by default.
+
+Example:
+	The source code of the second iteration of a model is obtained with::
+
+		gen = CBD2Python(model)
+		source, namespace = gen.generate()
+		print(source)
+
+	Use :func:`pyCBD.simulator.Simulator.setCodeGeneration` to simulate a model
+	with generated code.
+"""
+
+import math
+
+from pyCBD.Core import Signal
+from pyCBD.depGraph import createDepGraph
+from pyCBD.scheduling import TopologicalScheduler, ExecutionPlan
+from pyCBD.lib.std import Clock, DelayBlock
+
+__all__ = ['CBD2Python']
+
+
+def _fail(error, message):
+	raise error(message)
+
+
+def _checked(expr, value, tolerance, bind, block):
+	return "({0} if abs({1}) >= {2} else _fail(ZeroDivisionError, {3}))".format(
+		expr, value, bind(tolerance), bind("%s '%s' received input less than %s."
+		                                   % (block.getBlockType(), block.getPath(), tolerance)))
+
+
+def _multiplexer(l, block, bind):
+	select = "(%s + 1)" % l[0] if block.isZeroBased() else l[0]
+	return "((None, {0})[int({1})] if 1 <= {1} <= {2} else _fail(IndexError, {3}))".format(
+		", ".join(l[1:]), select, block.getNumberOfInputs(),
+		bind("Select input out of range for block %s" % block.getPath()))
+
+
+def _time(l, block, bind):
+	clock = block.getClock()
+	return {"OUT1": "%s(i)" % bind(clock.getTime), "relative": "%s(i)" % bind(clock.getRelativeTime)}
+
+
+# Block type -> lambda of the input expressions, the block and a function that makes
+#   an object available to the generated code (returning its name). The result is
+#   the expression of all output ports, or a dictionary of port name -> expression.
+EXPRESSIONS = {
+	"ConstantBlock": lambda l, b, bind: "%s()" % bind(b.getValue),
+	"NegatorBlock": lambda l, b, bind: "(-%s)" % l[0],
+	"InverterBlock": lambda l, b, bind: _checked("1.0 / %s" % l[0], l[0], b._tolerance, bind, b),
+	"GainBlock": lambda l, b, bind: "(%s * %s)" % (l[0], bind(b._value)),
+	"AdderBlock": lambda l, b, bind: "(%s)" % " + ".join(l) if len(l) > 0 else "0",
+	"ProductBlock": lambda l, b, bind: "(%s)" % " * ".join(l) if len(l) > 0 else "1",
+	"ModuloBlock": lambda l, b, bind: "fmod(%s, %s)" % (l[0], l[1]),
+	"RootBlock": lambda l, b, bind: _checked("%s ** (1 / %s)" % (l[0], l[1]), l[1], b._tolerance, bind, b),
+	"PowerBlock": lambda l, b, bind: "(%s ** %s)" % (l[0], l[1]),
+	"AbsBlock": lambda l, b, bind: "abs(%s)" % l[0],
+	"IntBlock": lambda l, b, bind: "int(%s)" % l[0],
+	"ClampBlock": lambda l, b, bind: "min(max(%s, %s), %s)" % ((l[0], bind(b.min), bind(b.max)) if b._use_const else tuple(l)),
+	"GenericBlock": lambda l, b, bind: "%s(%s)" % (bind(getattr(math, b.getBlockOperator())), l[0]),
+	"MultiplexerBlock": _multiplexer,
+	"MinBlock": lambda l, b, bind: "min(%s)" % ", ".join(l),
+	"MaxBlock": lambda l, b, bind: "max(%s)" % ", ".join(l),
+	"SplitBlock": lambda l, b, bind: l[0],
+	"LessThanBlock": lambda l, b, bind: "(1 if %s < %s else 0)" % (l[0], l[1]),
+	"EqualsBlock": lambda l, b, bind: "(1 if %s == %s else 0)" % (l[0], l[1]),
+	"LessThanOrEqualsBlock": lambda l, b, bind: "(1 if %s <= %s else 0)" % (l[0], l[1]),
+	"NotBlock": lambda l, b, bind: "(0 if %s else 1)" % l[0],
+	"OrBlock": lambda l, b, bind: "(0 or %s)" % " or ".join(l),
+	"AndBlock": lambda l, b, bind: "(1 and %s)" % " and ".join(l),
+	"DeltaTBlock": lambda l, b, bind: "max(%s(), %s)" % (bind(b.getClock().getDeltaT), bind(b.min)),
+	"TimeBlock": _time,
+}
+
+
+class CBD2Python:
+	"""
+	Generates a Python function that computes a single iteration of a CBD model.
+
+	Args:
+		model (pyCBD.Core.CBD): The model to generate the code for.
+		exports (iter):         The ports whose history must be kept. When :code:`None`,
+								the output ports of the model are used. Defaults to
+								:code:`None`.
+
+	Attributes:
+		state (list):   The outputs of the :class:`pyCBD.lib.std.DelayBlock` instances
+						for the next iteration. The state is shared by all functions
+						that are generated by this instance.
+
+	Note:
+		Steps of an execution plan that are not the :code:`compute` method of their
+		block (e.g., those of :class:`pyCBD.ode.ODESystem`), as well as the clock,
+		are called as is. Their outputs are read from the history.
+	"""
+	def __init__(self, model, exports=None):
+		self.model = model
+		self.exports = list(model.getOutputPorts()) if exports is None else list(exports)
+		self.state = []
+		self.__delays = {}
+
+	def plan(self, initial=False):
+		"""
+		Creates the execution plan of the model.
+
+		Args:
+			initial (bool): Whether to plan the first iteration or any other.
+							Defaults to :code:`False`.
+		"""
+		curIt = 0 if initial else 1
+		depGraph = createDepGraph(self.model, curIt)
+		scheduler = TopologicalScheduler()
+		return ExecutionPlan(scheduler.schedule(depGraph, curIt, 0.0), depGraph, scheduler)
+
+	def generate(self, plan=None, initial=False, name="step"):
+		"""
+		Generates the source code of a function that computes an iteration. The
+		function takes the iteration as its only argument.
+
+		Args:
+			plan (pyCBD.scheduling.ExecutionPlan):  The plan to compute. When :code:`None`,
+													the plan is created with :func:`plan`.
+													Defaults to :code:`None`.
+			initial (bool):                         Whether the plan computes the first
+													iteration. Defaults to :code:`False`.
+			name (str):                             The name of the function. Defaults
+													to :code:`"step"`.
+
+		Returns:
+			A tuple of the source code and the globals it must be executed in.
+
+		Raises:
+			NotImplementedError: When the plan contains algebraic loops, multi-rate
+								 blocks or blocks outside of the standard library.
+		"""
+		if plan is None:
+			plan = self.plan(initial)
+		namespace = {"Signal": Signal, "fmod": math.fmod, "_fail": _fail, "S": self.state}
+		names = {}
+
+		def bind(obj):
+			if id(obj) not in names:
+				names[id(obj)] = "B%d" % len(names)
+				namespace[names[id(obj)]] = obj
+			return names[id(obj)]
+
+		variables = {}
+		called = set()
+		lines = []
+		post = []
+		for compute, rate, block in plan.steps:
+			if compute is None:
+				raise NotImplementedError("Cannot generate code for the algebraic loop of %s."
+				                          % ", ".join(b.getPath() for b in block))
+			if rate is not None:
+				raise NotImplementedError("Cannot generate code for block '%s' with rate %s." % (block.getPath(), rate))
+			lines.append("# %s" % block.getPath())
+			outputs = block.getOutputPorts()
+			if compute != block.compute or isinstance(block, Clock):
+				lines.append("%s(i)" % bind(compute))
+				for port in outputs:
+					variables[port] = "v%d" % len(variables)
+					called.add(port)
+					lines.append("%s = %s.get().value" % (variables[port], bind(port)))
+				continue
+
+			if isinstance(block, DelayBlock):
+				if block not in self.__delays:
+					self.__delays[block] = len(self.state)
+					self.state.append(None)
+				k = self.__delays[block]
+				expr = self.__source(block.getInputPortByName("IC"), variables) if initial else "S[%d]" % k
+				post.append((k, block.getInputPortByName("IN1")))
+			elif block.getBlockType() in EXPRESSIONS:
+				inputs = [self.__source(port, variables) for port in block.getInputPorts()]
+				expr = EXPRESSIONS[block.getBlockType()](inputs, block, bind)
+			else:
+				raise NotImplementedError("Cannot generate code for block '%s' of type %s."
+				                          % (block.getPath(), block.getBlockType()))
+
+			for port in outputs:
+				variables[port] = "v%d" % len(variables)
+				if isinstance(expr, dict):
+					lines.append("%s = %s" % (variables[port], expr[port.name]))
+				elif port is outputs[0]:
+					lines.append("%s = %s" % (variables[port], expr))
+				else:
+					lines.append("%s = %s" % (variables[port], variables[outputs[0]]))
+
+		for k, port in post:
+			lines.append("S[%d] = %s" % (k, self.__source(port, variables)))
+		if len(self.exports) > 0:
+			clock = self.model.getClock()
+			if clock.getOutputPortByName("time") in variables:
+				# The time of the iteration is the value of the clock
+				lines.append("t = %s" % variables[clock.getOutputPortByName("time")])
+			else:
+				lines.append("t = %s(i)" % bind(clock.getTime))
+			exports = set(self.exports)
+			for port in self.exports:
+				if port in called or self.__transferred(port, called | exports):
+					# The history is already set by the connections of another port
+					continue
+				lines.append("%s.set(Signal(t, %s))" % (bind(port), self.__source(port, variables)))
+		source = "def %s(i):\n\t%s\n" % (name, "\n\t".join(lines))
+		return source, namespace
+
+	def compile(self, plan=None, initial=False, name="step"):
+		"""
+		Generates and compiles the function that computes an iteration.
+
+		Args:
+			plan (pyCBD.scheduling.ExecutionPlan):  The plan to compute. When :code:`None`,
+													the plan is created with :func:`plan`.
+													Defaults to :code:`None`.
+			initial (bool):                         Whether the plan computes the first
+													iteration. Defaults to :code:`False`.
+			name (str):                             The name of the function. Defaults
+													to :code:`"step"`.
+
+		Returns:
+			The function, which takes the iteration as its only argument.
+
+		See Also:
+			:func:`generate`
+		"""
+		source, namespace = self.generate(plan, initial, name)
+		exec(compile(source, "<%s:%s>" % (self.model.getPath(), name), "exec"), namespace)
+		return namespace[name]
+
+	@staticmethod
+	def __transferred(port, ports):
+		"""
+		Checks if one of the ports transfers its signals to the given port.
+		"""
+		while port.getIncoming() is not None:
+			port = port.getIncoming().source
+			if port in ports:
+				return True
+		return False
+
+	@staticmethod
+	def __source(port, variables):
+		"""
+		Obtains the variable that holds the value of a port.
+		"""
+		if port not in variables:
+			if port.getIncoming() is None:
+				raise NotImplementedError("Cannot generate code for port '%s', which is not connected."
+				                          % port.block.getPath())
+			port = port.getPreviousPortClosure()
+			if port not in variables:
+				raise NotImplementedError("Cannot generate code for port '%s' of '%s', which is not computed."
+				                          % (port.name, port.block.getPath()))
+		return variables[port]
@@ -4,7 +4,6 @@ This module implements a dependency graph
 :Original Author:        Marc Provost
 """
 from .Core import CBD, BaseBlock, Port
-import copy
 
 
 class DepNode:
@@ -56,9 +55,9 @@ class DepGraph:
 		# Dict holding a mapping "Object -> DepNode"
 		self.__semanticMapping = {}
 
-		# map object->list of objects depending on object
+		# map object->objects depending on object (a dict is used as an ordered set)
 		self.__dependents = {}
-		# map object->list of objects that influences object
+		# map object->objects that influence object (a dict is used as an ordered set)
 		self.__influencers = {}
 
 	def __repr__(self):
@@ -68,14 +67,14 @@ class DepGraph:
 				name = dep.name
 			else:
 				name = dep.getBlockName()
-			repr += name + ":" + str(self.__dependents[dep]) + "\n"
+			repr += name + ":" + str(list(self.__dependents[dep])) + "\n"
 		repr += "Influencers: \n"
 		for infl in self.__influencers:
 			if isinstance(infl, Port):
 				name = infl.name
 			else:
 				name = infl.getBlockName()
-			repr += name + ":" + str(self.__influencers[infl]) + "\n"
+			repr += name + ":" + str(list(self.__influencers[infl])) + "\n"
 		return repr
 
 	def addMember(self, object):
@@ -90,8 +89,8 @@ class DepGraph:
 		if not self.hasMember(object):
 			if not isinstance(object, CBD) or self.ignore_hierarchy:
 				node = DepNode(object)
-				self.__dependents[object] = []
-				self.__influencers[object] = []
+				self.__dependents[object] = {}
+				self.__influencers[object] = {}
 				self.__semanticMapping[object] = node
 			else:
 				for block in object.getBlocks():
@@ -121,10 +120,10 @@ class DepGraph:
 			ValueError: If object is not in the graph
 		"""
 		if self.hasMember(object):
-			for dependent in self.getDependents(object):
-				self.__influencers[dependent].remove(object)
-			for influencer in self.getInfluencers(object):
-				self.__dependents[influencer].remove(object)
+			for dependent in self.__dependents[object]:
+				del self.__influencers[dependent][object]
+			for influencer in self.__influencers[object]:
+				del self.__dependents[influencer][object]
 
 			del self.__dependents[object]
 			del self.__influencers[object]
@@ -175,8 +174,8 @@ class DepGraph:
 		if self.hasMember(dependent) and self.hasMember(influencer):
 			if not influencer in self.__influencers[dependent] and \
 					not dependent in self.__dependents[influencer]:
-				self.__influencers[dependent].append(influencer)
-				self.__dependents[influencer].append(dependent)
+				self.__influencers[dependent][influencer] = None
+				self.__dependents[influencer][dependent] = None
 		else:
 			if not self.hasMember(dependent):
 				raise ValueError("Specified dependent object is not member of this graph")
@@ -211,8 +210,8 @@ class DepGraph:
 		if self.hasMember(dependent) and self.hasMember(influencer):
 			if influencer in self.__influencers[dependent] and \
 					dependent in self.__dependents[influencer]:
-				self.__influencers[dependent].remove(influencer)
-				self.__dependents[influencer].remove(dependent)
+				del self.__influencers[dependent][influencer]
+				del self.__dependents[influencer][dependent]
 			else:
 				raise ValueError("Specified dependency does not exists")
 		else:
@@ -229,7 +228,7 @@ class DepGraph:
 			object: The object to get the dependents from.
 		"""
 		if self.hasMember(object):
-			return copy.copy(self.__dependents[object])
+			return list(self.__dependents[object])
 		else:
 			raise ValueError("Specified object is not member of this graph")
 
@@ -241,7 +240,7 @@ class DepGraph:
 			object: The object to get the influencers from.
 		"""
 		if self.hasMember(object):
-			return copy.copy(self.__influencers[object])
+			return list(self.__influencers[object])
 		else:
 			raise ValueError("Specified object is not member of this graph")
 
@@ -254,6 +253,20 @@ class DepGraph:
 		"""
 		return self.__semanticMapping
 
+	def getIndexed(self):
+		"""
+		Obtains the graph with integer node ids, which allows algorithms to
+		store their data in lists instead of dictionaries.
+
+		Returns:
+			A tuple of the list of objects (i.e., the object of node id :code:`i`
+			is at index :code:`i`, in the order of the semantic mapping) and the
+			list of the influencers of each node, as lists of node ids.
+		"""
+		nodes = list(self.__semanticMapping)
+		ids = {obj: i for i, obj in enumerate(nodes)}
+		return nodes, [[ids[inf] for inf in self.__influencers[obj]] for obj in nodes]
+
 	def __getDepNode(self, object):
 		"""
 		Gets the :class:`DepNode` of a specific object if it is
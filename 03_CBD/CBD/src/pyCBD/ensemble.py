@@ -0,0 +1,153 @@
+"""
+This module provides a simulator that executes a CBD model for many
+parameter sets at once.
+
+Instead of cloning the model and creating a simulator per sample, all
+ensemble members share a single model. Each parameter is a vector that holds
+a value for each member. These vectors are propagated through the model, such
+that all blocks from the standard library compute element-wise. Hence, all
+members advance in a single pass through the schedule.
+
+Warning:
+	This module requires :code:`numpy` to be installed.
+
+Example:
+	The following code simulates a model for 1000 different gains::
+
+		sim = EnsembleSimulator(model, 1000)
+		sim.setParameter("gain", numpy.linspace(0.0, 1.0, 1000))
+		sim.run(10.0)
+		history = sim.getMemberSignalHistory(42, "", "OUT1")
+"""
+
+import numpy as np
+
+from pyCBD.Core import Signal
+from pyCBD.simulator import Simulator
+
+
+class EnsembleSimulator(Simulator):
+	"""
+	Simulator for an ensemble of parameter sets of a single CBD model.
+
+	Args:
+		model (CBD.Core.CBD):   A :class:`CBD` model to simulate.
+		size (int):             The amount of ensemble members.
+
+	Note:
+		Blocks that are not parameterized output scalars, which are broadcast
+		to the ensemble when combined with a vector.
+
+	Warning:
+		State events are not supported, because each member can cross a level at
+		a different time. Algebraic loops can only be solved when their
+		coefficients are the same for all members.
+	"""
+	def __init__(self, model, size):
+		Simulator.__init__(self, model)
+		assert size > 0, "An ensemble must have at least one member."
+		self.__size = size
+		self.__parameters = {}
+
+	def getSize(self):
+		"""
+		Obtains the amount of ensemble members.
+		"""
+		return self.__size
+
+	def setParameter(self, path, values):
+		"""
+		Sets the values of a parameter for all ensemble members.
+
+		Args:
+			path (str):     The path of the block to parameterize, relative
+							to the simulated model. The block must have a
+							:code:`setValue` method (e.g., a
+							:class:`pyCBD.lib.std.ConstantBlock`).
+			values (iter):  The values for each ensemble member.
+
+		Raises:
+			ValueError: When the amount of values does not match the ensemble size.
+			TypeError:  When the block cannot be parameterized.
+		"""
+		block = self.model.find(path)[0]
+		if not hasattr(block, "setValue"):
+			raise TypeError("Block '%s' cannot be parameterized." % block.getPath())
+		values = np.asarray(values, dtype=float)
+		if values.shape != (self.__size,):
+			raise ValueError("Expected %d values for parameter '%s', got shape %s." % (self.__size, path, values.shape))
+		block.setValue(values)
+		self.__parameters[path] = values
+
+	def getParameters(self):
+		"""
+		Obtains all set parameters as a dictionary of :code:`path -> values`.
+		"""
+		return dict(self.__parameters)
+
+	def registerStateEvent(self, event):
+		raise NotImplementedError("State events are not supported in an ensemble simulation.")
+
+	def getMemberValue(self, value, member):
+		"""
+		Obtains the value of a single member from a (possibly broadcast) signal value.
+
+		Args:
+			value:          The signal value.
+			member (int):   The index of the ensemble member.
+		"""
+		if isinstance(value, np.ndarray) and value.ndim > 0:
+			return value[member].item()
+		return value
+
+	def getMemberSignalHistory(self, member, path, name_output=None):
+		"""
+		Obtains the signal history of a single ensemble member.
+
+		Args:
+			member (int):       The index of the ensemble member.
+			path (str):         The path of the block, relative to the simulated
+								model. Use an empty string for the model itself.
+			name_output (str):  The name of the output port. If not set, or
+								:code:`None`, the value of :code:`OUT1` will be used.
+
+		Returns:
+			A list of :class:`pyCBD.Core.Signal` instances.
+		"""
+		block = self.model.find(path)[0]
+		return [Signal(s.time, self.getMemberValue(s.value, member)) for s in block.getSignalHistory(name_output)]
+
+	def getMemberSignals(self, member):
+		"""
+		Obtains the histories of all output ports of the model for a single
+		ensemble member.
+
+		Args:
+			member (int):   The index of the ensemble member.
+
+		Returns:
+			A dictionary of :code:`port name -> list of signals`.
+		"""
+		return {port: self.getMemberSignalHistory(member, "", port) for port in self.model.getOutputPortNames()}
+
+	def getEnsembleSignalHistory(self, path, name_output=None):
+		"""
+		Obtains the signal history of all ensemble members at once.
+
+		Args:
+			path (str):         The path of the block, relative to the simulated
+								model. Use an empty string for the model itself.
+			name_output (str):  The name of the output port. If not set, or
+								:code:`None`, the value of :code:`OUT1` will be used.
+
+		Returns:
+			A tuple of the time points (as a vector of length :code:`N`) and
+			the values (as a matrix of shape :code:`N x size`).
+		"""
+		block = self.model.find(path)[0]
+		history = block.getSignalHistory(name_output)
+		times = np.array([s.time for s in history], dtype=float)
+		values = np.empty((len(history), self.__size))
+		for i, s in enumerate(history):
+			values[i] = s.value
+		return times, values
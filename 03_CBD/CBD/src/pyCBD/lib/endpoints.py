@@ -38,6 +38,7 @@ class CollectorBlock(BaseBlock):
 		return self._data
 
 	def _rewind(self):
+		BaseBlock._rewind(self)
 		self._data.pop()
 
 
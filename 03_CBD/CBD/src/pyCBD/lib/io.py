@@ -4,7 +4,12 @@ input/output in the form of file interaction.
 """
 
 from pyCBD.Core import BaseBlock
+from array import array
+from bisect import bisect_right
 import csv
+import mmap
+import os
+import struct
 
 class Interpolation:
 	"""
@@ -50,6 +55,11 @@ class ReadCSV(BaseBlock):
 	Reads data from a CSV file and outputs it on the corresponding timestamps.
 	The output ports are defined by the read CSV columns.
 
+	The columns of floats are stored in typed arrays and the record for the
+	current time is found with a binary search, which is skipped when the
+	time advances to the next record. Rewinding the simulation (e.g., to
+	locate a state event) therefore does not rescan the data.
+
 	Warning:
 		It is required to have a column that represents the time. Furthermore,
 		the dataset must be sorted w.r.t. this column.
@@ -92,8 +102,18 @@ class ReadCSV(BaseBlock):
 		dialect (str):          The dialect for parsing the data. Defaults to :code:`excel`.
 		nan (Any):              The value to insert when some fields are missing data.
 								Defaults to :code:`None`.
+		cache (str):            The name of a binary file in which the (float) columns
+								are stored. The file is created by streaming through the
+								CSV and is memory-mapped, such that only the pages that
+								are accessed are loaded. This allows reading files that
+								do not fit in memory. The file is reused as long as it
+								is newer than the CSV and contains the same columns.
+								When :code:`None` (default), the data is kept in memory.
 		**:                     For other values, take a look at the
 								`CSV Dialect and Formatting Parameters <https://docs.python.org/3/library/csv.html#csv-fmt-params>`_.
+
+	.. versionchanged:: 1.7
+		Added the :code:`cache` keyword argument and the binary search.
 	"""
 	def __init__(self, block_name, file_name, hold=Interpolation.FIRST, time_col="time", repeat=False, **kwargs):
 		self.repeat = repeat
@@ -103,7 +123,7 @@ class ReadCSV(BaseBlock):
 		self.hold = hold
 		self.index = -1
 
-	def __read_file(self, file_name, columns=None, dtype=float, dialect='excel', nan=None, **kwargs):
+	def __read_file(self, file_name, columns=None, dtype=float, dialect='excel', nan=None, cache=None, **kwargs):
 		"""
 		Reads a CSV file into memory.
 
@@ -122,10 +142,11 @@ class ReadCSV(BaseBlock):
 								Defaults to :code:`"excel"`.
 			nan:                The value to fill records with if their value is missing.
 								Defaults to :code:`None`.
+			cache (str):        The name of the binary file to memory-map the data from.
+								Defaults to :code:`None`.
 			**kwargs:           See `the csv.reader documentation formatting params
 								<https://docs.python.org/3/library/csv.html#csv.reader>`_
 		"""
-		self.data = {}
 		if columns is not None and self.time_col not in columns:
 			if isinstance(columns, list):
 				columns.append(self.time_col)
@@ -135,65 +156,176 @@ class ReadCSV(BaseBlock):
 				raise ValueError("Invalid column iterable '{}'".format(type(columns)))
 		if columns is not None and isinstance(columns, dict):
 			columns[self.time_col] = float
-			dtype = str
-		with open(file_name) as file:
-			reader = csv.DictReader(file, restkey=None, restval=nan, dialect=dialect, **kwargs)
-			for row in reader:
-				if columns is None:
-					columns = row.keys()
-				for col in columns:
-					if col not in row.keys():
-						raise ValueError("Unknown column '{}' in CSV".format(col))
-					value = dtype(row[col])
-					if isinstance(columns, dict):
-						value = columns[col](value)
-					self.data.setdefault(col, []).append(value)
+			types = columns
+		else:
+			types = None
+		with open(file_name, newline='') as file:
+			reader = csv.reader(file, dialect=dialect, **kwargs)
+			header = next(reader, [])
+			if columns is None:
+				columns = header
+			if types is None:
+				types = {col: dtype for col in columns}
+			for col in columns:
+				if col not in header:
+					raise ValueError("Unknown column '{}' in CSV".format(col))
+			fields = [(col, header.index(col), types[col]) for col in columns]
+			if cache is not None:
+				if any(t is not float for _, _, t in fields):
+					raise ValueError("Only columns of floats can be cached")
+				self.data = _BinaryCache(cache, file_name, [col for col, _, _ in fields]).open(reader, fields, nan)
+			else:
+				self.data = {col: array('d') if t is float else [] for col, _, t in fields}
+				for row in _records(reader, fields, nan):
+					for (col, _, _), value in zip(fields, row):
+						self.data[col].append(value)
 		if len(self.data[self.time_col]) == 0:
 			raise ValueError("CSV is empty")
 		if self.repeat and self.data[self.time_col][0] == 0.0:
 			raise ValueError("A repeating CSV series must not start at time 0")
 
+	def _cloneMemo(self):
+		memo = BaseBlock._cloneMemo(self)
+		# The data is never changed, hence it can be shared by the clones
+		memo[id(self.data)] = self.data
+		return memo
+
+	def __time(self, index):
+		"""
+		Obtains the time of a record, where the indices past the end of the data
+		refer to the repetitions. The record at index -1 happens at time 0.
+		"""
+		times = self.data[self.time_col]
+		L = len(times)
+		return times[index % L] + times[-1] * (index // L)
+
+	def __locate(self, time):
+		"""
+		Finds the index of the last record at or before the given time.
+		"""
+		index = self.index
+		if self.__time(index) <= time:
+			# Most of the time, the simulation advances by less than a record
+			if time < self.__time(index + 1):
+				return index
+			if time < self.__time(index + 2):
+				return index + 1
+		times = self.data[self.time_col]
+		period = int(time // times[-1]) if self.repeat else 0
+		index = period * len(times) + bisect_right(times, time - period * times[-1]) - 1
+		# Correct for the rounding errors in the period
+		while self.__time(index + 1) <= time:
+			index += 1
+		while self.__time(index) > time:
+			index -= 1
+		return index
+
 	def compute(self, curIteration):
 		time = self.getClock().getTime(curIteration)
-		T = self.data[self.time_col][-1]
-		L = len(self.data[self.time_col])
-		data = {k: self.data[k] for k in self.data if k != self.time_col}
+		times = self.data[self.time_col]
+		L = len(times)
+		outputs = self.getOutputPorts()
 		if L == 1:
-			for col in data:
-				self.appendToSignal(self.data[col][0], col)
+			for port in outputs:
+				self.appendToSignal(self.data[port.name][0], port.name)
 			return
 		if not self.repeat:
-			first_time = self.data[self.time_col][0]
-			if time <= first_time:
-				for col in data:
-					self.appendToSignal(self.data[col][0], col)
+			if time <= times[0]:
+				for port in outputs:
+					self.appendToSignal(self.data[port.name][0], port.name)
 				return
-			elif time >= T:
-				for col in data:
-					self.appendToSignal(self.data[col][-1], col)
+			elif time >= times[-1]:
+				for port in outputs:
+					self.appendToSignal(self.data[port.name][-1], port.name)
 				return
-			if self.index < 0:
-				self.index = 0
-		if self.index < 0:
-			next_time = last_time = 0.0
-		else:
-			next_time = last_time = self.data[self.time_col][self.index % L] + (T * (self.index // L))
-		while next_time <= time:
-			self.index += 1
-			last_time = next_time
-			next_time = self.data[self.time_col][self.index % L] + (T * (self.index // L))
-		self.index -= 1
-		# if self.index >= L:
-		# 	self.index %= L
-		for col in data:
-			a = last_time, self.data[col][self.index % L]
-			b = next_time, self.data[col][(self.index + 1) % L]
+		self.index = self.__locate(time)
+		last_time = self.__time(self.index)
+		next_time = self.__time(self.index + 1)
+		for port in outputs:
+			column = self.data[port.name]
+			a = last_time, column[self.index % L]
+			b = next_time, column[(self.index + 1) % L]
 			val = Interpolation.interpolate(a, b, time, self.hold)
-			self.appendToSignal(val, col)
+			self.appendToSignal(val, port.name)
 
-	def _rewind(self):
-		BaseBlock._rewind(self)
-		self.index = -1
+
+def _records(reader, fields, nan):
+	"""
+	Iterates over the converted values of the given fields in the records of
+	a CSV reader. Empty lines are skipped.
+	"""
+	for row in reader:
+		if len(row) == 0:
+			continue
+		yield [t(row[i]) if i < len(row) else nan for _, i, t in fields]
+
+
+class _BinaryCache:
+	"""
+	Binary file with the values of a CSV file as doubles, in native byte order.
+	After a header with the column names, the file contains the records one
+	after the other.
+
+	Args:
+		file_name (str):    The name of the binary file.
+		source (str):       The name of the CSV file.
+		columns (list):     The names of the columns in the file.
+	"""
+	MAGIC = b"pyCBDCSV"
+	CHUNK = 1 << 16
+	"""The number of values that are written at once."""
+
+	def __init__(self, file_name, source, columns):
+		self.file_name = file_name
+		self.source = source
+		self.columns = columns
+		names = "\n".join(columns).encode("utf-8")
+		header = self.MAGIC + struct.pack("<I", len(names)) + names
+		# Align the values to the size of a double
+		self.header = header + b"\0" * (-len(header) % 8)
+
+	def valid(self):
+		"""
+		Checks if the binary file exists, is newer than the CSV and contains the
+		same columns.
+		"""
+		if not os.path.isfile(self.file_name) or os.path.getmtime(self.file_name) < os.path.getmtime(self.source):
+			return False
+		with open(self.file_name, "rb") as file:
+			return file.read(len(self.header)) == self.header
+
+	def write(self, reader, fields, nan):
+		"""
+		Streams the records of a CSV reader into the binary file.
+		"""
+		temp = self.file_name + ".tmp"
+		with open(temp, "wb") as file:
+			file.write(self.header)
+			chunk = array('d')
+			for row in _records(reader, fields, nan):
+				chunk.extend(row)
+				if len(chunk) >= self.CHUNK:
+					chunk.tofile(file)
+					del chunk[:]
+			chunk.tofile(file)
+		os.replace(temp, self.file_name)
+
+	def open(self, reader, fields, nan):
+		"""
+		Memory-maps the binary file, after creating it if needed.
+
+		Returns:
+			A dictionary of column name -> sequence of values.
+		"""
+		if not self.valid():
+			self.write(reader, fields, nan)
+		with open(self.file_name, "rb") as file:
+			if os.path.getsize(self.file_name) == len(self.header):
+				return {col: array('d') for col in self.columns}
+			data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		values = memoryview(data)[len(self.header):].cast('d')
+		N = len(self.columns)
+		return {col: values[i::N] for i, col in enumerate(self.columns)}
 
 
 class WriteCSV(BaseBlock):
@@ -4,6 +4,14 @@ This file contains the standard library for CBD building blocks.
 from pyCBD.Core import BaseBlock, CBD
 import math
 
+_NUMPY_FOUND = True
+try:
+	import numpy as np
+	_VECTOR = (np.ndarray,)
+except ImportError:
+	_NUMPY_FOUND = False
+	_VECTOR = ()
+
 __all__ = ['ConstantBlock', 'NegatorBlock', 'InverterBlock',
            'AdderBlock', 'ProductBlock',
            'ModuloBlock', 'RootBlock', 'PowerBlock',
@@ -17,6 +25,21 @@ __all__ = ['ConstantBlock', 'NegatorBlock', 'InverterBlock',
            'AddOneBlock', 'DerivatorBlock', 'IntegratorBlock',
            'Clock', 'SequenceBlock']
 
+
+# Helper functions for the ensemble simulation (see pyCBD.ensemble), in which
+# signals can be NumPy vectors that hold a value for each ensemble member.
+def _truth(value):
+	"""Converts a (vector of) truthy/falsy value(s) to 1 or 0."""
+	if isinstance(value, _VECTOR):
+		return value.astype(int)
+	return 1 if value else 0
+
+def _any(value):
+	"""Checks if a value is truthy, or if any element of a vector is truthy."""
+	if isinstance(value, _VECTOR):
+		return bool(value.any())
+	return bool(value)
+
 class ConstantBlock(BaseBlock):
 	"""
 	The constant block will always output its constant value.
@@ -96,7 +119,7 @@ class InverterBlock(BaseBlock):
 
 	def compute(self, curIteration):
 		input = self.getInputSignal(curIteration, "IN1").value
-		if abs(input) < self._tolerance:
+		if _any(abs(input) < self._tolerance):
 			raise ZeroDivisionError("InverterBlock '{}' received input less than {}.".format(self.getPath(), self._tolerance))
 		self.appendToSignal(1.0 / input)
 
@@ -212,7 +235,11 @@ class ModuloBlock(BaseBlock):
 
 	def compute(self, curIteration):
 		# Use 'math.fmod' for validity with C w.r.t. negative values AND floats
-		self.appendToSignal(math.fmod(self.getInputSignal(curIteration, "IN1").value, self.getInputSignal(curIteration, "IN2").value))
+		a, b = self.getInputSignal(curIteration, "IN1").value, self.getInputSignal(curIteration, "IN2").value
+		if isinstance(a, _VECTOR) or isinstance(b, _VECTOR):
+			self.appendToSignal(np.fmod(a, b))
+		else:
+			self.appendToSignal(math.fmod(a, b))
 
 	def defaultInputPortNameIdentifier(self):
 		raise ValueError("The order of the operands is important for this block. Please provide a port name.")
@@ -248,7 +275,7 @@ class RootBlock(BaseBlock):
 
 	def compute(self, curIteration):
 		input = self.getInputSignal(curIteration, "IN2").value
-		if abs(input) < self._tolerance:
+		if _any(abs(input) < self._tolerance):
 			raise ZeroDivisionError("RootBlock '{}' received input less than {}.".format(self.getPath(), self._tolerance))
 		self.appendToSignal(self.getInputSignal(curIteration, "IN1").value ** (1 / input))
 
@@ -321,7 +348,11 @@ class IntBlock(BaseBlock):
 		BaseBlock.__init__(self, block_name, ["IN1"], ["OUT1"])
 
 	def compute(self, curIteration):
-		self.appendToSignal(int(self.getInputSignal(curIteration).value))
+		value = self.getInputSignal(curIteration).value
+		if isinstance(value, _VECTOR):
+			self.appendToSignal(value.astype(int))
+		else:
+			self.appendToSignal(int(value))
 
 
 class ClampBlock(BaseBlock):
@@ -363,7 +394,10 @@ class ClampBlock(BaseBlock):
 			min_ = self.getInputSignal(curIteration, "IN2").value
 			max_ = self.getInputSignal(curIteration, "IN3").value
 		x = self.getInputSignal(curIteration, "IN1").value
-		self.appendToSignal(min(max(x, min_), max_))
+		if isinstance(x, _VECTOR) or isinstance(min_, _VECTOR) or isinstance(max_, _VECTOR):
+			self.appendToSignal(np.minimum(np.maximum(x, min_), max_))
+		else:
+			self.appendToSignal(min(max(x, min_), max_))
 
 	def defaultInputPortNameIdentifier(self):
 		if not self._use_const:
@@ -412,7 +446,13 @@ class GenericBlock(BaseBlock):
 
 	def compute(self, curIteration):
 		a = self.getInputSignal(curIteration, "IN1").value
-		self.appendToSignal(getattr(math, self.getBlockOperator())(a))
+		if isinstance(a, _VECTOR):
+			func = getattr(np, self.getBlockOperator(), None)
+			if func is None:
+				func = np.vectorize(getattr(math, self.getBlockOperator()))
+			self.appendToSignal(func(a))
+		else:
+			self.appendToSignal(getattr(math, self.getBlockOperator())(a))
 
 	def __repr__(self):  # pragma: no cover
 		repr = BaseBlock.__repr__(self)
@@ -462,10 +502,14 @@ class MultiplexerBlock(BaseBlock):
 	def compute(self, curIteration):
 		select = self.getInputSignal(curIteration, "select").value
 		if self.__zero:
-			select += 1
-		if select < 0 or select > self.__numberOfInputs:
+			select = select + 1
+		if _any(select < 1) or _any(select > self.__numberOfInputs):
 			raise IndexError("Select input out of range for block %s" % self.getPath())
-		self.appendToSignal(self.getInputSignal(curIteration, "IN%d" % select).value)
+		if isinstance(select, _VECTOR):
+			inputs = [self.getInputSignal(curIteration, "IN%d" % i).value for i in range(1, self.__numberOfInputs + 1)]
+			self.appendToSignal(np.choose(select.astype(int) - 1, np.broadcast_arrays(*inputs)))
+		else:
+			self.appendToSignal(self.getInputSignal(curIteration, "IN%d" % select).value)
 
 	def getNumberOfInputs(self):
 		"""
@@ -473,6 +517,12 @@ class MultiplexerBlock(BaseBlock):
 		"""
 		return self.__numberOfInputs
 
+	def isZeroBased(self):
+		"""
+		Checks if the :code:`select` signal is zero-based.
+		"""
+		return self.__zero
+
 	def defaultInputPortNameIdentifier(self):
 		raise ValueError("The order of the operands is important for this block. Please provide a port name.")
 
@@ -501,7 +551,10 @@ class MinBlock(BaseBlock):
 		result = []
 		for i in range(1, self.__numberOfInputs+1):
 			result.append(self.getInputSignal(curIteration, "IN%d"%i).value)
-		self.appendToSignal(min(result))
+		if any(isinstance(x, _VECTOR) for x in result):
+			self.appendToSignal(np.min(np.broadcast_arrays(*result), axis=0))
+		else:
+			self.appendToSignal(min(result))
 
 	def getNumberOfInputs(self):
 		"""
@@ -534,7 +587,10 @@ class MaxBlock(BaseBlock):
 		result = []
 		for i in range(1, self.__numberOfInputs+1):
 			result.append(self.getInputSignal(curIteration, "IN%d"%i).value)
-		self.appendToSignal(max(result))
+		if any(isinstance(x, _VECTOR) for x in result):
+			self.appendToSignal(np.max(np.broadcast_arrays(*result), axis=0))
+		else:
+			self.appendToSignal(max(result))
 
 	def getNumberOfInputs(self):
 		"""
@@ -606,7 +662,7 @@ class LessThanBlock(BaseBlock):
 
 	def	compute(self, curIteration):
 		gisv = lambda s: self.getInputSignal(curIteration, s).value
-		self.appendToSignal(1 if gisv("IN1") < gisv("IN2") else 0)
+		self.appendToSignal(_truth(gisv("IN1") < gisv("IN2")))
 
 	def defaultInputPortNameIdentifier(self):
 		raise ValueError("The order of the operands is important for this block. Please provide a port name.")
@@ -637,7 +693,7 @@ class EqualsBlock(BaseBlock):
 
 	def	compute(self, curIteration):
 		gisv = lambda s: self.getInputSignal(curIteration, s).value
-		self.appendToSignal(1 if gisv("IN1") == gisv("IN2") else 0)
+		self.appendToSignal(_truth(gisv("IN1") == gisv("IN2")))
 
 
 class LessThanOrEqualsBlock(BaseBlock):
@@ -669,7 +725,7 @@ class LessThanOrEqualsBlock(BaseBlock):
 
 	def	compute(self, curIteration):
 		gisv = lambda s: self.getInputSignal(curIteration, s).value
-		self.appendToSignal(1 if gisv("IN1") <= gisv("IN2") else 0)
+		self.appendToSignal(_truth(gisv("IN1") <= gisv("IN2")))
 
 	def defaultInputPortNameIdentifier(self):
 		raise ValueError("The order of the operands is important for this block. Please provide a port name.")
@@ -699,8 +755,11 @@ class NotBlock(BaseBlock):
 		BaseBlock.__init__(self, block_name, ["IN1"], ["OUT1"])
 
 	def	compute(self, curIteration):
-		result = 0 if self.getInputSignal(curIteration, "IN1").value else 1
-		self.appendToSignal(result)
+		value = self.getInputSignal(curIteration, "IN1").value
+		if isinstance(value, _VECTOR):
+			self.appendToSignal(np.logical_not(value).astype(int))
+		else:
+			self.appendToSignal(0 if value else 1)
 
 
 class OrBlock(BaseBlock):
@@ -730,9 +789,13 @@ class OrBlock(BaseBlock):
 		self.__numberOfInputs = numberOfInputs
 
 	def	compute(self, curIteration):
+		values = [self.getInputSignal(curIteration, "IN%i" % i).value for i in range(1, self.__numberOfInputs+1)]
+		if any(isinstance(x, _VECTOR) for x in values):
+			self.appendToSignal(np.logical_or.reduce(np.broadcast_arrays(*values)).astype(int))
+			return
 		result = 0
-		for i in range(1, self.__numberOfInputs+1):
-			result = result or self.getInputSignal(curIteration, "IN%i" % i).value
+		for value in values:
+			result = result or value
 		self.appendToSignal(result)
 
 	def getNumberOfInputs(self):
@@ -769,9 +832,13 @@ class AndBlock(BaseBlock):
 		self.__numberOfInputs = numberOfInputs
 
 	def	compute(self, curIteration):
+		values = [self.getInputSignal(curIteration, "IN"+str(i)).value for i in range(1, self.__numberOfInputs+1)]
+		if any(isinstance(x, _VECTOR) for x in values):
+			self.appendToSignal(np.logical_and.reduce(np.broadcast_arrays(*values)).astype(int))
+			return
 		result = 1
-		for i in range(1, self.__numberOfInputs+1):
-			result = result and self.getInputSignal(curIteration, "IN"+str(i)).value
+		for value in values:
+			result = result and value
 		self.appendToSignal(result)
 
 	def getNumberOfInputs(self):
@@ -790,7 +857,8 @@ class DelayBlock(BaseBlock):
 
 	:Input Ports:
 		- **IN1** -- The input.
-		- **IC** -- The value to output at iteration 0 (i.e., the first iteration).
+		- **IC** -- The value to output at iteration 0 (i.e., the first iteration),
+		  or at the iteration of a warm restart (see :func:`Clock.restart`).
 
 	:Output Ports:
 		**OUT1** -- Outputs the input of the previous iteration.
@@ -815,16 +883,33 @@ class DelayBlock(BaseBlock):
 	"""
 	def __init__(self, block_name):
 		BaseBlock.__init__(self, block_name, ["IN1", "IC"], ["OUT1"])
+		self.__clock = None
 
 	def getDependencies(self, curIteration):
 		# TO IMPLEMENT: This is a helper function you can use to create the dependency graph
 		# Treat dependencies differently. For instance, at the first iteration (curIteration == 0), the block only depends on the IC;
-		if curIteration == 0:
+		if self.__isInitial(curIteration):
 			return [self.getInputPortByName("IC").getIncoming().source]
 		return []
 
-	def compute(self, curIteration):
+	def _cloneMemo(self):
+		memo = BaseBlock._cloneMemo(self)
+		# The clock is looked up again in the model of the clone
+		memo[id(self.__clock)] = None
+		return memo
+
+	def __isInitial(self, curIteration):
 		if curIteration == 0:
+			# Each run starts at iteration 0, so the clock is only looked up once per run
+			self.__clock = self.getClock()
+			return True
+		clock = self.__clock
+		if clock is None:
+			clock = self.__clock = self.getClock()
+		return clock is not None and clock.isInitial(curIteration)
+
+	def compute(self, curIteration):
+		if self.__isInitial(curIteration):
 			self.appendToSignal(self.getInputSignal(curIteration, "IC").value)
 		else:
 			self.appendToSignal(self.getInputSignal(curIteration - 1).value)
@@ -929,7 +1014,7 @@ class LoggingBlock(BaseBlock):
 		self.__lev = lev
 
 	def compute(self, curIteration):
-		if self.getInputSignal(curIteration, "IN1").value:
+		if _any(self.getInputSignal(curIteration, "IN1").value):
 			simtime = str(self.getClock().getTime(curIteration))
 			if self.__lev == logging.WARNING:
 				self.__logger.warning("[" + simtime + "]  " + self.__string, extra={"block": self})
@@ -1090,6 +1175,8 @@ class Clock(BaseBlock):
 		self.__start_time = start_time
 		self.__delta = self.__start_delta
 		self.__time = self.__start_time
+		# (iteration, time) of the last warm restart
+		self.__restart = 0, self.__start_time
 
 	def getDependencies(self, curIteration):
 		return []
@@ -1099,7 +1186,7 @@ class Clock(BaseBlock):
 		self.appendToSignal(self.getRelativeTime(curIteration), "rel_time")
 		self.appendToSignal(self.__delta, "delta_t")
 
-		if curIteration > 0:
+		if not self.isInitial(curIteration):
 			self.__delta = self.getInputSignal(curIteration - 1, "h").value
 		self.__time += self.__delta
 
@@ -1120,6 +1207,8 @@ class Clock(BaseBlock):
 		if len(thist) == 0:
 			return self.__start_time
 		if len(thist) <= curIt:
+			if curIt == self.__restart[0]:
+				return self.__restart[1]
 			return thist[-1][1] + self.__delta
 		return thist[curIt][1]
 
@@ -1136,6 +1225,10 @@ class Clock(BaseBlock):
 		self.__start_time = start_time
 
 	def setDeltaT(self, delta_t=0.1):
+		thist = self.getSignalHistory("time")
+		if len(thist) > 0:
+			# The next iteration happens delta_t after the last one
+			self.__time = thist[-1][1] + delta_t
 		self.__delta = delta_t
 
 	def getDeltaT(self):
@@ -1144,10 +1237,46 @@ class Clock(BaseBlock):
 	def reset(self):
 		"""
 		Resets the clock. Required for restarting a simulation.
+
+		See Also:
+			:func:`restart`
 		"""
 		self.clearPorts()
 		self.__time = self.__start_time
 		self.__delta = self.__start_delta
+		self.__restart = 0, self.__start_time
+
+	def restart(self, curIteration, time):
+		"""
+		Warm restart of the simulation. Contrary to :func:`reset`, the history is
+		kept. Instead, the given iteration is computed as if it were the first
+		iteration of a simulation that starts at the given time. E.g., the
+		:class:`DelayBlock` will output its initial condition again.
+
+		Args:
+			curIteration (int): The iteration that must be computed as the
+								first iteration.
+			time (float):       The time of that iteration.
+
+		See Also:
+			:func:`isInitial`
+		"""
+		self.__restart = curIteration, time
+		self.__time = time
+		self.__delta = self.__start_delta
+
+	def isInitial(self, curIteration):
+		"""
+		Checks if an iteration is computed as the first iteration. I.e., it is
+		iteration 0 or the iteration of the last warm restart.
+
+		Args:
+			curIteration (int): The iteration to check.
+
+		See Also:
+			:func:`restart`
+		"""
+		return curIteration == 0 or curIteration == self.__restart[0]
 
 	def _rewind(self):
 		self.__time -= self.__delta
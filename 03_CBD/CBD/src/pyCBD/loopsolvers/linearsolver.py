@@ -1,5 +1,7 @@
 """
 This module provides a Gauss-Jordan solver to solve linear algebraic loops.
+Additionally, a `NumPy <https://numpy.org/>`_-based solver is provided that
+caches the factorization of each loop.
 """
 
 import math
@@ -7,6 +9,18 @@ import math
 from pyCBD.util import PYTHON_VERSION
 from pyCBD.loopsolvers.solver import Solver
 
+_NUMPY_FOUND = True
+try:
+	import numpy as np
+except ImportError:
+	_NUMPY_FOUND = False
+
+_SCIPY_FOUND = True
+try:
+	from scipy.linalg import lu_factor, lu_solve
+except ImportError:
+	_SCIPY_FOUND = False
+
 
 class _StrVar:
 	def __init__(self, val):
@@ -225,6 +239,181 @@ class LinearSolver(Solver):
 		return solverInput[1]
 
 
+class NumpyLinearSolver(LinearSolver):
+	"""
+	Solves linear algebraic loops using a cached factorization of the
+	coefficient matrix.
+
+	The structure of each strong component is analyzed only once: constant
+	coefficients are stored in a template matrix and only the inputs that
+	contribute to the right-hand side, or to the factors of a
+	:class:`pyCBD.lib.std.ProductBlock`, are read in each iteration. In most
+	linear algebraic loops these factors remain the same in-between
+	iterations. The factorization is therefore only recomputed when one of
+	them changes; otherwise, only the substitution remains.
+
+	When `SciPy <https://scipy.org/>`_ is available, the LU factorization of
+	:func:`scipy.linalg.lu_factor` is cached. Otherwise, the inverse of the
+	coefficient matrix is cached.
+
+	Note:
+		When `NumPy <https://numpy.org/>`_ cannot be found, or when the loop
+		contains non-numeric values, this solver falls back to the Gauss-Jordan
+		elimination of the :class:`LinearSolver`.
+	"""
+	def __init__(self, logger=None):
+		LinearSolver.__init__(self, logger)
+		self.__cache = {}
+		self.factorizations = 0
+		"""The amount of factorizations that were computed."""
+
+	def constructInput(self, strongComponent, curIteration):
+		if not _NUMPY_FOUND:
+			return None, LinearSolver.constructInput(self, strongComponent, curIteration)
+		key = tuple(strongComponent)
+		system = self.__cache.get(key, None)
+		if system is None:
+			try:
+				system = _LinearSystem(strongComponent)
+			except ValueError:
+				# Let the Gauss-Jordan elimination report the problem
+				return None, LinearSolver.constructInput(self, strongComponent, curIteration)
+			self.__cache[key] = system
+		return system, (strongComponent, curIteration)
+
+	def solve(self, solverInput):
+		system, data = solverInput
+		if system is None:
+			return LinearSolver.solve(self, data)
+		strongComponent, curIteration = data
+		try:
+			b, factors = system.read(curIteration)
+		except TypeError:
+			return LinearSolver.solve(self, LinearSolver.constructInput(self, strongComponent, curIteration))
+		if system.factors != factors or system.factorization is None:
+			system.factorize(factors)
+			self.factorizations += 1
+		return system.solve(b).tolist()
+
+
+class _LinearSystem:
+	"""
+	The compiled equations of a single linear strong component.
+
+	Args:
+		strongComponent (list): The blocks in the algebraic loop.
+
+	Raises:
+		ValueError: When the loop contains an unknown block.
+
+	See Also:
+		:func:`LinearSolver.get_matrix`, which constructs the same system.
+	"""
+	def __init__(self, strongComponent):
+		size = len(strongComponent)
+		index = {block: i for i, block in enumerate(strongComponent)}
+		self.template = np.zeros((size, size))
+		# (row, port) -- the external inputs that are subtracted from the right-hand side
+		self.rhs = []
+		# (row, col, ports) -- the coefficients that are the product of external inputs
+		self.products = []
+		self.factors = None
+		self.factorization = None
+
+		for i, block in enumerate(strongComponent):
+			btype = block.getBlockType()
+			internal = []
+			external = []
+			for port in block.getInputPorts():
+				source = port.getPreviousPortClosure().block
+				if source in index:
+					internal.append(index[source])
+				else:
+					external.append(port)
+			if btype == "AdderBlock":
+				self.template[i, i] = -1
+				for j in internal:
+					self.template[i, j] += 1
+				self.rhs.extend((i, port) for port in external)
+			elif btype == "ProductBlock":
+				self.template[i, i] = -1
+				for j in internal:
+					if len(external) > 0:
+						self.products.append((i, j, external))
+					else:
+						self.template[i, j] += 1
+			elif btype == "NegatorBlock":
+				self.template[i, i] = -1
+				self.template[i, internal[0]] = -1
+			elif btype == "DelayBlock":
+				# Only in the first iteration, where the dependency is the IC
+				self.template[i, i] = -1
+				self.template[i, index[block.getInputPortByName("IC").getPreviousPortClosure().block]] = 1
+			else:
+				raise ValueError("Unknown element '{}', please implement".format(btype))
+
+	def read(self, curIteration):
+		"""
+		Reads the external inputs of the current iteration.
+
+		Args:
+			curIteration (int): The current iteration of the simulation.
+
+		Returns:
+			A tuple of the right-hand side vector and the product factors.
+
+		Raises:
+			TypeError: When an input is not numeric.
+		"""
+		b = np.zeros(self.template.shape[0])
+		for i, port in self.rhs:
+			b[i] -= port.getHistory()[curIteration].value
+		factors = []
+		for _, _, ports in self.products:
+			fact = 1.0
+			for port in ports:
+				fact *= port.getHistory()[curIteration].value
+			factors.append(float(fact))
+		return b, factors
+
+	def factorize(self, factors):
+		"""
+		Builds the coefficient matrix for the given product factors and
+		factorizes it.
+
+		Args:
+			factors (list): The product factors, as obtained by :func:`read`.
+
+		Raises:
+			ValueError: When the matrix is singular.
+		"""
+		A = self.template.copy()
+		for (i, j, _), fact in zip(self.products, factors):
+			A[i, j] += fact
+		try:
+			if _SCIPY_FOUND:
+				self.factorization = lu_factor(A, check_finite=False)
+				if np.any(np.diag(self.factorization[0]) == 0.0):
+					raise np.linalg.LinAlgError()
+			else:
+				self.factorization = np.linalg.inv(A)
+		except np.linalg.LinAlgError:
+			self.factorization = None
+			raise ValueError("Singular Matrix")
+		self.factors = factors
+
+	def solve(self, b):
+		"""
+		Solves the system for a right-hand side, using the cached factorization.
+
+		Args:
+			b (numpy.ndarray):  The right-hand side.
+		"""
+		if _SCIPY_FOUND:
+			return lu_solve(self.factorization, b, check_finite=False)
+		return self.factorization @ b
+
+
 class Matrix:
 	"""Custom, efficient matrix class. This class is used for efficiency purposes.
 
@@ -2,14 +2,19 @@
 This module provides a Sympy solver to solve the algebraic loops efficiently.
 It should be able to handle non-linear equations as well.
 
+Each algebraic loop is solved symbolically only once. The obtained solution is
+compiled into a plain Python function, such that later iterations only need to
+evaluate floating point expressions. Loops that have no closed-form solution
+are solved numerically using Newton's method.
+
 Warning:
 	This module requires :code:`sympy` to be installed.
 """
 
 import sympy
 
-from pyCBD.Core import CBD
 from pyCBD.loopsolvers.solver import Solver
+from pyCBD.loopsolvers.linearsolver import LinearSolver, Matrix
 
 
 def reduce(fnc, lst):
@@ -22,20 +27,50 @@ def reduce(fnc, lst):
 
 
 class SympySolver(Solver):
-	def __init__(self, logger=None):
+	"""
+	Solves (non-)linear algebraic loops using `SymPy <https://www.sympy.org/>`_.
+
+	Args:
+		logger (Logger):    The logger to use.
+		method (str):       The way the loops must be solved. Must be one of:
+
+							- :code:`"symbolic"`: Solve the loop symbolically and
+							  compile the solution into a function. When there is
+							  no closed-form solution, Newton's method is used.
+							- :code:`"newton"`: Always use Newton's method.
+
+							Defaults to :code:`"symbolic"`.
+		tolerance (float):  The maximal residual that is accepted by Newton's
+							method. Defaults to :code:`1e-10`.
+		max_iter (int):     The maximal amount of Newton iterations for a single
+							simulation step. Defaults to :code:`50`.
+		guess (float):      The initial guess for each unknown in Newton's method,
+							at the first step the loop is solved. Afterwards, the
+							previous solution is used. Defaults to :code:`1.0`.
+	"""
+	def __init__(self, logger=None, method="symbolic", tolerance=1e-10, max_iter=50, guess=1.0):
 		Solver.__init__(self, logger)
+		assert method in ["symbolic", "newton"], "Unknown solving method '%s'." % method
 		self.__cache = {}
+		self.__previous = {}
+		self.__method = method
+		self.__tolerance = tolerance
+		self.__max_iter = max_iter
+		self.__guess = guess
+		self.__linear = LinearSolver(logger)
 
 	def checkValidity(self, path, component):
-		if tuple(component) not in self.__cache:
+		key = tuple(component)
+		if key not in self.__cache:
 			eqs = []
+			params = {}
 			for i, block in enumerate(component):
 				args = []
-				for x, port in self.__dependencies(block):
-					if x not in component:
-						args.append(sympy.symbols(x.getPath('_') + '_' + port))
-					else:
-						args.append(sympy.symbols(x.getPath('_') + '_' + port))
+				for port in self.__dependencies(block):
+					name = port.block.getPath('_') + '_' + port.name
+					args.append(sympy.symbols(name))
+					if port.block not in component:
+						params[name] = port
 
 				eqs.append((block.getPath('_') + '_OUT1', self.__OPERATIONS[block.getBlockType()](args, block)))
 
@@ -45,30 +80,106 @@ class SympySolver(Solver):
 				x = sympy.symbols(k)
 				sol.append(x)
 				rqs.append(v - x)
-			solution = sympy.nonlinsolve(rqs, sol)
 
-			self.__cache[tuple(component)] = solution, sol
+			names = sorted(params.keys())
+			inputs = [sympy.symbols(n) for n in names]
+			sources = [params[n] for n in names]
+
+			solution = None
+			if self.__method == "symbolic":
+				solution = sympy.nonlinsolve(rqs, sol)
+				if len(solution.args) > 1:
+					raise RuntimeError("There are multiple solutions for this system. Please add constraints, "
+					                   "or use Newton's method instead.")
+				if len(solution.args) == 0:
+					raise RuntimeError("There is no solution for this system.")
+				if not self.__isClosedForm(solution.args[0], inputs):
+					solution = None
+
+			if solution is not None:
+				function = sympy.lambdify(inputs, list(solution.args[0]), modules="math")
+				self.__cache[key] = solution, sol, sources, function, None
+			else:
+				residual = sympy.lambdify(sol + inputs, rqs, modules="math")
+				jacobian = sympy.lambdify(sol + inputs, sympy.Matrix(rqs).jacobian(sol).tolist(), modules="math")
+				self.__cache[key] = None, sol, sources, residual, jacobian
 
-			if len(solution.args) > 1:
-				raise RuntimeError("There are multiple solutions for this system. Please add constraints.")
+		return True
 
+	@staticmethod
+	def __isClosedForm(solution, inputs):
+		"""
+		Checks if a symbolic solution only depends on the known inputs.
+
+		Args:
+			solution (tuple):   The solution for each unknown.
+			inputs (list):      The symbols of the known inputs.
+		"""
+		for expr in solution:
+			if not isinstance(expr, sympy.Expr) or not expr.free_symbols.issubset(inputs):
+				return False
 		return True
 
 	def getComponentCache(self, component):
+		"""
+		Obtains the cached information of an algebraic loop. This is a tuple of:
+
+			- The symbolic solution, or :code:`None` if Newton's method is used.
+			- The symbols of the unknowns.
+			- The ports that provide the known inputs.
+			- The compiled solution, or the compiled residual function.
+			- :code:`None`, or the compiled Jacobian function.
+
+		Args:
+			component (list):   The blocks in the algebraic loop.
+		"""
 		return self.__cache[tuple(component)]
 
 	def constructInput(self, component, curIt):
-		vrs = {}
-		for block in component:
-			for x, port in self.__dependencies(block):
-				if x not in component:
-					vrs[x.getPath('_') + '_' + port] = x.getSignalHistory()[curIt].value
-		res = self.__cache[tuple(component)]
-		return res, vrs
+		key = tuple(component)
+		cache = self.__cache[key]
+		vrs = [port.getHistory()[curIt].value for port in cache[2]]
+		return key, cache, vrs
 
 	def solve(self, solverInput):
-		(solution, symbols), variables = solverInput
-		return solution.args[0].subs(variables)
+		key, (solution, symbols, _, function, jacobian), variables = solverInput
+		if jacobian is None:
+			return function(*variables)
+		result = self.__newton(function, jacobian, self.__previous.get(key, [self.__guess] * len(symbols)), variables)
+		self.__previous[key] = result
+		return result
+
+	def __newton(self, residual, jacobian, x, variables):
+		"""
+		Solves a system of equations using Newton's method.
+
+		Args:
+			residual (callable):    The compiled residual of the system.
+			jacobian (callable):    The compiled Jacobian of the residual.
+			x (list):               The initial guess.
+			variables (list):       The values of the known inputs.
+
+		Raises:
+			RuntimeError: When the method does not converge.
+		"""
+		n = len(x)
+		x = list(x)
+		for _ in range(self.__max_iter):
+			F = residual(*x, *variables)
+			if max(abs(f) for f in F) <= self.__tolerance:
+				return x
+			J = jacobian(*x, *variables)
+			M = Matrix(n, n)
+			for r in range(n):
+				for c in range(n):
+					M[r, c] = float(J[r][c])
+			dx = self.__linear.solve((M, [float(f) for f in F]))
+			for i in range(n):
+				x[i] -= dx[i]
+		F = residual(*x, *variables)
+		if max(abs(f) for f in F) <= self.__tolerance:
+			return x
+		raise RuntimeError("Newton's method did not converge within %d iterations." % self.__max_iter)
 
 
 	# TODO: Clamp, MUX, Split, LTE, Eq, LT, not, and, or, delay
@@ -83,17 +194,10 @@ class SympySolver(Solver):
 		"AbsBlock": lambda l, _: abs(l[0]),
 		"IntBlock": lambda l, _: sympy.floor(l[0]),
 		"GenericBlock": lambda l, b: getattr(sympy, b.getBlockOperator())(l[0]),
-		"MaxBlock": lambda l: sympy.Max(*l),
-		"MinBlock": lambda l: sympy.Min(*l),
+		"MaxBlock": lambda l, _: sympy.Max(*l),
+		"MinBlock": lambda l, _: sympy.Min(*l),
 	}
 
 	@staticmethod
 	def __dependencies(block):
-		blocks = []
-		for s in block.getInputPortNames():
-			b, op = block.getPortConnectedToInput(s)
-			while isinstance(b, CBD):
-				b, op = b.getBlockByName(op).getPortConnectedToInput("IN1")
-			blocks.append((b, op))
-		return blocks
-
+		return [port.getPreviousPortClosure() for port in block.getInputPorts()]
@@ -0,0 +1,403 @@
+"""
+This module provides a native solver for the initial-value problem that is
+formed by the :class:`pyCBD.lib.std.IntegratorBlock` instances of a model.
+
+Contrary to the :class:`pyCBD.preprocessing.rungekutta.RKPreprocessor`, the
+model is not rewritten. Instead, the states of all integrators are collected
+in a single NumPy vector and the blocks that compute their derivatives are
+compiled (once per execution plan) into a function :math:`f(t, y)`. Each
+simulation step is then an (adaptive) Runge-Kutta step on that vector. All
+other blocks are computed as usual, once per accepted step.
+
+Warning:
+	This module requires :code:`numpy` to be installed.
+
+Example:
+	The simulator's delta is used as the initial and the maximal step size::
+
+		sim = Simulator(model)
+		sim.setDeltaT(0.1)
+		sim.setODESolver(RungeKuttaSolver(ButcherTableau.DOPRI(), atol=1e-8))
+		sim.run(10.0)
+"""
+
+import math
+from functools import reduce
+
+import numpy as np
+
+from pyCBD.Core import CBD
+from pyCBD.lib.std import IntegratorBlock, DelayBlock, TimeBlock, Clock
+from pyCBD.preprocessing.butcher import ButcherTableau
+from pyCBD.scheduling import ExecutionPlan
+
+
+def _truth(value):
+	return 1 if value else 0
+
+
+def _integrators(block):
+	"""
+	Collects all integrators in a (hierarchical) block.
+	"""
+	res = []
+	for child in block.getBlocks():
+		if isinstance(child, IntegratorBlock):
+			res.append(child)
+		elif isinstance(child, CBD):
+			res.extend(_integrators(child))
+	return res
+
+
+# Block type -> lambda of the input values (in the order of the input ports) and the block
+OPERATIONS = {
+	"ConstantBlock": lambda l, b: b.getValue(),
+	"NegatorBlock": lambda l, _: -l[0],
+	"InverterBlock": lambda l, _: 1.0 / l[0],
+	"GainBlock": lambda l, b: l[0] * b._value,
+	"AdderBlock": lambda l, _: sum(l),
+	"ProductBlock": lambda l, _: reduce((lambda a, b: a * b), l, 1),
+	"ModuloBlock": lambda l, _: math.fmod(l[0], l[1]),
+	"RootBlock": lambda l, _: l[0] ** (1 / l[1]),
+	"PowerBlock": lambda l, _: l[0] ** l[1],
+	"AbsBlock": lambda l, _: abs(l[0]),
+	"IntBlock": lambda l, _: int(l[0]),
+	"ClampBlock": lambda l, b: min(max(l[0], b.min), b.max) if b._use_const else min(max(l[0], l[1]), l[2]),
+	"GenericBlock": lambda l, b: getattr(math, b.getBlockOperator())(l[0]),
+	"MinBlock": lambda l, _: min(l),
+	"MaxBlock": lambda l, _: max(l),
+	"SplitBlock": lambda l, _: l[0],
+	"LessThanBlock": lambda l, _: _truth(l[0] < l[1]),
+	"EqualsBlock": lambda l, _: _truth(l[0] == l[1]),
+	"LessThanOrEqualsBlock": lambda l, _: _truth(l[0] <= l[1]),
+	"NotBlock": lambda l, _: 0 if l[0] else 1,
+	"OrBlock": lambda l, _: reduce((lambda a, b: a or b), l, 0),
+	"AndBlock": lambda l, _: reduce((lambda a, b: a and b), l, 1),
+}
+
+
+class _ODEPlan(ExecutionPlan):
+	"""
+	Execution plan in which the integrators are replaced by steps that output
+	the states of the :class:`ODESystem`.
+	"""
+	def __init__(self, plan, steps):
+		ExecutionPlan.__init__(self, [], plan.depGraph, None)
+		self.schedule = plan.schedule
+		self.rates = plan.rates
+		self.multirate = plan.multirate
+		self.steps = steps
+
+	def getCone(self, port):
+		raise NotImplementedError("State events are not supported by the ODE solver.")
+
+
+class ODESystem:
+	r"""
+	The initial-value problem
+
+	.. math::
+		\dfrac{dy}{dt} = f(t, y)
+
+	that is formed by the integrators in an execution plan.
+
+	Args:
+		model (CBD):                                The simulated model.
+		plan (pyCBD.scheduling.ExecutionPlan):      The plan of a non-initial iteration.
+
+	Attributes:
+		integrators (list): The :class:`pyCBD.lib.std.IntegratorBlock` instances,
+							in the order of the state vector.
+		plan:               The plan that outputs the states and computes all
+							other blocks.
+		source:             The plan from which this system was created.
+		state:              The state vector that will be outputted by :attr:`plan`.
+
+	Raises:
+		NotImplementedError:    When the derivatives depend on a block that cannot
+								be compiled, or on an algebraic loop.
+		RuntimeError:           When the derivatives depend on a
+								:class:`pyCBD.lib.std.DelayBlock` (i.e., for
+								delay differential equations).
+	"""
+	def __init__(self, model, plan):
+		self.source = plan
+		self.integrators = _integrators(model)
+		self.__clock = model.getClock()
+
+		# sumState -> state index; the closure of all integrator outputs ends there
+		internal = {}
+		states = {}
+		for i, integrator in enumerate(self.integrators):
+			for block in integrator.getBlocks():
+				internal[block] = integrator
+			states[integrator.getBlockByName("sumState")] = i
+		self.state = np.zeros(len(self.integrators))
+
+		# The slots 0 and 1 hold the time and the relative time
+		self.__slots = {}
+		slot = 2
+		for block, i in states.items():
+			self.__slots[block] = slot + i
+		slot += len(states)
+
+		cone = self.__cone([i.getInputPortByName("IN1").getPreviousPortClosure() for i in self.integrators],
+		                   states, internal)
+
+		self.__static = []
+		self.__dynamic = []
+		static = set()
+		steps = []
+		for step in plan.steps:
+			compute, rate, block = step
+			if compute is None:
+				if any(b in cone for b in block):
+					raise NotImplementedError("Algebraic loops in the derivatives are not supported by the ODE solver.")
+				steps.append(step)
+				continue
+			if block in states:
+				steps.append((self.__setter(block, states[block]), rate, block))
+			elif block not in internal:
+				steps.append(step)
+			if block not in cone or block in states or isinstance(block, (Clock, TimeBlock)):
+				continue
+			self.__slots[block] = slot
+			slot += 1
+			args = [self.__slot(port.getPreviousPortClosure()) for port in block.getInputPorts()]
+			instr = OPERATIONS[block.getBlockType()], block, args, self.__slots[block]
+			if all(a in static for a in args):
+				static.add(self.__slots[block])
+				self.__static.append(instr)
+			else:
+				self.__dynamic.append(instr)
+		self.plan = _ODEPlan(plan, steps)
+		self.__derivatives = [self.__slot(i.getInputPortByName("IN1").getPreviousPortClosure())
+		                      for i in self.integrators]
+		self.__values = [0.0] * slot
+
+	def __cone(self, ports, states, internal):
+		"""
+		Collects the blocks that compute the derivatives.
+
+		Args:
+			ports (list):       The output ports that are connected to the integrators.
+			states (dict):      The blocks that output the states.
+			internal (dict):    The blocks inside of the integrators.
+		"""
+		cone = set()
+		stack = [port.block for port in ports]
+		while len(stack) > 0:
+			block = stack.pop()
+			if block in cone or block in states or isinstance(block, (Clock, TimeBlock)):
+				continue
+			if isinstance(block, DelayBlock) or block in internal:
+				raise RuntimeError("Cannot compute the derivatives of a delay differential equation. "
+				                   "Block '%s' is a delay." % block.getPath())
+			if block.getBlockType() not in OPERATIONS:
+				raise NotImplementedError("Block '%s' of type %s cannot be compiled by the ODE solver."
+				                          % (block.getPath(), block.getBlockType()))
+			cone.add(block)
+			stack.extend(port.getPreviousPortClosure().block for port in block.getInputPorts())
+		return cone
+
+	def __slot(self, port):
+		"""
+		Obtains the slot of an output port in the compiled function.
+		"""
+		block = port.block
+		if isinstance(block, Clock):
+			if port.name == "delta_t":
+				raise NotImplementedError("The derivatives cannot depend on the delta of the clock.")
+			return 0 if port.name == "time" else 1
+		if isinstance(block, TimeBlock):
+			return 0 if port.name == "OUT1" else 1
+		return self.__slots[block]
+
+	def __setter(self, block, index):
+		"""
+		Creates the step that outputs a state, instead of integrating it.
+		"""
+		def compute(curIteration):
+			block.appendToSignal(float(self.state[index]))
+		return compute
+
+	def getState(self):
+		"""
+		Obtains the last outputted state vector.
+		"""
+		return np.array([i.getSignalHistory()[-1].value for i in self.integrators], dtype=float)
+
+	def refresh(self):
+		"""
+		Computes the derivative blocks that do not depend on the time or the
+		states. Must be called when a parameter may have changed.
+		"""
+		v = self.__values
+		for op, block, args, out in self.__static:
+			v[out] = op([v[a] for a in args], block)
+
+	def derivatives(self, t, y):
+		"""
+		Computes :math:`f(t, y)`.
+
+		Args:
+			t (float):          The time.
+			y (numpy.ndarray):  The state vector.
+
+		Returns:
+			The derivatives of the state vector.
+		"""
+		v = self.__values
+		v[0] = t
+		v[1] = t - self.__clock.getStartTime()
+		v[2:2 + len(y)] = y.tolist()
+		for op, block, args, out in self.__dynamic:
+			v[out] = op([v[a] for a in args], block)
+		return np.array([v[d] for d in self.__derivatives], dtype=float)
+
+
+class RungeKuttaSolver:
+	r"""
+	Solves the integrators of a model with an explicit Runge-Kutta method.
+	When the tableau is an extended tableau, the step size is adapted to the
+	error in the same way as the :class:`pyCBD.preprocessing.rungekutta.RKPreprocessor`:
+
+	.. math::
+		h_{new} = h_{old}\cdot clamp\left(S\cdot\left(\dfrac{\epsilon\cdot h_{old}}
+		{\vert z_{n+1} - y_{n+1}\vert}\right)^{\dfrac{1}{q}}, 0.1, 4.0\right)
+
+	Contrary to the preprocessor, steps for which the error exceeds
+	:math:`\epsilon\cdot h_{old}` are rejected and retried with the smaller
+	step size. The higher-order solution is propagated.
+
+	Args:
+		tableau (pyCBD.preprocessing.butcher.ButcherTableau): The tableau to use. Defaults to
+							:func:`pyCBD.preprocessing.butcher.ButcherTableau.DOPRI`.
+		atol (float):       The absolute tolerance, given that the tableau is an extended
+							tableau. Defaults to 1e-8.
+		hmin (float):       Minimal value for the delta. Defaults to 1e-40.
+		hmax (float):       Maximal value for the delta. When :code:`None`, the delta
+							of the simulator is used. Defaults to :code:`None`.
+		safety (float):     Safety factor for the error computation. Must be in (0, 1].
+							Defaults to 0.9.
+
+	Attributes:
+		accepted (int):     The amount of accepted steps.
+		rejected (int):     The amount of rejected steps.
+
+	Note:
+		The delta of the simulator is used as the initial step size. When the
+		tableau is not extended, it is the fixed step size.
+
+	See Also:
+		:func:`pyCBD.simulator.Simulator.setODESolver`
+	"""
+	def __init__(self, tableau=None, atol=1e-8, hmin=1e-40, hmax=None, safety=0.9):
+		assert atol > 0, "Tolerance must be a positive value"
+		if tableau is None:
+			tableau = ButcherTableau.DOPRI()
+		nodes = tableau.getNodes()
+		weights = tableau.getWeights()
+		s = len(nodes)
+		self.__nodes = np.array(nodes, dtype=float)
+		self.__A = np.array([[tableau.getA(i, j + 1) if j < i else 0.0 for j in range(s)] for i in range(s)])
+		self.__b = np.array(weights[0], dtype=float)
+		self.__e = np.array(weights[0], dtype=float) - np.array(weights[1], dtype=float) if len(weights) > 1 else None
+		self.__order = tableau.getOrder()
+		self._tolerance = atol
+		self._h_range = hmin, hmax
+		self._safety = safety
+
+		self.__system = None
+		self.__h = None
+		# The maximal delta of the current run
+		self.__hmax = float('inf') if hmax is None else hmax
+		self.__time = 0.0
+		self.__end = float('inf')
+		self.accepted = 0
+		self.rejected = 0
+
+	def advance(self, model, plan, curIteration, end=float('inf')):
+		"""
+		Integrates the states up to the given iteration. Must be called by
+		the simulator before an iteration is computed.
+
+		Args:
+			model (CBD):        The simulated model.
+			plan:               The plan of the iteration.
+			curIteration (int): The iteration to compute.
+			end (float):        The termination time, which is never stepped over.
+								Defaults to infinity.
+
+		Returns:
+			The plan to execute for the iteration.
+		"""
+		clock = model.getClock()
+		self.__end = end
+		if clock.isInitial(curIteration):
+			self.__time = clock.getTime(curIteration)
+			self.__h = clock.getDeltaT()
+			self.__hmax = self._h_range[1] if self._h_range[1] is not None else self.__h
+			self.__h = min(self.__h, self.__hmax)
+			return plan
+
+		if self.__system is None or self.__system.source is not plan:
+			self.__system = ODESystem(model, plan)
+		system = self.__system
+		system.refresh()
+		t = clock.getTime(curIteration - 1)
+		self.__time, system.state = self.step(system.derivatives, t, system.getState())
+		clock.setDeltaT(self.__time - t)
+		return system.plan
+
+	def getStatePorts(self, model):
+		"""
+		Obtains the ports that output the states. Their history must be kept
+		when the iterations are computed by generated code (see
+		:class:`pyCBD.converters.CBD2Python.CBD2Python`).
+
+		Args:
+			model (CBD):    The simulated model.
+		"""
+		return [i.getBlockByName("sumState").getOutputPortByName("OUT1") for i in _integrators(model)]
+
+	def getDeltaT(self):
+		"""
+		Obtains the proposed size of the next step.
+		"""
+		if self.__end - self.__time > 0:
+			return min(self.__h, self.__end - self.__time)
+		return self.__h
+
+	def step(self, f, t, y):
+		"""
+		Executes a single (adaptive) step.
+
+		Args:
+			f (callable):       The function that computes the derivatives.
+			t (float):          The current time.
+			y (numpy.ndarray):  The current state vector.
+
+		Returns:
+			A tuple of the new time and the new state vector.
+		"""
+		A, b, e, c = self.__A, self.__b, self.__e, self.__nodes
+		h = self.getDeltaT()
+		K = np.empty((len(c), len(y)))
+		while True:
+			for i in range(len(c)):
+				K[i] = f(t + c[i] * h, y + h * (A[i, :i] @ K[:i]))
+			res = y + h * (b @ K)
+			if e is None:
+				self.accepted += 1
+				return t + h, res
+
+			error = max(np.max(np.abs(h * (e @ K)), initial=0.0), 1e-20)
+			factor = min(max(self._safety * (self._tolerance * h / error) ** (1 / self.__order), 0.1), 4.0)
+			h_new = float(min(max(h * factor, self._h_range[0]), self.__hmax))
+			if error <= self._tolerance * h or h <= self._h_range[0]:
+				self.accepted += 1
+				self.__h = h_new
+				return t + h, res
+			self.rejected += 1
+			h = h_new
@@ -286,7 +286,7 @@ class ButcherTableau:
 		"""
 		tab = ButcherTableau()
 		tab.addRow(1/2, [1/2])
-		tab.addRow(1/2, [1/2, 1/2])
+		tab.addRow(1/2, [  0, 1/2])
 		tab.addRow(  1, [  0,   0, 1])
 		tab.addWeights(1/6, 1/3, 1/3, 1/6)
 		return tab
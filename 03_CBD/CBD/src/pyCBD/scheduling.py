@@ -3,6 +3,8 @@ This file contains all classes to help schedule the CBD simulator
 at every iteration/time.
 """
 from math import *
+from pyCBD.Core import Port
+from pyCBD.lib.std import Clock
 
 class Scheduler:
 	"""
@@ -21,6 +23,9 @@ class Scheduler:
 								which the schedule must be recomputed. When :code:`True`,
 								the schedule will be recomputed every time. Defaults to
 								:code:`(0, 1)` (i.e. only at simulation start and iteration 1).
+								Note that the :class:`pyCBD.simulator.Simulator` caches the
+								schedules per model structure, so only :code:`True` has an
+								effect there.
 		rates (dict):           A dictionary of :code:`block path -> rate`; indentifying how often
 								they should fire. The rate is a float, which will be compared
 								against the time. :code:`None` identifies the empty dictionary.
@@ -30,24 +35,27 @@ class Scheduler:
 		self.rates = {} if rates is None else rates
 		self.__last_schedule = None
 
-	# def getNextActionDelta(self, time, dt):
-	# 	"""
-	# 	Helps in identifying if a new action is scheduled in the near future.
-	#
-	# 	Args:
-	# 		time (float):   The current simulation time.
-	# 		dt (float):     The next delta t as defined/computed by the simulator.
-	#
-	# 	Returns:
-	# 		The next time when something must happen.
-	# 	"""
-	# 	next = time + dt
-	# 	for rate in self.rates.values():
-	# 		d = ceil(time / rate) * rate
-	# 		if abs(d - time) < 1e-6:
-	# 			continue
-	# 		next = min(next, d)
-	# 	return next - time
+	def getNextActionDelta(self, time, dt, rates=None):
+		"""
+		Helps in identifying if a new action is scheduled in the near future.
+
+		Args:
+			time (float):   The current simulation time.
+			dt (float):     The next delta t as defined/computed by the simulator.
+			rates (iter):   The rates to take into account. When :code:`None`, all
+							rates of the scheduler are used. Defaults to :code:`None`.
+
+		Returns:
+			The time until the next step, which is at most :code:`dt`. A rate that
+			fires at the current time is only taken into account for its next firing.
+		"""
+		delta = dt
+		for rate in (self.rates.values() if rates is None else rates):
+			if rate is None:
+				continue
+			d = (floor((time + 1e-6) / rate) + 1) * rate - time
+			delta = min(delta, d)
+		return delta
 
 	def mustCompute(self, block, time):
 		"""
@@ -57,13 +65,57 @@ class Scheduler:
 			block (CBD.Core.BaseBlock): The block that must be checked.
 			time (float):               The time at which the computation must occur.
 		"""
-		name = block.getPath()
-		if name not in self.rates:
+		return self.fires(self.getRate(block), time)
+
+	def getRate(self, block):
+		"""
+		Obtains the rate of a block.
+
+		Args:
+			block (CBD.Core.BaseBlock): The block to obtain the rate of.
+
+		Returns:
+			The rate of the block, or :code:`None` if the block must be computed
+			every iteration.
+		"""
+		return self.rates.get(block.getPath(), None)
+
+	@staticmethod
+	def fires(rate, time):
+		"""
+		Checks if blocks with a specific rate must be computed at a specific time.
+
+		Args:
+			rate (float):   The rate to check. :code:`None` identifies a block that
+							must always be computed.
+			time (float):   The time at which the computation must occur.
+		"""
+		if rate is None:
 			return True
-		rate = self.rates[name]
 		d = ceil(time / rate) * rate
 		return abs(d - time) < 1e-6
 
+	def getFiringTable(self, rates, delta):
+		"""
+		Obtains the rates that fire at each step of a simulation with a fixed
+		step size, such that :func:`fires` does not need to be checked at every
+		step.
+
+		Args:
+			rates (iter):   The rates to fire.
+			delta (float):  The step size.
+
+		Returns:
+			A :class:`FiringTable`, or :code:`None` when the rates do not repeat in
+			a (short) hyperperiod, or when :func:`fires` was overridden.
+		"""
+		if type(self).fires is not Scheduler.fires:
+			return None
+		try:
+			return FiringTable(rates, delta)
+		except ValueError:
+			return None
+
 	def setRate(self, block_name, rate):
 		"""
 		Sets a specific rate for a block. If no rate has been set, it will be assumed the
@@ -112,81 +164,452 @@ class Scheduler:
 class TopologicalScheduler(Scheduler):
 	"""
 	Does a topological sort of the dependency graph, using Tarjan's algorithm.
+	The strongly connected components are found iteratively, on the integer node
+	ids of the graph (see :func:`pyCBD.depGraph.DepGraph.getIndexed`). Hence,
+	the depth of the graph (e.g., a long chain of blocks) is not limited by
+	the recursion limit.
 
 	Note:
 		This code was previously located in the :class:`pyCBD.depGraph.DepGraph` and
 		hence, it was written by Marc Provost.
+
+	Warning:
+		The recursive :code:`dfsSort` and :code:`dfsCollect` methods no longer exist.
+		Subclasses that change the order of the components must override :func:`schedule`.
 	"""
 	def schedule(self, depGraph, curIt, time):
-		mapping = depGraph.getSemanticMapping()
-		components = []
-		sortedList = self.topoSort(mapping, depGraph)
+		nodes, influencers = depGraph.getIndexed()
+		return [[nodes[i] for i in component] for component in self.tarjan(influencers)]
 
-		for object in mapping.keys():
-			depGraph.unMark(object)
+	def topoSort(self, mapping, depGraph):
+		"""
+		Performs a topological sort on the graph.
 
-		sortedList.reverse()
+		Args:
+			mapping (dict):                     Ignored, the whole dependency graph is sorted.
+												Only kept for backwards compatibility.
+			depGraph (CBD.depGraph.DepGraph):   The dependency graph
 
-		for object in sortedList:
-			if not depGraph.isMarked(object):
-				component = []
-				self.dfsCollect(depGraph, object, component, curIt)
-				components.append(component)
+		Returns:
+			The objects in the graph, such that each object comes after its influencers,
+			unless they are part of the same strongly connected component.
+		"""
+		nodes, influencers = depGraph.getIndexed()
+		return [nodes[i] for component in self.tarjan(influencers) for i in component]
+
+	@staticmethod
+	def tarjan(influencers):
+		"""
+		Finds the strongly connected components of a graph with Tarjan's algorithm.
+		The depth-first search is done with an explicit stack.
+
+		Args:
+			influencers (list): For each node id, the list of node ids that influence
+								the node.
 
-		components.reverse()
+		Returns:
+			The list of strongly connected components, each of which is a list
+			of node ids. A component always comes after the components that
+			influence it.
+		"""
+		N = len(influencers)
+		index = [-1] * N
+		low = [0] * N
+		onStack = [False] * N
+		stack = []
+		components = []
+		counter = 0
+		for root in range(N):
+			if index[root] >= 0:
+				continue
+			index[root] = low[root] = counter
+			counter += 1
+			stack.append(root)
+			onStack[root] = True
+			# Call stack of the search: (node, position in its influencers)
+			calls = [(root, 0)]
+			while len(calls) > 0:
+				node, pos = calls[-1]
+				edges = influencers[node]
+				if pos < len(edges):
+					calls[-1] = node, pos + 1
+					other = edges[pos]
+					if index[other] < 0:
+						index[other] = low[other] = counter
+						counter += 1
+						stack.append(other)
+						onStack[other] = True
+						calls.append((other, 0))
+					elif onStack[other] and index[other] < low[node]:
+						low[node] = index[other]
+					continue
+
+				calls.pop()
+				if len(calls) > 0 and low[node] < low[calls[-1][0]]:
+					low[calls[-1][0]] = low[node]
+				if low[node] == index[node]:
+					component = []
+					while True:
+						other = stack.pop()
+						onStack[other] = False
+						component.append(other)
+						if other == node:
+							break
+					components.append(component)
 		return components
 
-	def topoSort(self, mapping, depGraph):
+
+class FiringTable:
+	"""
+	The rates that fire at each step of a fixed step simulation. When all rates
+	are multiples of the step size, the rates that fire repeat after a hyperperiod,
+	which is the least common multiple of the rates, expressed in steps. The
+	table contains the firing rates of each step of the hyperperiod.
+
+	Args:
+		rates (iter):   The rates in the table. The rate :code:`None` always fires.
+		delta (float):  The step size.
+
+	Raises:
+		ValueError: When a rate is not a multiple of the step size, or when the
+					hyperperiod is longer than :attr:`LIMIT` steps.
+	"""
+	LIMIT = 1 << 16
+	"""The maximal amount of steps in the hyperperiod."""
+
+	def __init__(self, rates, delta):
+		self.delta = delta
+		multiples = {}
+		for rate in rates:
+			if rate is None:
+				continue
+			m = round(rate / delta)
+			if m < 1 or abs(m * delta - rate) >= 1e-6:
+				raise ValueError("Rate %s is not a multiple of %s" % (rate, delta))
+			multiples[rate] = m
+		period = 1
+		for m in multiples.values():
+			period = period * m // gcd(period, m)
+			if period > self.LIMIT:
+				raise ValueError("The hyperperiod of the rates is too long")
+
+		# Share the sets between the steps with the same firing rates
+		patterns = {}
+		self.table = []
+		for n in range(period):
+			active = frozenset([None] + [rate for rate, m in multiples.items() if n % m == 0])
+			self.table.append(patterns.setdefault(active, active))
+
+	def get(self, time):
 		"""
-		Performs a topological sort on the graph.
+		Obtains the rates that fire at a specific time.
 
 		Args:
-			mapping (dict):                     Semantic mapping of the dependency graph
-			depGraph (CBD.depGraph.DepGraph):   The dependency graph
+			time (float):   The time to check.
+
+		Returns:
+			A :class:`frozenset` of rates, or :code:`None` when the time is not a
+			multiple of the step size.
 		"""
-		for object in mapping.keys():
-			depGraph.unMark(object)
+		n = round(time / self.delta)
+		if abs(n * self.delta - time) >= 1e-6:
+			return None
+		return self.table[n % len(self.table)]
 
-		sortedList = []
 
-		for object in mapping.keys():
-			if not depGraph.isMarked(object):
-				self.dfsSort(depGraph, object, sortedList)
+class ExecutionPlan:
+	"""
+	Flat, precompiled version of a schedule. All decisions that do not change
+	in-between two schedule computations (i.e., whether a component is an
+	algebraic loop, whether a block is a port and the rate of each block) are
+	taken once, such that the simulator only needs to execute a tight loop
+	at every iteration.
 
-		return sortedList
+	Args:
+		schedule (list):                    The strong components, as obtained from
+											:func:`Scheduler.obtain`.
+		depGraph (CBD.depGraph.DepGraph):   The dependency graph of the model.
+		scheduler (Scheduler):              The scheduler that provides the rates.
+
+	Attributes:
+		steps (list):   A list of :code:`(compute, rate, block)` tuples for normal
+						blocks, where :code:`compute` is the bound compute method
+						of the block. Algebraic loops are identified by a
+						:code:`(None, rates, component)` tuple, where :code:`rates`
+						is the list of the rates of all blocks in the component.
+		rates (set):    All rates that are used by the blocks in the plan.
+		multirate (bool):   Whether some blocks in the plan have a rate.
+
+	See Also:
+		:class:`ExecutionCone`
 
-	def dfsSort(self, depGraph, object, sortedList):
+	Note:
+		The plan only uses the rates of the :attr:`scheduler`. Custom schedulers
+		that override :func:`Scheduler.mustCompute` must override
+		:func:`Scheduler.getRate` and :func:`Scheduler.fires` instead.
+	"""
+	ALWAYS = frozenset([None])
+	"""The firing rates of a plan without rates."""
+
+	def __init__(self, schedule, depGraph, scheduler):
+		self.schedule = schedule
+		self.depGraph = depGraph
+		self.steps = []
+		self.rates = set()
+		self.__cones = {}
+		# firing rates -> steps to compute
+		self.__selected = {}
+		# (step size, firing table) of the last step size
+		self.__table = None, None
+		self.__levels = None
+		# amount of partitions -> (prelude, partitions)
+		self.__partitions = {}
+
+		for component in schedule:
+			if self.hasCycle(component, depGraph):
+				rates = [scheduler.getRate(block) for block in component]
+				self.rates.update(rates)
+				self.steps.append((None, rates, component))
+			else:
+				block = component[0]  # the strongly connected component has a single element
+				if isinstance(block, Port):
+					continue
+				rate = scheduler.getRate(block)
+				self.rates.add(rate)
+				self.steps.append((block.compute, rate, block))
+		self.multirate = any(rate is not None for rate in self.rates)
+
+	def getActive(self, time, delta, scheduler):
 		"""
-		Performs a depth first search, collecting the objects in
-		topological order.
+		Obtains the rates that fire at a specific time. For fixed step sizes, the
+		rates are looked up in a :class:`FiringTable`.
 
 		Args:
-			depGraph (CBD.depGraph.DepGraph):   The dependency graph
-			object:                             The currently visited object
-			sortedList (list):                  Partially sorted list of objects
+			time (float):           The time to check.
+			delta (float):          The current step size.
+			scheduler (Scheduler):  The scheduler that provides the rates.
+
+		Returns:
+			A :class:`frozenset` of the rates that fire.
+		"""
+		if not self.multirate:
+			return self.ALWAYS
+		if self.__table[0] != delta:
+			self.__table = delta, scheduler.getFiringTable(self.rates, delta)
+		active = None if self.__table[1] is None else self.__table[1].get(time)
+		if active is None:
+			active = frozenset(rate for rate in self.rates if scheduler.fires(rate, time))
+		return active
+
+	def select(self, active, steps=None):
+		"""
+		Obtains the steps that must be computed when the given rates fire. An
+		algebraic loop is kept when at least one of its blocks fires. The steps
+		of the whole plan are cached per set of rates.
+
+		Args:
+			active (frozenset):     The rates that fire, as obtained from :func:`getActive`.
+			steps (list):           The steps to select from. When :code:`None`, all
+									steps of the plan are used. Defaults to :code:`None`.
+		"""
+		if not self.multirate:
+			return self.steps if steps is None else steps
+		if steps is None:
+			selected = self.__selected.get(active, None)
+			if selected is None:
+				selected = self.__selected[active] = self.select(active, self.steps)
+			return selected
+		return [step for step in steps if
+		        (any(rate in active for rate in step[1]) if step[0] is None else step[1] in active)]
+
+	def getLevels(self):
 		"""
-		if not depGraph.isMarked(object):
-			depGraph.mark(object)
+		Groups the steps of the plan in levels (i.e., a wavefront schedule). The
+		steps in a level only depend on the steps in the previous levels of the
+		current iteration, hence all steps in a level can be computed concurrently.
 
-			for influencer in depGraph.getInfluencers(object):
-				self.dfsSort(depGraph, influencer, sortedList)
+		Returns:
+			A list of levels, where each level is a list of steps in the order of
+			the plan.
+		"""
+		if self.__levels is None:
+			depth = {}
+			for component in self.schedule:
+				members = set(component)
+				influencers = [depth[inf] for obj in component for inf in self.depGraph.getInfluencers(obj)
+				               if inf not in members and inf in depth]
+				level = max(influencers, default=-1)
+				if not (len(component) == 1 and isinstance(component[0], Port)):
+					# Ports forward the level of their influencer
+					level += 1
+				for obj in component:
+					depth[obj] = level
+			self.__levels = []
+			for step in self.steps:
+				level = depth[step[2][0] if step[0] is None else step[2]]
+				while len(self.__levels) <= level:
+					self.__levels.append([])
+				self.__levels[level].append(step)
+			self.__levels = [level for level in self.__levels if len(level) > 0]
+		return self.__levels
+
+	def getPartitions(self, count):
+		"""
+		Splits the plan in independent parts, i.e., parts of which the blocks are
+		not connected to one another. Each part can be computed at the same time
+		as the others, without changing the results. The parts are the connected
+		components of the model, without the clock, balanced over at most
+		:code:`count` partitions w.r.t. the amount of blocks.
 
-			sortedList.append(object)
+		Args:
+			count (int):    The maximal amount of partitions.
 
-	def dfsCollect(self, depGraph, object, component, curIt):
+		Returns:
+			A tuple of the prelude (i.e., the steps of the clock, which must be
+			computed first) and the list of partitions. Each is a list of steps in
+			the order of the plan.
 		"""
-		Collects members of a strong component.
+		if count in self.__partitions:
+			return self.__partitions[count]
+		# Union-find of the blocks in the plan
+		parent = {}
+
+		def find(block):
+			root = block
+			while parent[root] is not root:
+				root = parent[root]
+			while parent[block] is not root:
+				parent[block], block = root, parent[block]
+			return root
+
+		members = [step[2] if step[0] is None else [step[2]] for step in self.steps]
+		for blocks in members:
+			for block in blocks:
+				parent[block] = block
+		prelude = []
+		groups = {}
+		for step, blocks in zip(self.steps, members):
+			if isinstance(blocks[0], Clock):
+				prelude.append(step)
+				continue
+			for block in blocks:
+				others = [blocks[0]]
+				for port in block.getInputPorts():
+					if port.getIncoming() is not None:
+						others.append(port.getPreviousPortClosure().block)
+				for other in others:
+					if other in parent and not isinstance(other, Clock):
+						parent[find(other)] = find(block)
+		for step, blocks in zip(self.steps, members):
+			if not isinstance(blocks[0], Clock):
+				groups.setdefault(find(blocks[0]), []).append(step)
+		# Assign the largest groups first, to the partition with the least blocks
+		partitions = [[] for _ in range(max(1, min(count, len(groups))))]
+		for group in sorted(groups.values(), key=len, reverse=True):
+			min(partitions, key=len).extend(group)
+		result = self.__partitions[count] = prelude, [p for p in partitions if len(p) > 0]
+		return result
+
+	def getCone(self, port):
+		"""
+		Obtains the part of the plan that must be computed to obtain the value
+		of a port. The cones are cached per port.
 
 		Args:
-			depGraph (CBD.depGraph.DepGraph):   The dependency graph
-			object:                             Node currently visited
-			component (list):                   Current component
-			curIt (int):                        The current iteration
+			port (CBD.Core.Port):   The port to compute.
 		"""
-		if not depGraph.isMarked(object):
-			depGraph.mark(object)
+		cone = self.__cones.get(port, None)
+		if cone is None:
+			cone = self.__cones[port] = ExecutionCone(self, port)
+		return cone
 
-			for dependent in depGraph.getDependents(object):
-				self.dfsCollect(depGraph, dependent, component, curIt)
+	@staticmethod
+	def hasCycle(component, depGraph):
+		"""
+		Determine whether a component is cyclic or not.
+
+		Args:
+			component (list):                   The set of strong components.
+			depGraph (CBD.depGraph.DepGraph):   The dependency graph.
+		"""
+		assert len(component) >= 1, "A component should have at least one element"
+		if len(component) > 1:
+			return True
+		# a strong component of size one may still have a cycle: a self-loop
+		return depGraph.hasDependency(component[0], component[0])
 
-			component.append(object)
+
+class ExecutionCone:
+	"""
+	The part of an :class:`ExecutionPlan` that (transitively) feeds a port,
+	together with the clock. Computing the cone yields the value of the port
+	at the current iteration, without computing the rest of the model.
+
+	Args:
+		plan (ExecutionPlan):   The plan to select the steps from.
+		port (CBD.Core.Port):   The port to compute.
+
+	Attributes:
+		steps (list):       The steps of the plan that are inside the cone, in the
+							order of the plan.
+		remaining (list):   The steps of the plan that are not inside the cone, in
+							the order of the plan. They only depend on the
+							cone and on each other, hence computing them after the
+							cone completes the iteration.
+		blocks (set):       The blocks inside the cone.
+		ports (list):       The ports outside the cone that receive a signal when
+							the cone is computed (e.g., the ports of hierarchical
+							blocks and the inputs of blocks outside the cone).
+
+	Note:
+		All inputs of the blocks in the cone are included, not only the
+		dependencies of the current iteration (e.g., the input of a delay).
+		This ensures that rewinding the cone exactly undoes its computation.
+	"""
+	def __init__(self, plan, port):
+		members = set()
+		for compute, _, block in plan.steps:
+			if compute is None:
+				members.update(block)
+			else:
+				members.add(block)
+
+		self.blocks = set()
+		stack = [port.getPreviousPortClosure().block, port.block.getClock()]
+		while len(stack) > 0:
+			block = stack.pop()
+			if block in self.blocks or block not in members:
+				continue
+			self.blocks.add(block)
+			for inp in block.getInputPorts():
+				if inp.getIncoming() is not None:
+					stack.append(inp.getPreviousPortClosure().block)
+
+		self.steps = []
+		self.remaining = []
+		for step in plan.steps:
+			if step[0] is None:
+				inside = any(block in self.blocks for block in step[2])
+				if inside:
+					self.blocks.update(step[2])
+			else:
+				inside = step[2] in self.blocks
+			(self.steps if inside else self.remaining).append(step)
+
+		self.ports = []
+		for block in self.blocks:
+			stack = [conn.target for out in block.getOutputPorts() for conn in out.getOutgoing()]
+			while len(stack) > 0:
+				target = stack.pop()
+				if target.block not in self.blocks:
+					self.ports.append(target)
+					stack.extend(conn.target for conn in target.getOutgoing())
+
+	def rewind(self):
+		"""
+		Rewinds all blocks and ports that were changed by computing the cone.
+		"""
+		for block in self.blocks:
+			block._rewind()
+		for port in self.ports:
+			port._rewind()
@@ -1,12 +1,16 @@
 import logging
 import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
-from pyCBD.Core import Port
+from pyCBD.Core import CBD
+from pyCBD.converters.CBD2Python import CBD2Python
+from pyCBD.converters.CBD2C import CBD2C
 from pyCBD.depGraph import createDepGraph
 from pyCBD.loopsolvers.linearsolver import LinearSolver
 from pyCBD.realtime.threadingBackend import ThreadingBackend, Platform
-from pyCBD.scheduling import TopologicalScheduler
-from pyCBD.tracers import Tracers
+from pyCBD.scheduling import TopologicalScheduler, ExecutionPlan
+from pyCBD.tracers import Tracers, TraceLevel
 from pyCBD.tracers.interpolator import Interpolator
 from pyCBD.state_events.locators import RegulaFalsiStateEventLocator
 import pyCBD.realtime.accurate_time as time
@@ -67,6 +71,27 @@ class Simulator:
 	   * - state event locator
 	     - :class:`pyCBD.state_events.locators.RegulaFalsiStateEventLocator`
 	     - :func:`setStateEventLocator`
+	   * - warm restart after a state event?
+	     - :code:`False`
+	     - :func:`setWarmRestart`
+	   * - ODE solver
+	     - :code:`None`
+	     - :func:`setODESolver`
+	   * - code generation?
+	     - :code:`False`
+	     - :func:`setCodeGeneration`
+	   * - align the steps with the block rates?
+	     - :code:`False`
+	     - :func:`setRateAlignment`
+	   * - parallel evaluation (workers)
+	     - :code:`None`
+	     - :func:`setParallel`
+	   * - trace level
+	     - :attr:`pyCBD.tracers.TraceLevel.BLOCK`
+	     - :func:`setTraceLevel`
+	   * - trace buffer (batch, limit, latency)
+	     - :code:`(256, 65536, 0.05)`
+	     - :func:`setTraceBuffer`
 	"""
 	def __init__(self, model):
 		self.model = model
@@ -89,8 +114,10 @@ class Simulator:
 		self.__termination_time = float('inf')
 		self.__termination_condition = None
 
-		# simulation data [dep graph, strong components, curIt]
+		# simulation data [dep graph, execution plan, curIt]
 		self.__sim_data = [None, None, 0]
+		# cached execution plans: (structure version, initial iteration?) -> plan
+		self.__plans = {}
 
 		self.__scheduler = TopologicalScheduler()
 
@@ -103,6 +130,18 @@ class Simulator:
 		self.__progress_finished = True
 		self.__logger = logging.getLogger("CBD")
 		self.__tracer = Tracers(self)
+		self.__trace_level = TraceLevel.BLOCK
+		self.__trace_paths = []
+		# blocks to trace, or None for all blocks
+		self.__trace_blocks = None
+		# decided at the start of the simulation
+		self.__traced = False
+		self.__compute_blocks = self.__computeBlocks
+		self.__codegen = False
+		self.__backend = "python"
+		# generated step functions: execution plan -> function
+		self.__generator = None
+		self.__generated = {}
 
 		self.__lasttime = None
 
@@ -117,6 +156,14 @@ class Simulator:
 
 		self.__state_events = []
 		self.__stel = None
+		self.__warm_restart = False
+		self.__ode_solver = None
+		self.__align_rates = False
+		self.__workers = None
+		self.__executor = None
+		# executor of the current run
+		self.__pool = None
+		self.__timings = {}
 		self.setStateEventLocator(RegulaFalsiStateEventLocator())
 		
 		# TODO: make this variable, given more solver implementations
@@ -137,6 +184,15 @@ class Simulator:
 		if term_time is not None:
 			self.__termination_time = term_time
 
+		if self.__ode_solver is not None and len(self.__state_events) > 0:
+			raise NotImplementedError("State events are not supported by the ODE solver.")
+		if self.__codegen and len(self.__state_events) > 0:
+			raise NotImplementedError("State events are not supported when generating code.")
+		if self.__ode_solver is not None and self.__align_rates:
+			raise NotImplementedError("Rate alignment is not supported by the ODE solver.")
+		if self.__ode_solver is not None and self.__workers is not None:
+			raise NotImplementedError("Parallel evaluation is not supported by the ODE solver.")
+
 		if self.getClock() is None:
 			self.model.addFixedRateClock(self.model.getUniqueBlockName("clock"), self.__deltaT)
 
@@ -144,7 +200,31 @@ class Simulator:
 		if self.__communication_interval is not None:
 			interp = Interpolator(ci=self.__communication_interval, start_time=self.getClock().getStartTime())
 		self.__tracer.startTracers(interp, self.model.getBlockName())
+		self.__traced = self.__tracer.hasTracers()
+		if self.__traced:
+			self.__trace_blocks = self.__selectTracedBlocks()
+			self.__compute_blocks = self.__computeBlocksTraced
+		elif self.__workers is not None:
+			self.__pool = self.__executor if self.__executor is not None else ThreadPoolExecutor(self.__workers)
+			self.__compute_blocks = self.__computeParallel
+		else:
+			self.__compute_blocks = self.__computeBlocks
+		if self.__codegen:
+			exports = self.model.getOutputPorts()
+			if self.getClock().getInputPortByName("h").getIncoming() is not None:
+				exports = exports + [self.getClock().getInputPortByName("h")]
+			if self.__ode_solver is not None:
+				exports = exports + self.__ode_solver.getStatePorts(self.model)
+			if self.__backend == "c":
+				self.__generator = CBD2C(self.model, exports)
+			else:
+				self.__generator = CBD2Python(self.model, exports)
+			self.__generated = {}
+			self.__compile_error = None
+			self.__compute_blocks = self.__computeGenerated
 		self.__sim_data = [None, None, 0]
+		self.__plans = {}
+		self.__timings = dict.fromkeys(("depgraph", "schedule", "plan", "compute"), 0.0)
 		self.__progress_finished = False
 		if self.__threading_backend is None:
 			# If there is still a backend, it is the same, so keep it!
@@ -161,7 +241,8 @@ class Simulator:
 			self.__realtime_start_time = time.time()
 			self.__lasttime = 0.0
 
-		self.__threading_backend.run_on_new_thread(self.__tracer.thread_loop)
+		if self.__traced:
+			self.__threading_backend.run_on_new_thread(self.__tracer.thread_loop)
 		self.__threading_backend.run_on_new_thread(self.__event_thread_loop)
 		self.signal("started")
 		if self.__realtime:
@@ -183,7 +264,11 @@ class Simulator:
 		if not self.__progress:
 			# Whenever the progress bar is initialized, wait until it ends
 			self.__progress_finished = True
-		self.__tracer.stopTracers(self.getTime())
+		if self.__traced:
+			self.__tracer.stopTracers(self.getTime())
+		if self.__pool is not None and self.__executor is None:
+			self.__pool.shutdown()
+		self.__pool = None
 		self.signal("finished")
 		self.__finished = True
 
@@ -244,6 +329,22 @@ class Simulator:
 		"""
 		return self.getClock().getTime(self.__sim_data[2])
 
+	def getTimings(self):
+		"""
+		Gets the time (in seconds) that was spent in each phase of the last (or
+		current) simulation run. The phases are:
+
+		- :code:`"depgraph"`: building the dependency graphs;
+		- :code:`"schedule"`: scheduling the dependency graphs;
+		- :code:`"plan"`: compiling the schedules into execution plans;
+		- :code:`"compute"`: computing the iterations (excluding the location
+		  of state events).
+
+		Returns:
+			A dictionary of :code:`phase -> seconds`.
+		"""
+		return dict(self.__timings)
+
 	def getRelativeTime(self):
 		"""
 		Gets the current simulation time, ignoring a starting offset.
@@ -353,6 +454,134 @@ class Simulator:
 		self.__stel = stel
 		self.__stel.setSimulator(self)
 
+	def setWarmRestart(self, enabled=True):
+		"""
+		Sets how the simulation continues after a state event.
+
+		By default, the simulation is restarted from scratch at the time of the
+		event (a cold restart): all signal histories are cleared and the simulation
+		continues from iteration 0, such that all initial conditions are computed
+		again. This loses the history before the event.
+
+		When warm restarts are enabled, the history is kept. The iteration after
+		the event is computed as if it were the first iteration (see
+		:func:`pyCBD.lib.std.Clock.restart`), which means that all integrators and
+		delays are re-seeded from their initial conditions at the time of the
+		event. All other iterations keep using the normal schedule.
+
+		Args:
+			enabled (bool): Whether or not to use warm restarts. Defaults to :code:`True`.
+
+		Note:
+			The relative time of the clock is not reset by a warm restart.
+		"""
+		self.__warm_restart = enabled
+
+	def setODESolver(self, solver=None):
+		"""
+		Sets a native solver for the integrators in the model.
+
+		By default, each :class:`pyCBD.lib.std.IntegratorBlock` is computed as a
+		CBD, which uses a fixed step size. When a solver is set, the states of all
+		integrators are advanced by the solver instead, which may adapt the step
+		size (i.e., the clock's delta) at each iteration. The delta of the simulator
+		is used as the initial step size.
+
+		Args:
+			solver (pyCBD.ode.RungeKuttaSolver):    The solver to use. When :code:`None`,
+													the integrators are computed as
+													usual. Defaults to :code:`None`.
+
+		Warning:
+			State events are not supported when a solver is set.
+
+		See Also:
+			:class:`pyCBD.preprocessing.rungekutta.RKPreprocessor`
+		"""
+		self.__ode_solver = solver
+
+	def setCodeGeneration(self, enabled=True, backend="python"):
+		"""
+		Computes each iteration with a single generated function, instead of
+		calling the :code:`compute` method of each block. The function is generated
+		once per execution plan, either as Python code by
+		:class:`pyCBD.converters.CBD2Python.CBD2Python`, or as C code that is
+		compiled into a shared library by :class:`pyCBD.converters.CBD2C.CBD2C`.
+
+		Only the histories of the output ports of the model and of the clock are
+		kept. Hence, the tracers only trace the model itself.
+
+		Args:
+			enabled (bool): Whether or not to generate code. Defaults to :code:`True`.
+			backend (str):  The language to generate, :code:`"python"` or :code:`"c"`.
+							Defaults to :code:`"python"`.
+
+		Warning:
+			The Python backend only supports models that consist of standard
+			library blocks (see :mod:`pyCBD.lib.std`) without algebraic loops and
+			without rates. The C backend computes the other blocks with the
+			interpreter and interprets plans with algebraic loops or rates
+			entirely. When the C code cannot be compiled, a warning is logged
+			and the whole model is interpreted. State events are not supported.
+		"""
+		assert backend in ("python", "c"), "Unknown code generation backend '%s'" % backend
+		self.__codegen = enabled
+		self.__backend = backend
+
+	def setRateAlignment(self, enabled=True):
+		"""
+		Shortens the steps of the simulation such that no firing of a block rate
+		(see :func:`setBlockRate`) is skipped. E.g., with a delta of 0.1, a
+		block with rate 0.25 would only be computed at multiples of 0.5. When
+		enabled, the step after time 0.2 is shortened to 0.05 instead. Afterwards,
+		the clock continues with its own delta.
+
+		Args:
+			enabled (bool): Whether or not to align the steps with the rates.
+							Defaults to :code:`True`.
+
+		Warning:
+			Rate alignment is not supported when an ODE solver is set.
+		"""
+		self.__align_rates = enabled
+
+	def setParallel(self, workers=None, executor=None):
+		"""
+		Computes the independent parts of the model concurrently. These are the
+		parts of which the blocks are not connected to one another (e.g., one
+		plant model per vehicle in a fleet), as obtained from
+		:func:`pyCBD.scheduling.ExecutionPlan.getPartitions`. Each part is computed
+		in the order of the plan, hence the results are the same as those of the
+		serial computation.
+
+		Args:
+			workers (int):      The amount of parts to compute at the same time.
+								When :code:`None`, the model is computed serially.
+								Defaults to :code:`None`.
+			executor:           The :class:`concurrent.futures.Executor` to use. When
+								:code:`None`, a :class:`concurrent.futures.ThreadPoolExecutor`
+								with :code:`workers` threads is created for each run.
+								Defaults to :code:`None`.
+
+		Note:
+			The blocks keep their signal histories in memory, hence the executor
+			must share it (i.e., a :class:`concurrent.futures.ProcessPoolExecutor`
+			cannot be used). Threads only speed up blocks that release the GIL,
+			e.g., :class:`pyCBD.lib.std.GenericBlock` instances that call into
+			NumPy, I/O or custom blocks that call native code.
+
+		Warning:
+			The model is computed serially when it is traced, when code is generated
+			and when computing a part of the model (i.e., when locating a state event).
+			Parallel evaluation is not supported when an ODE solver is set.
+
+		See Also:
+			:func:`pyCBD.scheduling.ExecutionPlan.getLevels`
+		"""
+		assert not isinstance(executor, ProcessPoolExecutor), "The executor must share the memory of the simulator"
+		self.__workers = workers
+		self.__executor = executor
+
 	def registerStateEvent(self, event):
 		"""
 		Registers a state event to the current simulator.
@@ -553,21 +782,33 @@ class Simulator:
 		simT = self.getTime()
 		self.signal("prestep", pre, simT)
 		curIt = self.__sim_data[2]
-		self.__tracer.trace(self.__tracer.traceStartNewIteration, (curIt, simT))
-
-		# Efficiency reasons: dep graph only changes at these times
-		#   in the given set of library blocks.
-		# TODO: Must be set to "every time" instead.
-		if curIt < 2 or self.__sim_data[0] is None:
-			self.__sim_data[0] = createDepGraph(self.model, curIt)
-		self.__sim_data[1] = self.__scheduler.obtain(self.__sim_data[0], curIt, simT)
+		if self.__traced:
+			self.__tracer.trace(self.__tracer.traceStartNewIteration, (curIt, simT))
+
+		plan = self.__obtainPlan(curIt, simT)
+		if self.__ode_solver is not None:
+			plan = self.__ode_solver.advance(self.model, plan, curIt, self.__termination_time)
+		self.__sim_data[0] = plan.depGraph
+		self.__sim_data[1] = plan
+		start = perf_counter()
 		self._lcc_compute()
+		self.__timings["compute"] += perf_counter() - start
+		if self.__ode_solver is not None:
+			self.getClock().setDeltaT(self.__ode_solver.getDeltaT())
+		elif self.__align_rates and plan.multirate:
+			clock = self.getClock()
+			delta = self.__scheduler.getNextActionDelta(clock.getTime(curIt), clock.getDeltaT(), plan.rates)
+			if delta < clock.getDeltaT():
+				clock.setDeltaT(delta)
 
 		# State Event Location
+		#   No crossings are detected between the event and the (warm) restart
+		initial = self.getClock().isInitial(curIt)
 		lcc = float('inf')
 		lcc_evt = None
 		for event in self.__state_events:
-			if not event.fired and self.__stel.detect_signal(event.output_name, event.level, event.direction):
+			if not event.fired and not initial and \
+					self.__stel.detect_signal(event.output_name, event.level, event.direction):
 				event.fired = True
 				t = self.__stel.run(event.output_name, event.level, event.direction)
 
@@ -577,35 +818,84 @@ class Simulator:
 				event.fired = False
 
 		if lcc != float('inf'):
-			# TODO: Ideally, the model was cached here and should not be recomputed
+			# Reuses the last probe of the locator if it was computed at lcc
 			self.__stel._function(lcc_evt.output_name, lcc, lcc_evt.level, noop=False)
 
 			lcc_evt.event(lcc_evt, lcc, self.model)
 
-			# reset to allow for new IC computation
-			self.model.clearSignals()
-			self.model.getClock().setStartTime(lcc)
-			self.model.getClock().reset()
-			self.__sim_data[0] = None
-			self.__sim_data[2] = 0
+			if self.__warm_restart:
+				# keep the history and re-seed all initial conditions in the next iteration
+				self.model.getClock().restart(self.__sim_data[2], lcc)
+			else:
+				# reset to allow for new IC computation
+				self.model.clearSignals()
+				self.model.getClock().setStartTime(lcc)
+				self.model.getClock().reset()
+				self.__sim_data[2] = 0
 		post = time.time()
-		self.__tracer.trace(self.__tracer.traceEndNewIteration, (curIt, simT))
+		if self.__traced:
+			self.__tracer.trace(self.__tracer.traceEndNewIteration, (curIt, simT))
 		self.signal("poststep", pre, post, self.getTime())
 
-	def _lcc_compute(self):
+	def _lcc_compute(self, cone=None):
 		"""
 		Computes the blocks at the current time and increases the iteration counter.
 		Mainly used inside of Level Crossing Detection, hence the name.
+
+		Args:
+			cone (ExecutionCone):   When set, only the blocks in this cone are
+									computed (without tracing). Defaults to
+									:code:`None`.
+
+		See Also:
+			- :func:`_getCone`
+			- :func:`_lcc_complete`
 		"""
-		self.__computeBlocks(self.__sim_data[1], self.__sim_data[0], self.__sim_data[2])
+		if cone is None:
+			self.__compute_blocks(self.__sim_data[1], self.__sim_data[2])
+		else:
+			self.__computeBlocks(self.__sim_data[1], self.__sim_data[2], cone.steps)
 		self.__sim_data[2] += 1
 
-	def _rewind(self):
+	def _lcc_complete(self, cone):
+		"""
+		Computes the blocks outside a cone, completing the last iteration that
+		was computed by :func:`_lcc_compute`.
+
+		Args:
+			cone (ExecutionCone):   The cone that was computed.
+		"""
+		plan, curIteration = self.__sim_data[1], self.__sim_data[2] - 1
+		if self.__traced:
+			# The cone was computed without tracing
+			self.__traceBlocks(plan, curIteration, cone.steps)
+		self.__compute_blocks(plan, curIteration, cone.remaining)
+
+	def _getCone(self, output_name):
+		"""
+		Obtains the cone of blocks that must be computed to obtain the value of
+		an output port of the model in the current execution plan.
+
+		Args:
+			output_name (str):  The name of the output port.
+		"""
+		return self.__sim_data[1].getCone(self.model.getOutputPortByName(output_name))
+
+	def _rewind(self, cone=None):
 		"""
 		Rewinds the simulator to the previous iteration.
+
+		Args:
+			cone (ExecutionCone):   When set, only the blocks in this cone are
+									rewound, which must be the case if the
+									cone was computed by :func:`_lcc_compute`.
+									Defaults to :code:`None`.
 		"""
 		self.__sim_data[2] -= 1
-		self.model._rewind()
+		if cone is None:
+			self.model._rewind()
+		else:
+			cone.rewind()
 
 	def __realtimeWait(self):
 		"""
@@ -661,48 +951,240 @@ class Simulator:
 				# Next event has been scheduled, kill this process
 				break
 
-	def __computeBlocks(self, sortedGraph, depGraph, curIteration):
+	def __obtainPlan(self, curIt, simT):
+		"""
+		Obtains the dependency graph and the compiled schedule for an iteration.
+
+		For the library blocks, the dependency graph only differs between the
+		first iteration and all others. Hence, both are cached per model structure
+		and per iteration class (i.e., iteration 0, or a warm restart, or later).
+		This cache is only invalidated when blocks or connections are added or
+		removed, which means a simulation restart (e.g., after a state event)
+		reuses the existing schedules.
+
+		Args:
+			curIt (int):    The current iteration.
+			simT (float):   The current simulation time.
+
+		Returns:
+			The :class:`pyCBD.scheduling.ExecutionPlan` to execute.
+		"""
+		version = self.model.getStructureVersion()
+		key = version, self.getClock().isInitial(curIt)
+		plan = self.__plans.get(key, None)
+		if plan is None:
+			if any(k[0] != version for k in self.__plans):
+				self.__plans.clear()
+			start = perf_counter()
+			depGraph = createDepGraph(self.model, curIt)
+			self.__timings["depgraph"] += perf_counter() - start
+			plan = self.__compilePlan(self.__scheduler.schedule, depGraph, curIt, simT)
+			self.__plans[key] = plan
+		elif self.__scheduler.recompte_at is True:
+			plan = self.__compilePlan(self.__scheduler.obtain, plan.depGraph, curIt, simT)
+		return plan
+
+	def __compilePlan(self, schedule, depGraph, curIt, simT):
+		"""
+		Schedules a dependency graph and compiles it into an execution plan.
+
+		Args:
+			schedule (callable):                The method of the scheduler to use.
+			depGraph (pyCBD.depGraph.DepGraph): The dependency graph.
+			curIt (int):                        The current iteration.
+			simT (float):                       The current simulation time.
+		"""
+		start = perf_counter()
+		schedule = schedule(depGraph, curIt, simT)
+		middle = perf_counter()
+		plan = ExecutionPlan(schedule, depGraph, self.__scheduler)
+		self.__timings["schedule"] += middle - start
+		self.__timings["plan"] += perf_counter() - middle
+		return plan
+
+	def __activeRates(self, plan, curIteration):
+		"""
+		Checks which rates of an execution plan fire in the current iteration.
+
+		Args:
+			plan (ExecutionPlan):   The compiled schedule.
+			curIteration (int):     Current simulation iteration.
+
+		Returns:
+			A :class:`frozenset` of the rates that fire.
+		"""
+		# Only check the rates once per iteration
+		if self.getClock().isInitial(curIteration):
+			return frozenset(plan.rates)
+		return plan.getActive(self.getTime(), self.getDeltaT(), self.__scheduler)
+
+	def __solveComponent(self, component, curIteration):
+		"""
+		Solves a strongly connected component (i.e., an algebraic loop).
+
+		Args:
+			component (list):       The blocks in the algebraic loop.
+			curIteration (int):     Current simulation iteration.
+
+		Returns:
+			The solution for each block in the component.
+		"""
+		self.__solver.checkValidity(self.model.getPath(), component)
+		solverInput = self.__solver.constructInput(component, curIteration)
+		return self.__solver.solve(solverInput)
+
+	def __computeBlocks(self, plan, curIteration, steps=None):
 		"""
-		Compute the new state of the model.
+		Compute the new state of the model, without tracing.
 
 		Args:
-			sortedGraph:        The set of strong components.
-			depGraph:           A dependency graph.
-			curIteration (int): Current simulation iteration.
+			plan (ExecutionPlan):   The compiled schedule.
+			curIteration (int):     Current simulation iteration.
+			steps (list):           The steps of the plan to compute. When
+									:code:`None`, all steps are computed.
+									Defaults to :code:`None`.
+
+		See Also:
+			:func:`__computeBlocksTraced`
+		"""
+		active = self.__activeRates(plan, curIteration)
+		for compute, rate, block in plan.select(active, steps):
+			if compute is not None:
+				compute(curIteration)
+			else:
+				# Detected a strongly connected component
+				component = block
+				solutionVector = self.__solveComponent(component, curIteration)
+				for blockIndex, block in enumerate(component):
+					if rate[blockIndex] in active:
+						block.appendToSignal(solutionVector[blockIndex])
+
+	def __computeBlocksTraced(self, plan, curIteration, steps=None):
 		"""
-		for component in sortedGraph:
-			if not self.__hasCycle(component, depGraph):
-				block = component[0]  # the strongly connected component has a single element
-				if isinstance(block, Port):
-					continue
-				if curIteration == 0 or self.__scheduler.mustCompute(block, self.getTime()):
-					block.compute(curIteration)
-					self.__tracer.trace(self.__tracer.traceCompute, (curIteration, block))
+		Compute the new state of the model and trace the computed blocks,
+		according to the trace level.
+
+		Args:
+			plan (ExecutionPlan):   The compiled schedule.
+			curIteration (int):     Current simulation iteration.
+			steps (list):           The steps of the plan to compute. When
+									:code:`None`, all steps are computed.
+									Defaults to :code:`None`.
+
+		See Also:
+			- :func:`__computeBlocks`
+			- :func:`setTraceLevel`
+		"""
+		active = self.__activeRates(plan, curIteration)
+		selected = self.__trace_blocks
+		trace = self.__tracer.trace
+		traceCompute = self.__tracer.traceCompute
+		for compute, rate, block in plan.select(active, steps):
+			if compute is not None:
+				compute(curIteration)
+				if selected is None or block in selected:
+					trace(traceCompute, (curIteration, block))
 			else:
 				# Detected a strongly connected component
-				self.__solver.checkValidity(self.model.getPath(), component)
-				solverInput = self.__solver.constructInput(component, curIteration)
-				solutionVector = self.__solver.solve(solverInput)
-				for block in component:
-					if curIteration == 0 or self.__scheduler.mustCompute(block, self.getTime()):
-						blockIndex = component.index(block)
+				component = block
+				solutionVector = self.__solveComponent(component, curIteration)
+				for blockIndex, block in enumerate(component):
+					if rate[blockIndex] in active:
 						block.appendToSignal(solutionVector[blockIndex])
-						self.__tracer.trace(self.__tracer.traceCompute, (curIteration, block))
-		self.__tracer.trace(self.__tracer.traceCompute, (curIteration, self.model))
+						if selected is None or block in selected:
+							trace(traceCompute, (curIteration, block))
+		trace(traceCompute, (curIteration, self.model))
 
-	def __hasCycle(self, component, depGraph):
+	def __traceBlocks(self, plan, curIteration, steps):
 		"""
-		Determine whether a component is cyclic or not.
+		Traces the blocks of steps that were already computed, according to
+		the trace level.
 
 		Args:
-			component (list):   The set of strong components.
-			depGraph:           The dependency graph.
+			plan (ExecutionPlan):   The compiled schedule.
+			curIteration (int):     Current simulation iteration.
+			steps (list):           The computed steps of the plan.
+
+		See Also:
+			:func:`__computeBlocksTraced`
+		"""
+		active = self.__activeRates(plan, curIteration)
+		selected = self.__trace_blocks
+		trace = self.__tracer.trace
+		traceCompute = self.__tracer.traceCompute
+		for compute, rate, block in plan.select(active, steps):
+			if compute is not None:
+				if selected is None or block in selected:
+					trace(traceCompute, (curIteration, block))
+			else:
+				for blockIndex, block in enumerate(block):
+					if rate[blockIndex] in active and (selected is None or block in selected):
+						trace(traceCompute, (curIteration, block))
+
+	def __computeParallel(self, plan, curIteration, steps=None):
 		"""
-		assert len(component) >= 1, "A component should have at least one element"
-		if len(component) > 1:
-			return True
-		# a strong component of size one may still have a cycle: a self-loop
-		return depGraph.hasDependency(component[0], component[0])
+		Compute the new state of the model, with the partitions of the plan computed
+		concurrently by the executor.
+
+		Args:
+			plan (ExecutionPlan):   The compiled schedule.
+			curIteration (int):     Current simulation iteration.
+			steps (list):           The steps of the plan to compute. When not
+									:code:`None`, they are computed serially.
+									Defaults to :code:`None`.
+
+		See Also:
+			:func:`setParallel`
+		"""
+		if steps is not None:
+			self.__computeBlocks(plan, curIteration, steps)
+			return
+		prelude, partitions = plan.getPartitions(self.__workers)
+		self.__computeBlocks(plan, curIteration, prelude)
+		futures = [self.__pool.submit(self.__computeBlocks, plan, curIteration, partition)
+		           for partition in partitions[1:]]
+		try:
+			if len(partitions) > 0:
+				self.__computeBlocks(plan, curIteration, partitions[0])
+		finally:
+			for future in futures:
+				future.result()
+
+	def __computeGenerated(self, plan, curIteration, steps=None):
+		"""
+		Compute the new state of the model with a generated function.
+
+		Args:
+			plan (ExecutionPlan):   The compiled schedule.
+			curIteration (int):     Current simulation iteration.
+			steps (list):           Unused, the whole plan is always computed.
+
+		See Also:
+			:func:`setCodeGeneration`
+		"""
+		step = self.__generated.get(plan, None)
+		if step is None:
+			try:
+				if self.__compile_error is not None:
+					raise NotImplementedError()
+				step = self.__generator.compile(plan, self.getClock().isInitial(curIteration))
+			except NotImplementedError:
+				if self.__backend != "c":
+					raise
+				# The whole plan is interpreted
+				step = lambda i, plan=plan: self.__computeBlocks(plan, i)
+			except RuntimeError as e:
+				if self.__backend != "c":
+					raise
+				# No (working) compiler, hence all plans are interpreted
+				self.__compile_error = e
+				self.__logger.warning("Cannot compile the generated C code, the model is interpreted instead:\n%s"
+				                      % e, extra={"block": self.model})
+				step = lambda i, plan=plan: self.__computeBlocks(plan, i)
+			self.__generated[plan] = step
+		step(curIteration)
+		if self.__traced:
+			self.__tracer.trace(self.__tracer.traceCompute, (curIteration, self.model))
 
 	def __progress_update(self):
 		"""
@@ -825,6 +1307,66 @@ class Simulator:
 		else:
 			raise ValueError("Invalid amount of arguments for custom tracer.")
 
+	def setTraceLevel(self, level=TraceLevel.BLOCK, paths=None):
+		"""
+		Sets which computations must be traced. Lower trace levels reduce
+		the overhead of tracing.
+
+		Args:
+			level (TraceLevel): The trace level. Defaults to
+								:attr:`pyCBD.tracers.TraceLevel.BLOCK`.
+			paths (iter):       The paths of the blocks to trace when the level is
+								:attr:`pyCBD.tracers.TraceLevel.PATHS`. When a path
+								identifies a CBD, all blocks inside of it are traced.
+								See :func:`pyCBD.Core.CBD.find` for the path format.
+
+		Note:
+			The trace level is applied at the start of the simulation. When no
+			tracers have been set, nothing will be traced, independent of the level.
+		"""
+		assert level != TraceLevel.PATHS or paths is not None, "Paths are required for trace level PATHS."
+		self.__trace_level = level
+		self.__trace_paths = [] if paths is None else list(paths)
+
+	def __selectTracedBlocks(self):
+		"""
+		Obtains the blocks that need to be traced, according to the trace level.
+
+		Returns:
+			A set of blocks, or :code:`None` if all blocks must be traced.
+		"""
+		if self.__trace_level == TraceLevel.BLOCK:
+			return None
+		selected = set()
+		if self.__trace_level == TraceLevel.PATHS:
+			todo = [self.model.find(path)[0] for path in self.__trace_paths]
+			while len(todo) > 0:
+				block = todo.pop()
+				selected.add(block)
+				if isinstance(block, CBD):
+					todo.extend(block.getBlocks())
+		return selected
+
+	def setTraceBuffer(self, batch=None, limit=None, latency=None):
+		"""
+		Configures the buffer in-between the simulation and the tracers.
+
+		Args:
+			batch (int):        The amount of traced events after which the tracers
+								are executed. When :code:`None`, the value is unchanged.
+								Defaults to :code:`None`.
+			limit (int):        The maximal amount of buffered events. When reached,
+								the simulation waits for the tracers. When :code:`None`,
+								the value is unchanged. Defaults to :code:`None`.
+			latency (float):    The maximal time (in seconds) a traced event can remain
+								in the buffer. When :code:`None`, the value is unchanged.
+								Defaults to :code:`None`.
+
+		See Also:
+			:class:`pyCBD.tracers.Tracers`
+		"""
+		self.__tracer.setBusLimits(batch, limit, latency)
+
 	def setVerbose(self, filename=None):
 		"""
 		Sets the verbose tracer.
@@ -17,10 +17,21 @@ class StateEventLocator:
 		t_lower (float):                The lower range of the level crossing. It is certain
 										that the crossing happens at a time later than (or
 										equal to) this time.
+		evaluations (int):              The amount of times the model was computed to
+										locate a crossing.
+
+	Note:
+		Only the blocks that influence the monitored output (and the clock) are computed
+		to locate a crossing. The last probe is kept until another computation is required.
+		If the crossing is located at the time of that probe, it is reused to complete the
+		model at that time, instead of computing the model again.
 	"""
 	def __init__(self):
 		self.sim = None
 		self.t_lower = 0.0
+		self.evaluations = 0
+		# (output name, time, cone, value, delta) of the last probe, if it was not rewound yet
+		self.__probe = None
 
 	def setSimulator(self, sim):
 		"""
@@ -67,6 +78,7 @@ class StateEventLocator:
 		Returns:
 			:code:`True` when the crossing happened, otherwise :code:`False`.
 		"""
+		self._restore()
 		sig = self.sim.model.getSignalHistory(output_name)
 		if len(sig) < 2:
 			# No crossing possible (yet)
@@ -99,20 +111,43 @@ class StateEventLocator:
 		"""
 		if callable(output_name):
 			return output_name(time) - level
+
+		probe = self.__probe
+		if not noop and probe is not None and probe[0] == output_name and probe[1] == time:
+			# The model was already computed at this time
+			self.__probe = None
+			self.sim._lcc_complete(probe[2])
+			return probe[3] - level
+
+		self._restore()
 		assert time >= self.t_lower
 
 		h = self.sim.getDeltaT()
-		# self.sim._rewind()
+		cone = self.sim._getCone(output_name)
 		self.setDeltaT(time - self.t_lower)
-		self.sim._lcc_compute()
-		s = self.sim.model.getSignalHistory(output_name)[-1].value - level
+		self.sim._lcc_compute(cone)
+		self.evaluations += 1
+		value = self.sim.model.getSignalHistory(output_name)[-1].value
 
 		if noop:
-			self.sim._rewind()
+			self.__probe = output_name, time, cone, value, self.sim.getDeltaT()
+		else:
+			self.sim._lcc_complete(cone)
+		self.setDeltaT(h)
+		return value - level
+
+	def _restore(self):
+		"""
+		Rewinds the last probe of :func:`_function`, if there is one.
+		"""
+		if self.__probe is None:
+			return
+		cone, delta = self.__probe[2], self.__probe[4]
+		self.__probe = None
+		h = self.sim.getDeltaT()
+		self.setDeltaT(delta)
+		self.sim._rewind(cone)
 		self.setDeltaT(h)
-		# if noop:
-		# 	self.sim._lcc_compute()
-		return s
 
 	def setDeltaT(self, dt):
 		"""
@@ -147,6 +182,7 @@ class StateEventLocator:
 		self.t_lower = p1[0]
 
 		# begin the algorithm on the left
+		self._restore()
 		self.sim._rewind()
 		t_crossing = self.algorithm(p1, p2, output_name, level, direction)
 
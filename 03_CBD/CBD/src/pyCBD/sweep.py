@@ -0,0 +1,306 @@
+"""
+This module provides a parameter sweep runner, which simulates many
+independent variations of a model in parallel.
+
+Each run creates its own model from a factory function and simulates it
+in a separate process. Only the requested output signals and statistics are
+sent back to the main process. All finished runs can be written to a
+checkpoint file, which allows a partially finished sweep to be resumed.
+
+Example:
+	The factory must be a top-level function, such that it can be sent to
+	the worker processes::
+
+		def factory(parameters, seed):
+			model = MyModel("model")
+			model.getBlockByName("gain").setValue(parameters["gain"])
+			return model
+
+		sweep = Sweep(factory, ParameterGrid(gain=[0.5, 1.0, 2.0]), duration=10.0,
+		              outputs=["OUT1"], checkpoint="sweep.jsonl")
+		for result in sweep.run():
+			print(result.parameters, result.outputs["OUT1"][-1])
+"""
+
+import os
+import json
+import random
+import hashlib
+import itertools
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pyCBD.Core import Port
+from pyCBD.simulator import Simulator
+
+SweepResult = namedtuple("SweepResult", ["index", "parameters", "seed", "outputs", "statistics"])
+"""
+The result of a single run in a sweep.
+
+- **index** -- The index of the run in the sweep.
+- **parameters** -- The parameters of the run.
+- **seed** -- The seed of the run.
+- **outputs** -- Dictionary of :code:`path -> [(time, value), ...]`.
+- **statistics** -- Dictionary of :code:`path -> {"count": ..., "mean": ..., "std": ..., "min": ..., "max": ...}`.
+"""
+
+
+def run_seed(seed, index):
+	"""
+	Computes a deterministic seed for a single run, independent of the
+	process that executes it.
+
+	Args:
+		seed (int):     The seed of the sweep.
+		index (int):    The index of the run.
+	"""
+	digest = hashlib.sha256(("%d:%d" % (seed, index)).encode()).digest()
+	return int.from_bytes(digest[:8], "little")
+
+
+class ParameterGrid:
+	"""
+	The Cartesian product of a set of parameter values.
+
+	Args:
+		**parameters:   For each parameter, the list of values it can take.
+	"""
+	def __init__(self, **parameters):
+		self.__names = list(parameters.keys())
+		self.__values = [list(v) for v in parameters.values()]
+
+	def __len__(self):
+		res = 1
+		for values in self.__values:
+			res *= len(values)
+		return res
+
+	def __iter__(self):
+		for combination in itertools.product(*self.__values):
+			yield dict(zip(self.__names, combination))
+
+
+class RandomSampler:
+	"""
+	Samples parameter sets at random.
+
+	Args:
+		count (int):        The amount of parameter sets.
+		seed (int):         The seed of the sampler. Defaults to :code:`0`.
+		**distributions:    For each parameter, a function that takes a
+							:class:`random.Random` instance and returns a value.
+							E.g. :code:`gain=lambda rng: rng.uniform(0.0, 1.0)`.
+
+	Note:
+		The i-th parameter set only depends on the seed and i.
+	"""
+	def __init__(self, count, seed=0, **distributions):
+		self.count = count
+		self.seed = seed
+		self.__distributions = distributions
+
+	def __len__(self):
+		return self.count
+
+	def __iter__(self):
+		for i in range(self.count):
+			rng = random.Random(run_seed(self.seed, i))
+			yield {name: dist(rng) for name, dist in self.__distributions.items()}
+
+
+def _simulate(factory, parameters, seed, config):
+	"""
+	Executes a single run. This function is executed in the worker processes.
+
+	Args:
+		factory (callable):     The model factory.
+		parameters (dict):      The parameters of the run.
+		seed (int):             The seed of the run.
+		config (dict):          The sweep configuration.
+
+	Returns:
+		A tuple of the outputs and the statistics.
+	"""
+	# Runs may be executed in the caller's process, whose random state must be kept
+	state = random.getstate()
+	random.seed(seed)
+	try:
+		model = factory(parameters, seed)
+		sim = Simulator(model)
+		sim.setDeltaT(config["delta_t"])
+		if config["setup"] is not None:
+			config["setup"](sim, parameters)
+		sim.run(config["duration"])
+	finally:
+		random.setstate(state)
+
+	outputs = {}
+	for path in config["outputs"]:
+		obj = model.find(path)[0]
+		history = obj.getHistory() if isinstance(obj, Port) else obj.getSignalHistory()
+		outputs[path] = [(s.time, s.value) for s in history]
+	statistics = {}
+	for path in config["statistics"]:
+		block = model.find(path)[0]
+		statistics[path] = {"count": block.count(), "mean": block.mean(), "std": block.std(),
+		                    "min": block.min(), "max": block.max()}
+	return outputs, statistics
+
+
+def _simulate_chunk(factory, chunk, config):
+	"""
+	Executes a chunk of runs. This function is executed in the worker processes.
+
+	Args:
+		factory (callable):     The model factory.
+		chunk (list):           List of :code:`(index, parameters, seed)` tuples.
+		config (dict):          The sweep configuration.
+	"""
+	return [SweepResult(index, parameters, seed, *_simulate(factory, parameters, seed, config))
+	        for index, parameters, seed in chunk]
+
+
+class Sweep:
+	"""
+	Simulates a model for many parameter sets in parallel.
+
+	Args:
+		factory (callable):     A top-level function that takes the parameters
+								(as a dictionary) and the seed of a run and
+								returns the model to simulate.
+		parameters (iter):      The parameter sets. E.g., a :class:`ParameterGrid`,
+								a :class:`RandomSampler` or a list of dictionaries.
+		duration (float):       The simulation time of each run.
+		delta_t (float):        The step size of each run. Defaults to :code:`1.0`.
+		outputs (iter):         The paths of the signals to return, relative to
+								the model. This can be a block (:code:`OUT1` is used)
+								or a port (e.g. the model's output port).
+								Defaults to no outputs.
+		statistics (iter):      The paths of the
+								:class:`pyCBD.lib.endpoints.StatisticsCollectorBlock`
+								blocks to summarize. Defaults to no statistics.
+		seed (int):             The seed of the sweep. Each run obtains its own
+								seed, computed with :func:`run_seed`. Defaults to
+								:code:`0`.
+		setup (callable):       Optional top-level function that receives the
+								simulator and the parameters before the run starts.
+								Defaults to :code:`None`.
+		checkpoint (str):       Optional file to which all finished runs are
+								appended. Defaults to :code:`None`.
+
+	Note:
+		The factory, the setup function and all parameters must be picklable.
+		Outputs and statistics must be JSON serializable to be checkpointed.
+	"""
+	def __init__(self, factory, parameters, duration, delta_t=1.0, outputs=(), statistics=(), seed=0,
+	             setup=None, checkpoint=None):
+		self.factory = factory
+		self.parameters = parameters
+		self.seed = seed
+		self.checkpoint = checkpoint
+		self.__config = {
+			"duration": duration,
+			"delta_t": delta_t,
+			"outputs": list(outputs),
+			"statistics": list(statistics),
+			"setup": setup
+		}
+
+	def load(self):
+		"""
+		Loads all finished runs from the checkpoint file. When an index occurs
+		multiple times, the last run is kept.
+
+		Returns:
+			A dictionary of :code:`index -> SweepResult`.
+		"""
+		done = {}
+		if self.checkpoint is None or not os.path.isfile(self.checkpoint):
+			return done
+		with open(self.checkpoint) as file:
+			for line in file:
+				line = line.strip()
+				if len(line) == 0:
+					continue
+				try:
+					res = SweepResult(**json.loads(line))
+				except ValueError:
+					# Partially written line of an interrupted sweep
+					continue
+				res.outputs.update({k: [tuple(s) for s in v] for k, v in res.outputs.items()})
+				done[res.index] = res
+		return done
+
+	def run(self, workers=None, chunksize=1, resume=True):
+		"""
+		Executes the sweep and yields the results as they become available.
+		Hence, the results are not necessarily ordered.
+
+		Args:
+			workers (int):      The amount of worker processes. When :code:`None`,
+								all cores are used. When :code:`0`, all runs are
+								executed in the current process. Defaults to
+								:code:`None`.
+			chunksize (int):    The amount of runs that are sent to a worker at
+								once. Larger chunks reduce the communication
+								overhead for short runs. Defaults to :code:`1`.
+			resume (bool):      When :code:`True`, the runs in the checkpoint file
+								are yielded and not executed again, as long as
+								their parameters and seed are still the same.
+								Otherwise, the checkpoint file is overwritten.
+								Defaults to :code:`True`.
+
+		Yields:
+			:class:`SweepResult` instances.
+
+		Note:
+			When the generator is closed early, the runs that were not started
+			yet are cancelled. The runs that are being executed are finished
+			and written to the checkpoint file.
+		"""
+		done = self.load() if resume else {}
+		if self.checkpoint is not None and not resume and os.path.isfile(self.checkpoint):
+			os.remove(self.checkpoint)
+
+		todo = []
+		for i, p in enumerate(self.parameters):
+			seed = run_seed(self.seed, i)
+			res = done.get(i, None)
+			# Compare with the parameters as they are stored in the checkpoint file
+			if res is not None and res.seed == seed and res.parameters == json.loads(json.dumps(p, default=float)):
+				yield res
+			else:
+				todo.append((i, p, seed))
+		chunks = [todo[i:i + chunksize] for i in range(0, len(todo), chunksize)]
+		if workers == 0:
+			for chunk in chunks:
+				yield from self.__store(_simulate_chunk(self.factory, chunk, self.__config))
+			return
+
+		executor = ProcessPoolExecutor(max_workers=workers)
+		futures = [executor.submit(_simulate_chunk, self.factory, chunk, self.__config) for chunk in chunks]
+		pending = set(futures)
+		try:
+			for future in as_completed(futures):
+				pending.remove(future)
+				yield from self.__store(future.result())
+		finally:
+			for future in pending:
+				future.cancel()
+			executor.shutdown(wait=True)
+			for future in pending:
+				if not future.cancelled() and future.exception() is None:
+					self.__store(future.result())
+
+	def __store(self, results):
+		"""
+		Appends finished runs to the checkpoint file.
+
+		Args:
+			results (list): The finished runs.
+		"""
+		if self.checkpoint is not None:
+			with open(self.checkpoint, 'a') as file:
+				for res in results:
+					file.write(json.dumps(res._asdict(), default=float) + "\n")
+		return results
@@ -2,52 +2,128 @@
 The tracers module provides an interface for tracing simulation data.
 """
 import copy
-import time
+import threading
+from collections import deque
+from enum import Enum
 
 from pyCBD.tracers.baseTracer import BaseTracer
 
+
+class TraceLevel(Enum):
+	"""
+	Specifies which computations must be traced.
+	"""
+
+	STEP = 0
+	"""Only trace the iterations and the outputs of the top-level model."""
+
+	BLOCK = 1
+	"""Trace every block computation."""
+
+	PATHS = 2
+	"""Only trace the computations of a selection of blocks (and the top-level model)."""
+
+
 class Tracers:
 	"""
 	Collection object for multiple tracers.
 
+	Traced events are collected on a bus, which is drained in batches by a
+	separate thread. This thread sleeps until a batch of events is ready. When
+	the bus reaches its limit, the simulation thread drains it itself, which
+	slows down the simulation until the tracers can keep up and bounds the
+	amount of memory used.
+
 	Arguments:
 		sim (Simulator):    The CBD simulator of the trace object.
+		batch (int):        The amount of events after which the tracer thread
+							is woken. Defaults to :code:`256`.
+		limit (int):        The maximal amount of events on the bus. Defaults
+							to :code:`65536`.
+		latency (float):    The maximal time (in seconds) events can remain on
+							the bus if the batch size is never reached.
+							Defaults to :code:`0.05`.
 
 	Note:
 		This class will maintain and keep track of the UID of a tracer.
 		Don't set this yourself!
 	"""
-	def __init__(self, sim):
+	def __init__(self, sim, batch=256, limit=65536, latency=0.05):
 		self.uid = 0
 		self.tracers = {}
 		self.recovers = {}
-		self.bus = []
+		self.bus = deque()
 		self.sim = sim
+		self.batch = batch
+		self.limit = limit
+		self.latency = latency
+		self.__wakeup = threading.Event()
+		self.__drain_lock = threading.Lock()
+		self.__stopped = False
+
+	def setBusLimits(self, batch=None, limit=None, latency=None):
+		"""
+		Changes the buffering behaviour of the trace bus.
+
+		Args:
+			batch (int):        The amount of events after which the tracer thread
+								is woken. When :code:`None`, the value is unchanged.
+			limit (int):        The maximal amount of events on the bus. When
+								:code:`None`, the value is unchanged.
+			latency (float):    The maximal time (in seconds) events can remain on
+								the bus. When :code:`None`, the value is unchanged.
+		"""
+		if batch is not None:
+			self.batch = batch
+		if limit is not None:
+			self.limit = limit
+		if latency is not None:
+			self.latency = latency
+		assert 0 < self.batch <= self.limit, "The batch size must be positive and at most the limit."
 
 	def hasTracers(self):
 		"""
 		Checks that there are registered tracers.
 		"""
-		return len(self.tracers) == 0
+		return len(self.tracers) > 0
 
 	def thread_loop(self):
 		"""
 		Mainloop for tracing information. reduces the amount of threads created.
 		"""
-		while self.sim.is_running():
-			while len(self.bus) > 0:
-				evt, args = self.bus.pop(0)
+		wakeup = self.__wakeup
+		while self.sim.is_running() and not self.__stopped:
+			wakeup.wait(self.latency)
+			wakeup.clear()
+			self.drain()
+
+	def drain(self):
+		"""
+		Executes all events that are currently on the bus.
+		Only a single thread will drain the bus at any given time.
+		"""
+		bus = self.bus
+		with self.__drain_lock:
+			while bus:
+				evt, args = bus.popleft()
 				evt(*args)
-			time.sleep(0.05)
 
 	def trace(self, event, args):
 		"""
 		Traces an event.
+
 		Args:
 			event (callable):   The event to trace.
 			args (iter):        The list of arguments for the event.
 		"""
-		self.bus.append((event, args))
+		bus = self.bus
+		bus.append((event, args))
+		size = len(bus)
+		if size >= self.batch:
+			if size >= self.limit:
+				self.drain()
+			elif not self.__wakeup.is_set():
+				self.__wakeup.set()
 
 	def registerTracer(self, tracer, recover=False):
 		"""
@@ -94,6 +170,7 @@ class Tracers:
 		Returns:
 
 		"""
+		self.__stopped = False
 		for tid in self.tracers:
 			self.tracers[tid].setModelName(model_name)
 			if interp is not None:
@@ -109,9 +186,9 @@ class Tracers:
 			term_time (numeric):    The termination time.
 		"""
 		self.trace(self.traceEndSimulation, (term_time,))
-		while len(self.bus) > 0:
-			evt, args = self.bus.pop(0)
-			evt(*args)
+		self.__stopped = True
+		self.__wakeup.set()
+		self.drain()
 		for tracer in self.tracers.values():
 			tracer.stopTracer()
 
@@ -0,0 +1,222 @@
+"""
+Binary, columnar tracer for the CBD Simulator.
+
+The trace is a directory that contains:
+
+- :code:`meta.json`: The signal names and storage settings.
+- :code:`index.npy`: For each chunk, the amount of rows and the first and
+  last time in that chunk.
+- :code:`chunk_XXXXXX.npz` or :code:`chunk_XXXXXX.npy`: The chunks themselves.
+  Compressed chunks are stored as NPZ archives, with one member per signal.
+  Uncompressed chunks are stored as a single 2D array, where each row is a
+  signal (the first row is the time). This allows them to be memory-mapped.
+
+Use :class:`NPZTraceReader` to load (parts of) a trace.
+
+Warning:
+	This module requires :code:`numpy` to be installed.
+"""
+
+import os
+import json
+import math
+
+from .baseTracer import BaseTracer
+
+try:
+	import numpy as np
+except ImportError:
+	raise ImportError("Can not import NPZTracer without numpy.")
+
+_META = "meta.json"
+_INDEX = "index.npy"
+
+
+def _chunk_name(idx, compress):
+	return "chunk_%06d.%s" % (idx, "npz" if compress else "npy")
+
+
+class NPZTracer(BaseTracer):
+	"""
+	Binary, columnar tracer for the CBD Simulator.
+
+	Args:
+		uid:                A unique identifier for the tracer.
+							Defaults to -1 (unset).
+		filename (str):     The name of the directory to write the trace to.
+		chunk_size (int):   The amount of time points that are buffered in memory
+							before they are written to a new chunk. Defaults to
+							:code:`4096`.
+		compress (bool):    When :code:`True`, the chunks are compressed. Otherwise,
+							they can be memory-mapped when reading the trace.
+							Defaults to :code:`True`.
+
+	Note:
+		All values are stored as 64-bit floats. Values that cannot be converted
+		(or that have not been computed yet) are stored as :code:`nan`.
+
+	See Also:
+		:class:`NPZTraceReader`
+	"""
+	def __init__(self, uid=-1, filename=None, chunk_size=4096, compress=True):
+		assert filename is not None, "The NPZTracer requires a filename."
+		super().__init__(uid, filename)
+		self.chunk_size = chunk_size
+		self.compress = compress
+		self.__header = []
+		self.__buffer = None
+		self.__row = 0
+		self.__index = []
+
+	def openFile(self, recover=False):
+		os.makedirs(self.filename, exist_ok=True)
+		self.__header = list(self._interpolator.get_header())
+		self.__index = []
+		if recover and os.path.isfile(os.path.join(self.filename, _META)):
+			with open(os.path.join(self.filename, _META)) as file:
+				meta = json.load(file)
+			assert meta["signals"] == self.__header, "Cannot recover a trace of a different model."
+			self.compress = meta["compress"]
+			self.__index = np.load(os.path.join(self.filename, _INDEX)).tolist()
+		with open(os.path.join(self.filename, _META), 'w') as file:
+			json.dump({"signals": self.__header, "compress": self.compress}, file)
+		self.__buffer = np.empty((len(self.__header) + 1, self.chunk_size))
+		self.__row = 0
+
+	def closeFile(self):
+		self.flush()
+
+	def flush(self):
+		"""
+		Writes all buffered values to a new chunk.
+		"""
+		if self.__row == 0:
+			return
+		data = self.__buffer[:, :self.__row]
+		path = os.path.join(self.filename, _chunk_name(len(self.__index), self.compress))
+		if self.compress:
+			np.savez_compressed(path, time=data[0], **{"s%d" % i: data[i + 1] for i in range(len(self.__header))})
+		else:
+			np.save(path, data)
+		self.__index.append((self.__row, data[0, 0], data[0, self.__row - 1]))
+		np.save(os.path.join(self.filename, _INDEX), np.array(self.__index, dtype=float).reshape(-1, 3))
+		self.__row = 0
+
+	def __append(self, time, values):
+		col = self.__buffer[:, self.__row]
+		col[0] = time
+		for i, value in enumerate(values):
+			try:
+				col[i + 1] = value
+			except (TypeError, ValueError):
+				col[i + 1] = math.nan
+		self.__row += 1
+		if self.__row == self.chunk_size:
+			self.flush()
+
+	def __current(self, sig):
+		try:
+			return self._interpolator.get_curr_signal(sig)[1]
+		except KeyError:
+			return math.nan
+
+	def traceEndNewIteration(self, _, time):
+		if self._interpolator.is_ci_set():
+			cnt = self._interpolator.get_deltas_passed(time)
+			for i in range(cnt):
+				x = self._interpolator.get_next_computation_point()
+				if x <= time:
+					self.__append(x, self._interpolator.compute(x))
+				self._interpolator.update_time()
+			self._interpolator.post_compute()
+		else:
+			# NOTE: multi-rate simulation assumes zero-order hold, thus this will be valid
+			self.__append(time, [self.__current(sig) for sig in self.__header])
+
+
+class NPZTraceReader:
+	"""
+	Reads (a part of) a trace that was written by the :class:`NPZTracer`.
+	Only the chunks that overlap with the requested time range are opened.
+	Compressed chunks only decompress the requested signals, uncompressed
+	chunks are memory-mapped.
+
+	Args:
+		filename (str): The directory of the trace.
+	"""
+	def __init__(self, filename):
+		self.filename = filename
+		with open(os.path.join(filename, _META)) as file:
+			meta = json.load(file)
+		self.__signals = meta["signals"]
+		self.__columns = {name: i + 1 for i, name in enumerate(self.__signals)}
+		self.__compress = meta["compress"]
+		path = os.path.join(filename, _INDEX)
+		if os.path.isfile(path):
+			self.__index = np.load(path).reshape(-1, 3)
+		else:
+			self.__index = np.empty((0, 3))
+
+	def getSignalNames(self):
+		"""
+		Obtains the names of all traced signals, in order.
+		"""
+		return list(self.__signals)
+
+	def getTimeRange(self):
+		"""
+		Obtains the first and last traced time, or :code:`None` if the trace is empty.
+		"""
+		if len(self.__index) == 0:
+			return None
+		return self.__index[0, 1], self.__index[-1, 2]
+
+	def __len__(self):
+		return int(self.__index[:, 0].sum())
+
+	def read(self, signals=None, start=None, end=None):
+		"""
+		Reads a selection of the trace.
+
+		Args:
+			signals (iter): The names of the signals to read. When :code:`None`,
+							all signals are read. Defaults to :code:`None`.
+			start (float):  The first time to include. When :code:`None`, the
+							trace is read from the start. Defaults to :code:`None`.
+			end (float):    The last time to include. When :code:`None`, the
+							trace is read until the end. Defaults to :code:`None`.
+
+		Returns:
+			A dictionary of :code:`name -> numpy.ndarray`, which includes the
+			:code:`"time"` key.
+
+		Raises:
+			KeyError: When one of the signals was not traced.
+		"""
+		if signals is None:
+			signals = self.__signals
+		columns = [self.__columns[name] for name in signals]
+		start = -math.inf if start is None else start
+		end = math.inf if end is None else end
+
+		parts = {name: [] for name in ["time"] + list(signals)}
+		for idx, (_, first, last) in enumerate(self.__index):
+			if last < start or first > end:
+				continue
+			path = os.path.join(self.filename, _chunk_name(idx, self.__compress))
+			if self.__compress:
+				chunk = np.load(path)
+				time = chunk["time"]
+				lo, hi = np.searchsorted(time, start, 'left'), np.searchsorted(time, end, 'right')
+				parts["time"].append(time[lo:hi])
+				for name, col in zip(signals, columns):
+					parts[name].append(chunk["s%d" % (col - 1)][lo:hi])
+				chunk.close()
+			else:
+				chunk = np.load(path, mmap_mode='r')
+				time = chunk[0]
+				lo, hi = np.searchsorted(time, start, 'left'), np.searchsorted(time, end, 'right')
+				parts["time"].append(np.array(time[lo:hi]))
+				for name, col in zip(signals, columns):
+					parts[name].append(np.array(chunk[col, lo:hi]))
+		return {name: np.concatenate(values) if len(values) > 0 else np.empty(0) for name, values in parts.items()}
@@ -54,6 +54,115 @@ def unhash64(H):
 		value += r
 	return value
 
+
+class RingBuffer:
+	"""
+	Fixed-capacity, array-backed sequence that only retains the last :attr:`size`
+	appended values. Indexing happens on the *logical* position of a value (i.e.,
+	the position it would have had in an ever-growing list), which allows the
+	buffer to be used as a drop-in replacement for the signal histories of
+	:class:`pyCBD.Core.Port`.
+
+	Args:
+		size (int):             The amount of values to retain.
+		overflow (callable):    Optional single-argument function that will be
+								called with each value that is dropped from the
+								buffer. Defaults to :code:`None` (i.e., values
+								are discarded).
+
+	Note:
+		:func:`len` returns the logical length of the buffer, i.e., the total amount
+		of values that were appended (and not popped). Iterating over the buffer
+		only yields the retained values.
+
+	Raises:
+		IndexError: When accessing a value that is no longer retained.
+	"""
+	def __init__(self, size, overflow=None):
+		assert size > 0, "A RingBuffer must be able to hold at least one value."
+		self.__data = [None] * size
+		self.__size = size
+		self.__overflow = overflow
+		self.__start = 0
+		self.__count = 0
+
+	def __repr__(self):
+		return "RingBuffer(%s, start=%d)" % (repr(list(self)), self.__start)
+
+	def __len__(self):
+		return self.__count
+
+	def __iter__(self):
+		for i in range(self.__start, self.__count):
+			yield self.__data[i % self.__size]
+
+	def __getitem__(self, index):
+		if isinstance(index, slice):
+			return [self[i] for i in range(*index.indices(self.__count))]
+		if index < 0:
+			index += self.__count
+		if index < self.__start or index >= self.__count:
+			raise IndexError("RingBuffer index %d out of the retained range [%d, %d)" %
+			                 (index, self.__start, self.__count))
+		return self.__data[index % self.__size]
+
+	def getSize(self):
+		"""
+		Gets the capacity of the buffer.
+		"""
+		return self.__size
+
+	def getStart(self):
+		"""
+		Gets the logical index of the oldest retained value.
+		"""
+		return self.__start
+
+	def append(self, value):
+		"""
+		Appends a value, dropping the oldest one if the buffer is full.
+
+		Args:
+			value (Any):    The value to append.
+		"""
+		idx = self.__count % self.__size
+		if self.__count - self.__start == self.__size:
+			if self.__overflow is not None:
+				self.__overflow(self.__data[idx])
+			self.__start += 1
+		self.__data[idx] = value
+		self.__count += 1
+
+	def pop(self):
+		"""
+		Removes and returns the last value.
+
+		Raises:
+			IndexError: When there are no retained values left.
+		"""
+		if self.__count == self.__start:
+			raise IndexError("pop from empty RingBuffer")
+		self.__count -= 1
+		idx = self.__count % self.__size
+		value = self.__data[idx]
+		self.__data[idx] = None
+		return value
+
+	def emptyCopy(self):
+		"""
+		Creates a new, empty buffer with the same capacity and overflow function.
+		"""
+		return RingBuffer(self.__size, self.__overflow)
+
+	def clear(self):
+		"""
+		Removes all values from the buffer.
+		"""
+		self.__data = [None] * self.__size
+		self.__start = 0
+		self.__count = 0
+
+
 if __name__ == '__main__':
 	print(hash64(13697856412599))
 	print(unhash64("dhvh3zU3"))
@@ -3,11 +3,19 @@
 Unittest for the basic CBD features
 """
 
+import math
 import unittest
 
 from pyCBD.Core import *
 from pyCBD.lib.std import *
 from pyCBD.simulator import Simulator
+from pyCBD.loopsolvers.linearsolver import NumpyLinearSolver, _NUMPY_FOUND
+
+_SYMPY_FOUND = True
+try:
+	from pyCBD.loopsolvers.sympysolver import SympySolver
+except ImportError:
+	_SYMPY_FOUND = False
 
 NUM_DISCR_TIME_STEPS = 5
 
@@ -143,6 +151,103 @@ class BasicCBDTestCase(unittest.TestCase):
 		self.assertEqual(self._getSignal("n1"), [7.5]*5)
 		self.assertEqual(self._getSignal("n2"), [-4.25]*5)
 
+	def testNumpyLinearStrongComponent(self):
+		self.sim.setAlgebraicLoopSolver(NumpyLinearSolver())
+		self.CBD.addBlock(ConstantBlock(block_name="c1", value=5))
+		self.CBD.addBlock(ConstantBlock(block_name="c2", value=8))
+		self.CBD.addBlock(AdderBlock(block_name="a1"))
+		self.CBD.addBlock(AdderBlock(block_name="a2"))
+		self.CBD.addBlock(NegatorBlock(block_name="n"))
+
+		self.CBD.addConnection("c1", "a1")
+		self.CBD.addConnection("a2", "a1")
+		self.CBD.addConnection("c2", "a2")
+		self.CBD.addConnection("n", "a2")
+		self.CBD.addConnection("a1", "n")
+		self._run(NUM_DISCR_TIME_STEPS)
+		for a, b in zip(self._getSignal("a1"), [6.5]*5):
+			self.assertAlmostEqual(a, b)
+		for a, b in zip(self._getSignal("a2"), [1.5]*5):
+			self.assertAlmostEqual(a, b)
+		for a, b in zip(self._getSignal("n"), [-6.5]*5):
+			self.assertAlmostEqual(a, b)
+
+	@unittest.skipUnless(_NUMPY_FOUND, "NumPy is not installed")
+	def testNumpyLinearFactorizationReuse(self):
+		solver = NumpyLinearSolver()
+		self.sim.setAlgebraicLoopSolver(solver)
+		self.CBD.addBlock(TimeBlock(block_name="t"))
+		self.CBD.addBlock(ConstantBlock(block_name="c", value=3))
+		self.CBD.addBlock(AdderBlock(block_name="a"))
+		self.CBD.addBlock(ProductBlock(block_name="p"))
+
+		self.CBD.addConnection("t", "a")
+		self.CBD.addConnection("p", "a")
+		self.CBD.addConnection("a", "p")
+		self.CBD.addConnection("c", "p")
+		self._run(NUM_DISCR_TIME_STEPS)
+		# a = t + 3a  =>  a = -t / 2
+		for a, b in zip(self._getSignal("a"), [-0.0, -0.5, -1.0, -1.5, -2.0]):
+			self.assertAlmostEqual(a, b)
+		self.assertEqual(solver.factorizations, 1)
+
+	@unittest.skipUnless(_NUMPY_FOUND, "NumPy is not installed")
+	def testNumpyLinearChangingCoefficients(self):
+		solver = NumpyLinearSolver()
+		self.sim.setAlgebraicLoopSolver(solver)
+		self.CBD.addBlock(TimeBlock(block_name="t"))
+		self.CBD.addBlock(ConstantBlock(block_name="c", value=1))
+		self.CBD.addBlock(ConstantBlock(block_name="c2", value=2))
+		self.CBD.addBlock(AdderBlock(block_name="a"))
+		self.CBD.addBlock(AdderBlock(block_name="f"))
+		self.CBD.addBlock(ProductBlock(block_name="p"))
+
+		self.CBD.addConnection("t", "f")
+		self.CBD.addConnection("c2", "f")
+		self.CBD.addConnection("c", "a")
+		self.CBD.addConnection("p", "a")
+		self.CBD.addConnection("a", "p")
+		self.CBD.addConnection("f", "p")
+		self._run(NUM_DISCR_TIME_STEPS)
+		# a = 1 + (t + 2)a  =>  a = -1 / (t + 1)
+		for a, b in zip(self._getSignal("a"), [-1.0, -0.5, -1.0 / 3, -0.25, -0.2]):
+			self.assertAlmostEqual(a, b)
+		self.assertEqual(solver.factorizations, NUM_DISCR_TIME_STEPS)
+
+	@unittest.skipUnless(_SYMPY_FOUND, "SymPy is not installed")
+	def testSympyLinearStrongComponent(self):
+		self.sim.setAlgebraicLoopSolver(SympySolver())
+		self.CBD.addBlock(TimeBlock(block_name="t"))
+		self.CBD.addBlock(ConstantBlock(block_name="c", value=3))
+		self.CBD.addBlock(AdderBlock(block_name="a"))
+		self.CBD.addBlock(ProductBlock(block_name="p"))
+
+		self.CBD.addConnection("t", "a")
+		self.CBD.addConnection("p", "a")
+		self.CBD.addConnection("a", "p")
+		self.CBD.addConnection("c", "p")
+		self._run(NUM_DISCR_TIME_STEPS)
+		for a, b in zip(self._getSignal("a"), [-0.0, -0.5, -1.0, -1.5, -2.0]):
+			self.assertAlmostEqual(a, b)
+		for a, b in zip(self._getSignal("p"), [0.0, -1.5, -3.0, -4.5, -6.0]):
+			self.assertAlmostEqual(a, b)
+
+	@unittest.skipUnless(_SYMPY_FOUND, "SymPy is not installed")
+	def testSympyNewtonStrongComponent(self):
+		self.sim.setAlgebraicLoopSolver(SympySolver(method="newton"))
+		self.CBD.addBlock(TimeBlock(block_name="t"))
+		self.CBD.addBlock(AdderBlock(block_name="a"))
+		self.CBD.addBlock(GenericBlock(block_name="g", block_operator="cos"))
+
+		self.CBD.addConnection("t", "a")
+		self.CBD.addConnection("g", "a")
+		self.CBD.addConnection("a", "g")
+		self._run(NUM_DISCR_TIME_STEPS)
+		# a = t + cos(a)
+		for t, a in enumerate(self._getSignal("a")):
+			self.assertAlmostEqual(a, t + math.cos(a))
+		self.assertAlmostEqual(self._getSignal("a")[0], 0.7390851332151607)
+
 	def testNonLinearStrongComponent(self):
 		self.CBD.addBlock(ConstantBlock(block_name="c1", value=15))
 		self.CBD.addBlock(ConstantBlock(block_name="c2", value=10))
@@ -0,0 +1,359 @@
+#!/usr/bin/env python
+"""
+Unit tests for the Python code generator.
+"""
+
+import os
+import shutil
+import hashlib
+import tempfile
+import unittest
+from unittest import mock
+
+from pyCBD.Core import *
+from pyCBD.lib.std import *
+from pyCBD.lib.std import GainBlock
+from pyCBD.simulator import Simulator
+from pyCBD.state_events import StateEvent
+from pyCBD.converters.CBD2Python import CBD2Python
+from pyCBD.converters.CBD2C import CBD2C
+import pyCBD.converters.CBD2C
+
+_NUMPY_FOUND = True
+try:
+	from pyCBD.ode import RungeKuttaSolver
+except ImportError:
+	_NUMPY_FOUND = False
+
+_COMPILER_FOUND = shutil.which(os.environ.get("CC", "cc")) is not None
+
+NUM_DISCR_TIME_STEPS = 50
+
+
+def createModel():
+	child = CBD("child", ["IN1"], ["OUT1", "OUT2"])
+	child.addBlock(IntegratorBlock("int"))
+	child.addBlock(DerivatorBlock("der"))
+	child.addBlock(ConstantBlock("zero", 0.0))
+	child.addBlock(SplitBlock("split"))
+	child.addConnection("IN1", "int")
+	child.addConnection("zero", "int", input_port_name="IC")
+	child.addConnection("int", "split")
+	child.addConnection("split", "der", output_port_name="OUT1")
+	child.addConnection("zero", "der", input_port_name="IC")
+	child.addConnection("split", "OUT1", output_port_name="OUT2")
+	child.addConnection("der", "OUT2")
+
+	model = CBD("model", [], ["y", "d", "clamped", "logic", "mux", "wave", "mod", "rel"])
+	model.addBlock(child)
+	model.addBlock(ConstantBlock("c", 0.5))
+	model.addBlock(ConstantBlock("one", 1.0))
+	model.addBlock(GainBlock("gain", 1.5))
+	model.addBlock(TimeBlock("time"))
+	model.addBlock(ClampBlock("clamp", -1.0, 1.0))
+	model.addBlock(LessThanBlock("lt"))
+	model.addBlock(EqualsBlock("eq"))
+	model.addBlock(NotBlock("not"))
+	model.addBlock(OrBlock("or"))
+	model.addBlock(MultiplexerBlock("select"))
+	model.addBlock(GenericBlock("sin", "sin"))
+	model.addBlock(InverterBlock("inv"))
+	model.addBlock(PowerBlock("pow"))
+	model.addBlock(MaxBlock("max"))
+	model.addBlock(ModuloBlock("modulo"))
+	model.addBlock(AddOneBlock("addOne"))
+	model.addBlock(DelayBlock("delay"))
+
+	model.addConnection("c", "gain")
+	model.addConnection("gain", "child")
+	model.addConnection("child", "y", output_port_name="OUT1")
+	model.addConnection("child", "d", output_port_name="OUT2")
+	model.addConnection("child", "clamp", output_port_name="OUT1")
+	model.addConnection("clamp", "clamped")
+	model.addConnection("child", "lt", output_port_name="OUT1", input_port_name="IN1")
+	model.addConnection("one", "lt", input_port_name="IN2")
+	model.addConnection("lt", "eq", input_port_name="IN1")
+	model.addConnection("one", "eq", input_port_name="IN2")
+	model.addConnection("eq", "not")
+	model.addConnection("not", "or")
+	model.addConnection("lt", "or")
+	model.addConnection("or", "logic")
+	model.addConnection("lt", "select", input_port_name="select")
+	model.addConnection("child", "select", output_port_name="OUT1", input_port_name="IN1")
+	model.addConnection("c", "select", input_port_name="IN2")
+	model.addConnection("select", "mux")
+	model.addConnection("time", "sin")
+	model.addConnection("sin", "max")
+	model.addConnection("c", "max")
+	model.addConnection("max", "inv")
+	model.addConnection("inv", "pow", input_port_name="IN1")
+	model.addConnection("c", "pow", input_port_name="IN2")
+	model.addConnection("pow", "wave")
+	model.addConnection("time", "addOne")
+	model.addConnection("addOne", "modulo", input_port_name="IN1")
+	model.addConnection("gain", "modulo", input_port_name="IN2")
+	model.addConnection("modulo", "delay")
+	model.addConnection("c", "delay", input_port_name="IC")
+	model.addConnection("delay", "mod")
+	model.addConnection("time", "rel", output_port_name="relative")
+	return model
+
+
+class CodeGenCBDTestCase(unittest.TestCase):
+	def _simulate(self, model, codegen, setup=None, backend="python"):
+		sim = Simulator(model)
+		sim.setDeltaT(0.1)
+		sim.setCodeGeneration(codegen, backend)
+		if setup is not None:
+			setup(sim)
+		sim.run(NUM_DISCR_TIME_STEPS * 0.1)
+		return model.getSignals()
+
+	def _compare(self, expected, actual):
+		self.assertEqual(set(expected.keys()), set(actual.keys()))
+		for port in expected:
+			self.assertEqual(NUM_DISCR_TIME_STEPS, len(actual[port]))
+			self.assertEqual(expected[port], actual[port])
+
+	def testMatchesInterpreted(self):
+		self._compare(self._simulate(createModel(), False), self._simulate(createModel(), True))
+
+	def testMultiplexer(self):
+		def createMultiplexer(zero, select):
+			model = CBD("model", [], ["OUT1"])
+			model.addBlock(ConstantBlock("select", select))
+			model.addBlock(ConstantBlock("a", 1.0))
+			model.addBlock(ConstantBlock("b", 2.0))
+			model.addBlock(MultiplexerBlock("mux", 2, zero))
+			model.addConnection("select", "mux", input_port_name="select")
+			model.addConnection("a", "mux", input_port_name="IN1")
+			model.addConnection("b", "mux", input_port_name="IN2")
+			model.addConnection("mux", "OUT1")
+			return model
+
+		for zero, select in [(True, 0), (True, 1), (False, 1), (False, 2)]:
+			self._compare(self._simulate(createMultiplexer(zero, select), False),
+			              self._simulate(createMultiplexer(zero, select), True))
+		for zero, select in [(True, -1), (True, 2), (False, 0), (False, 3)]:
+			self.assertRaises(IndexError, self._simulate, createMultiplexer(zero, select), False)
+			self.assertRaises(IndexError, self._simulate, createMultiplexer(zero, select), True)
+
+	def testHistories(self):
+		model = createModel()
+		self._simulate(model, True)
+		self.assertEqual(0, len(model.find("gain")[0].getSignalHistory()))
+		self.assertEqual(NUM_DISCR_TIME_STEPS, len(model.getClock().getSignalHistory("time")))
+
+	def testGenerate(self):
+		model = CBD("model", [], ["OUT1"])
+		model.addBlock(ConstantBlock("c", 2.0))
+		model.addBlock(GainBlock("g", 3.0))
+		model.addBlock(DelayBlock("d"))
+		model.addConnection("c", "g")
+		model.addConnection("g", "d")
+		model.addConnection("c", "d", input_port_name="IC")
+		model.addConnection("d", "OUT1")
+		model.addFixedRateClock("clock", 1.0)
+
+		gen = CBD2Python(model)
+		source, _ = gen.generate(initial=True)
+		self.assertTrue(source.startswith("def step(i):"))
+		self.assertIn("# model.g", source)
+		self.assertIn("S[0] = ", source)
+		self.assertEqual([None], gen.state)
+
+		step = gen.compile(initial=True)
+		step(0)
+		self.assertEqual([6.0], gen.state)
+		self.assertEqual([Signal(0.0, 2.0)], model.getSignalHistory("OUT1"))
+
+	def testUnsupported(self):
+		model = CBD("model", [], ["OUT1"])
+		model.addBlock(AdderBlock("sum"))
+		model.addBlock(ConstantBlock("c", 1.0))
+		model.addConnection("c", "sum")
+		model.addConnection("sum", "sum")
+		model.addConnection("sum", "OUT1")
+		self.assertRaises(NotImplementedError, self._simulate, model, True)
+
+		sim = Simulator(createModel())
+		sim.setCodeGeneration()
+		sim.registerStateEvent(StateEvent("y", level=1.0))
+		self.assertRaises(NotImplementedError, sim.run, 1.0)
+
+	@unittest.skipUnless(_NUMPY_FOUND, "NumPy is not installed")
+	def testODESolver(self):
+		def createODEModel():
+			model = CBD("model", [], ["x"])
+			model.addBlock(IntegratorBlock("int"))
+			model.addBlock(TimeBlock("time"))
+			model.addBlock(GenericBlock("cos", "cos"))
+			model.addBlock(ConstantBlock("zero", 0.0))
+			model.addConnection("time", "cos")
+			model.addConnection("cos", "int")
+			model.addConnection("zero", "int", input_port_name="IC")
+			model.addConnection("int", "x")
+			return model
+
+		setup = lambda sim: sim.setODESolver(RungeKuttaSolver(atol=1e-6))
+		expected = self._simulate(createODEModel(), False, setup)
+		self.assertEqual(expected, self._simulate(createODEModel(), True, setup))
+
+
+@unittest.skipUnless(_COMPILER_FOUND, "No C compiler found")
+class CodeGenCCBDTestCase(CodeGenCBDTestCase):
+	def setUp(self):
+		# Keep the compiled libraries out of the cache of the user
+		self.cache = tempfile.mkdtemp()
+		self.environ = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": self.cache})
+		self.environ.start()
+
+	def tearDown(self):
+		self.environ.stop()
+		shutil.rmtree(self.cache)
+
+	def _simulate(self, model, codegen, setup=None, backend="c"):
+		return CodeGenCBDTestCase._simulate(self, model, codegen, setup, backend)
+
+	def testGenerate(self):
+		model = CBD("model", [], ["OUT1"])
+		model.addBlock(ConstantBlock("c", 2.0))
+		model.addBlock(GainBlock("g", 3.0))
+		model.addBlock(DelayBlock("d"))
+		model.addConnection("c", "g")
+		model.addConnection("g", "d")
+		model.addConnection("c", "d", input_port_name="IC")
+		model.addConnection("d", "OUT1")
+		model.addFixedRateClock("clock", 1.0)
+
+		gen = CBD2C(model)
+		source, driver, _ = gen.generate(initial=True)
+		self.assertIn("int step_0(double *V, double *S)", source)
+		self.assertIn("/* model.g */", source)
+		self.assertIn("S[0] = ", source)
+		self.assertTrue(driver.startswith("def step(i):"))
+
+		step = gen.compile(initial=True)
+		step(0)
+		self.assertEqual([6.0], list(gen.state))
+		self.assertEqual([Signal(0.0, 2.0)], model.getSignalHistory("OUT1"))
+
+	def testUnsupported(self):
+		# The interpreter computes the blocks and plans that cannot be compiled
+		def createLoop():
+			model = CBD("model", [], ["OUT1", "OUT2"])
+			model.addBlock(AdderBlock("sum"))
+			model.addBlock(ProductBlock("half"))
+			model.addBlock(ConstantBlock("c", 3.0))
+			model.addBlock(ConstantBlock("k", -0.5))
+			model.addConnection("c", "sum")
+			model.addConnection("half", "sum")
+			model.addConnection("sum", "half")
+			model.addConnection("k", "half")
+			model.addConnection("sum", "OUT1")
+			model.addBlock(SequenceBlock("seq", [1.0, 2.0, 3.0]))
+			model.addBlock(GainBlock("g", 2.0))
+			model.addConnection("seq", "g")
+			model.addConnection("g", "OUT2")
+			return model
+		expected = CodeGenCBDTestCase._simulate(self, createLoop(), False)
+		self._compare(expected, self._simulate(createLoop(), True))
+
+		def createSequence():
+			model = createModel()
+			model.addBlock(SequenceBlock("seq", [0.0, 1.0]))
+			model.addBlock(GainBlock("g", 2.0))
+			model.addBlock(GenericBlock("f", "degrees"))
+			model.addConnection("seq", "g")
+			model.addConnection("g", "f")
+			model.addOutputPort("seq")
+			model.addConnection("f", "seq")
+			return model
+		expected = CodeGenCBDTestCase._simulate(self, createSequence(), False)
+		self._compare(expected, self._simulate(createSequence(), True))
+
+		sim = Simulator(createModel())
+		sim.setCodeGeneration(backend="c")
+		sim.registerStateEvent(StateEvent("y", level=1.0))
+		self.assertRaises(NotImplementedError, sim.run, 1.0)
+
+	def testErrors(self):
+		model = CBD("model", [], ["OUT1"])
+		model.addBlock(ConstantBlock("zero", 0.0))
+		model.addBlock(InverterBlock("inv"))
+		model.addConnection("zero", "inv")
+		model.addConnection("inv", "OUT1")
+		self.assertRaises(ZeroDivisionError, self._simulate, model, True)
+
+		model = CBD("model", [], ["OUT1"])
+		model.addBlock(ConstantBlock("c", -1.0))
+		model.addBlock(GenericBlock("sqrt", "sqrt"))
+		model.addConnection("c", "sqrt")
+		model.addConnection("sqrt", "OUT1")
+		self.assertRaises(ValueError, self._simulate, model, True)
+
+	def testCache(self):
+		def createChain():
+			model = CBD("model", [], ["OUT1"])
+			model.addBlock(ConstantBlock("c", 1.0))
+			model.addBlock(GainBlock("g", 7.25))
+			model.addConnection("c", "g")
+			model.addConnection("g", "OUT1")
+			model.addFixedRateClock("clock", 1.0)
+			return model
+
+		cache = tempfile.mkdtemp()
+		try:
+			first = CBD2C(createChain(), cache=cache)
+			source, _, _ = first.generate()
+			library = first.load(source)
+			second = CBD2C(createChain(), cache=cache)
+			self.assertEqual(source, second.generate()[0])
+			self.assertIs(library, second.load(source))
+			self.assertEqual(1, len([f for f in os.listdir(cache) if f.endswith(".so")]))
+
+			# The values of constants are not part of the source
+			model = createChain()
+			model.getBlockByName("c").setValue(5.0)
+			self.assertEqual(source, CBD2C(model, cache=cache).generate()[0])
+			self.assertRaises(RuntimeError, CBD2C(model, cache=cache).load, "invalid C code")
+		finally:
+			shutil.rmtree(cache)
+
+
+class CodeGenCFallbackTestCase(unittest.TestCase):
+	def setUp(self):
+		self.cache = tempfile.mkdtemp()
+
+	def tearDown(self):
+		shutil.rmtree(self.cache)
+
+	def testMissingCompiler(self):
+		expected = CodeGenCBDTestCase._simulate(self, createModel(), False)
+		with mock.patch.dict(os.environ, {"CC": os.path.join(self.cache, "missing-cc"), "XDG_CACHE_HOME": self.cache}), \
+				mock.patch.dict(pyCBD.converters.CBD2C._LIBRARIES, clear=True), \
+				self.assertLogs("CBD", "WARNING") as logs:
+			actual = CodeGenCBDTestCase._simulate(self, createModel(), True, backend="c")
+		self.assertEqual(expected, actual)
+		# Only reported once, even though there are multiple plans
+		self.assertEqual(1, len(logs.records))
+
+	@unittest.skipUnless(hasattr(os, "getuid"), "No file ownership")
+	def testUnsafeCache(self):
+		source = "int step_0(double *V, double *S) { return 0; }"
+		gen = CBD2C(createModel(), cache=self.cache)
+		os.chmod(self.cache, 0o777)
+		self.assertRaises(RuntimeError, gen.load, source)
+
+		# A library that was planted in the cache
+		os.chmod(self.cache, 0o700)
+		path = os.path.join(self.cache, "cbd_%s.so" % hashlib.sha256(source.encode("utf-8")).hexdigest())
+		with open(path, 'w') as file:
+			file.write("planted")
+		os.chmod(path, 0o666)
+		self.assertRaises(RuntimeError, gen.load, source)
+
+
+if __name__ == '__main__':  # pragma: no cover
+	# When this module is executed from the command-line, run all its tests
+	unittest.main(verbosity=2)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+"""
+Unit tests for the ensemble simulation.
+"""
+
+import unittest
+
+from pyCBD.Core import *
+from pyCBD.lib.std import *
+from pyCBD.simulator import Simulator
+
+_NUMPY_FOUND = True
+try:
+	from pyCBD.ensemble import EnsembleSimulator
+except ImportError:
+	_NUMPY_FOUND = False
+
+NUM_DISCR_TIME_STEPS = 20
+GAINS = [-1.5, -0.5, 0.0, 0.25, 1.0, 2.0]
+
+
+def createModel(gain=1.0):
+	model = CBD("model", [], ["y", "clamped", "cmp", "logic", "mux", "wave", "extremes"])
+	model.addBlock(ConstantBlock("gain", gain))
+	model.addBlock(ConstantBlock("zero", 0.0))
+	model.addBlock(ConstantBlock("one", 1.0))
+	model.addBlock(ConstantBlock("c", 0.5))
+	model.addBlock(IntegratorBlock("int"))
+	model.addBlock(ClampBlock("clamp", -1.0, 1.0))
+	model.addBlock(LessThanBlock("lt"))
+	model.addBlock(NotBlock("not"))
+	model.addBlock(AndBlock("and"))
+	model.addBlock(MultiplexerBlock("select"))
+	model.addBlock(GenericBlock("sin", "sin"))
+	model.addBlock(ProductBlock("p"))
+	model.addBlock(MaxBlock("max"))
+	model.addBlock(ModuloBlock("mod"))
+
+	model.addConnection("gain", "int")
+	model.addConnection("zero", "int", input_port_name="IC")
+	model.addConnection("int", "y")
+	model.addConnection("int", "clamp")
+	model.addConnection("clamp", "clamped")
+	model.addConnection("int", "lt", input_port_name="IN1")
+	model.addConnection("c", "lt", input_port_name="IN2")
+	model.addConnection("lt", "cmp")
+	model.addConnection("lt", "not")
+	model.addConnection("not", "and")
+	model.addConnection("one", "and")
+	model.addConnection("and", "logic")
+	model.addConnection("lt", "select", input_port_name="select")
+	model.addConnection("int", "select", input_port_name="IN1")
+	model.addConnection("c", "select", input_port_name="IN2")
+	model.addConnection("select", "mux")
+	model.addConnection("int", "sin")
+	model.addConnection("sin", "p")
+	model.addConnection("gain", "p")
+	model.addConnection("p", "wave")
+	model.addConnection("int", "mod", input_port_name="IN1")
+	model.addConnection("one", "mod", input_port_name="IN2")
+	model.addConnection("mod", "max")
+	model.addConnection("c", "max")
+	model.addConnection("max", "extremes")
+	return model
+
+
+@unittest.skipUnless(_NUMPY_FOUND, "NumPy is not installed")
+class EnsembleCBDTestCase(unittest.TestCase):
+	def testMembersMatchScalarSimulations(self):
+		model = createModel()
+		sim = EnsembleSimulator(model, len(GAINS))
+		sim.setDeltaT(0.1)
+		sim.setParameter("gain", GAINS)
+		sim.run(NUM_DISCR_TIME_STEPS * 0.1)
+
+		for member, gain in enumerate(GAINS):
+			reference = createModel(gain)
+			rsim = Simulator(reference)
+			rsim.setDeltaT(0.1)
+			rsim.run(NUM_DISCR_TIME_STEPS * 0.1)
+
+			expected = reference.getSignals()
+			actual = sim.getMemberSignals(member)
+			self.assertEqual(set(expected.keys()), set(actual.keys()))
+			for port in expected:
+				self.assertEqual(len(expected[port]), len(actual[port]))
+				for e, a in zip(expected[port], actual[port]):
+					self.assertAlmostEqual(e.time, a.time)
+					self.assertAlmostEqual(e.value, a.value)
+
+	def testEnsembleSignalHistory(self):
+		model = createModel()
+		sim = EnsembleSimulator(model, len(GAINS))
+		sim.setParameter("gain", GAINS)
+		sim.run(3)
+		times, values = sim.getEnsembleSignalHistory("", "y")
+		self.assertEqual([0.0, 1.0, 2.0], times.tolist())
+		self.assertEqual((3, len(GAINS)), values.shape)
+		self.assertEqual([2 * g for g in GAINS], values[2].tolist())
+
+	def testInvalidParameters(self):
+		sim = EnsembleSimulator(createModel(), 3)
+		self.assertRaises(ValueError, sim.setParameter, "gain", [1.0, 2.0])
+		self.assertRaises(TypeError, sim.setParameter, "int", [1.0, 2.0, 3.0])
+		self.assertRaises(NotImplementedError, sim.registerStateEvent, None)
+
+
+if __name__ == '__main__':  # pragma: no cover
+	# When this module is executed from the command-line, run all its tests
+	unittest.main(verbosity=2)
@@ -5,6 +5,7 @@
 import unittest
 from pyCBD.Core import *
 from pyCBD.lib.std import *
+from pyCBD.lib.std import GainBlock
 from pyCBD.simulator import Simulator
 
 class FlattenCBDTest(unittest.TestCase):
@@ -196,6 +197,105 @@ class FlattenCBDTest(unittest.TestCase):
 		self.assertEqual(self._getSignal("first_child.a"), [-12.0]*5)
 		self.assertEqual(self._getSignal("a2"), [0.0]*5)
 
+	def _createHierarchy(self, submodels, width):
+		self.CBD.addOutputPort("OUT1")
+		self.CBD.addBlock(ConstantBlock(block_name="c", value=2.0))
+		prev = "c"
+		for k in range(submodels):
+			child = CBD("child%d" % k, input_ports=["IN1"], output_ports=["OUT1", "pass"])
+			inner = "IN1"
+			for i in range(width):
+				child.addBlock(GainBlock("g%d" % i, 1.0 + (i % 2)))
+				child.addConnection(inner, "g%d" % i)
+				inner = "g%d" % i
+			child.addConnection(inner, "OUT1")
+			child.addConnection("IN1", "pass")
+			self.CBD.addBlock(child)
+			self.CBD.addConnection(prev, child.getBlockName())
+			prev = child.getBlockName()
+		self.CBD.addConnection(prev, "OUT1")
+
+	def testClone(self):
+		self._createHierarchy(3, 4)
+		self.CBD.getBlockByName("child1").addBlock(AddOneBlock("inner"))
+		self.CBD.getBlockByName("child1").addConnection("g3", "inner")
+		clone = self.CBD.clone()
+
+		originals = set()
+		for block in self.CBD.getBlocks():
+			originals.add(block)
+			if isinstance(block, CBD):
+				originals.update(block.getBlocks())
+		for block in clone.getBlocks():
+			self.assertNotIn(block, originals)
+			self.assertIs(clone, block._parent)
+			for port in block.getInputPorts() + block.getOutputPorts():
+				self.assertIs(block, port.block)
+				if port.getIncoming() is not None:
+					self.assertNotIn(port.getIncoming().source.block, originals)
+		self.assertEqual([b.getBlockName() for b in self.CBD.getBlocks()],
+		                 [b.getBlockName() for b in clone.getBlocks()])
+		self.assertIs(clone.getBlockByName("child0"),
+		              clone.getBlockByName("child1").getInputPortByName("IN1").getIncoming().source.block)
+		self.assertEqual(2, len(clone.getBlockByName("child1").getBlockByName("g3").getOutputPortByName("OUT1").getOutgoing()))
+
+		self._run(3)
+		sim = Simulator(clone)
+		sim.setDeltaT(1)
+		sim.run(3)
+		self.assertEqual(self._getSignal(""), [x.value for x in clone.getSignalHistory("OUT1")])
+		self.assertEqual([128.0] * 3, [x.value for x in clone.getSignalHistory("OUT1")])
+
+	def testCloneAfterRun(self):
+		class Value:
+			copies = 0
+
+			def __deepcopy__(self, memo):
+				Value.copies += 1
+				return self
+
+		value = Value()
+		self.CBD.addOutputPort("OUT1")
+		self.CBD.addBlock(ConstantBlock(block_name="c", value=value))
+		self.CBD.addBlock(ConstantBlock(block_name="ic", value=value))
+		prev = "c"
+		for i in range(10):
+			self.CBD.addBlock(DelayBlock(block_name="d%d" % i))
+			self.CBD.addConnection(prev, "d%d" % i)
+			self.CBD.addConnection("ic", "d%d" % i, input_port_name="IC")
+			prev = "d%d" % i
+		self.CBD.addConnection(prev, "OUT1")
+		self.CBD.getBlockByName("d9").setHistoryLimit(5)
+
+		copies = []
+		for steps in [1, 50]:
+			self._run(steps)
+			Value.copies = 0
+			clone = self.CBD.clone()
+			copies.append(Value.copies)
+			for block in clone.getBlocks():
+				for port in block.getInputPorts() + block.getOutputPorts():
+					self.assertEqual(0, len(port.getHistory()))
+			self.assertEqual(5, clone.getBlockByName("d9").getOutputPortByName("OUT1").getHistoryLimit())
+		# Only the values of the constants are copied, none of the signals
+		self.assertEqual([2, 2], copies)
+		self.assertEqual(51, len(self.CBD.getSignalHistory("OUT1")))
+
+	def testFlattenedLarge(self):
+		self._createHierarchy(20, 100)
+		flat = self.CBD.flattened()
+		self.assertEqual(1 + 20 * 100, len(flat.getBlocks()))
+		self.assertEqual(21, len(self.CBD.getBlocks()))
+		self.assertTrue(flat.hasBlock("child19.g99"))
+		self.assertEqual("child0", self.CBD.getUniqueBlockName("child0", hash=False)[:6])
+		self.assertEqual("c1", self.CBD.getUniqueBlockName("c"))
+
+		sim = Simulator(flat)
+		sim.setDeltaT(1)
+		sim.run(2)
+		self.assertEqual([2.0 ** 1001] * 2, [x.value for x in flat.getSignalHistory("OUT1")])
+
+
 if __name__ == '__main__':  # pragma: no cover
 	# When this module is executed from the command-line, run all its tests
     unittest.main()
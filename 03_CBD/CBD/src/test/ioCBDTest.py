@@ -5,6 +5,8 @@
 import unittest
 
 import os
+import shutil
+import tempfile
 from pyCBD.Core import *
 from pyCBD.lib.io import *
 from pyCBD.simulator import Simulator
@@ -38,6 +40,39 @@ class IOCBDTestCase(unittest.TestCase):
 		self.assertEqual([10.0, 6.0, 2.0, 1.0, 0.0, -1.0, -2.0, -1.0, 0.0, 5.0, -5.0, 17.0] * 4,
 		                 self._getSignal("seq", "y"))
 
+	def testCSVReaderJumps(self):
+		self.CBD.addBlock(ReadCSV("seq", self.file, Interpolation.LINEAR, repeat=True))
+		self._run(12 * 4)
+		expected = self._getSignal("seq", "y")
+		# Rewinding and jumping through time must not depend on the previous record
+		block = self.CBD.getBlockByName("seq")
+		for i in [47, 3, 30, 0, 12, 11, 25]:
+			block.index = (i * 7) % 30 - 1
+			block._rewind()
+			block.compute(i)
+			self.assertEqual(expected[i], block.getSignalHistory("y")[-1].value)
+
+	def testCSVReaderCache(self):
+		directory = tempfile.mkdtemp()
+		try:
+			cache = os.path.join(directory, "test.bin")
+			self.CBD.addBlock(ReadCSV("seq", self.file, Interpolation.LINEAR, repeat=True, cache=cache))
+			self.CBD.addBlock(ReadCSV("mem", self.file, Interpolation.LINEAR, repeat=True))
+			self.assertTrue(os.path.isfile(cache))
+			self.assertEqual(list(self.CBD.getBlockByName("mem").data["y"]),
+			                 list(self.CBD.getBlockByName("seq").data["y"]))
+			self._run(12 * 4)
+			self.assertEqual(self._getSignal("mem", "y"), self._getSignal("seq", "y"))
+
+			# The cache is reused and shared by clones
+			modified = os.path.getmtime(cache)
+			block = ReadCSV("other", self.file, cache=cache)
+			self.assertEqual(modified, os.path.getmtime(cache))
+			self.assertIs(block.data, block.clone().data)
+			self.assertRaises(ValueError, ReadCSV, "str", self.file, columns={"y": str}, cache=cache)
+		finally:
+			shutil.rmtree(directory)
+
 if __name__ == '__main__':  # pragma: no cover
 	# When this module is executed from the command-line, run all its tests
 	unittest.main(verbosity=2)
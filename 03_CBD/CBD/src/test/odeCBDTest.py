@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""
+Unit tests for the native ODE solver.
+"""
+
+import math
+import unittest
+
+from pyCBD.Core import *
+from pyCBD.lib.std import *
+from pyCBD.simulator import Simulator
+from pyCBD.state_events import StateEvent
+from pyCBD.preprocessing.butcher import ButcherTableau
+from pyCBD.preprocessing.rungekutta import RKPreprocessor
+
+_NUMPY_FOUND = True
+try:
+	from pyCBD.ode import RungeKuttaSolver
+except ImportError:
+	_NUMPY_FOUND = False
+
+
+def createGrowthModel(delta_t):
+	"""
+	v' = 0.15 * (5 + v), v(0) = 0; x' = v, x(0) = 0
+	"""
+	model = CBD("growth", [], ["v", "x"])
+	model.addBlock(ConstantBlock("zero", 0.0))
+	model.addBlock(ConstantBlock("k", 0.15))
+	model.addBlock(ConstantBlock("five", 5.0))
+	model.addBlock(AdderBlock("sum"))
+	model.addBlock(ProductBlock("mult"))
+	model.addBlock(IntegratorBlock("Iv"))
+	model.addBlock(IntegratorBlock("Ix"))
+	model.addConnection("five", "sum")
+	model.addConnection("Iv", "sum")
+	model.addConnection("sum", "mult")
+	model.addConnection("k", "mult")
+	model.addConnection("mult", "Iv")
+	model.addConnection("Iv", "v")
+	model.addConnection("Iv", "Ix")
+	model.addConnection("Ix", "x")
+	model.addConnection("zero", "Iv", input_port_name="IC")
+	model.addConnection("zero", "Ix", input_port_name="IC")
+	model.addFixedRateClock("clock", delta_t)
+	return model
+
+
+def createSineModel():
+	"""
+	x' = cos(t), x(0) = 0 inside a child block; y = x * x
+	"""
+	child = CBD("child", [], ["OUT1"])
+	child.addBlock(TimeBlock("time"))
+	child.addBlock(GenericBlock("cos", "cos"))
+	child.addBlock(ConstantBlock("zero", 0.0))
+	child.addBlock(IntegratorBlock("int"))
+	child.addConnection("time", "cos")
+	child.addConnection("cos", "int")
+	child.addConnection("zero", "int", input_port_name="IC")
+	child.addConnection("int", "OUT1")
+
+	model = CBD("sine", [], ["x", "y"])
+	model.addBlock(child)
+	model.addBlock(ProductBlock("square"))
+	model.addConnection("child", "x")
+	model.addConnection("child", "square")
+	model.addConnection("child", "square")
+	model.addConnection("square", "y")
+	return model
+
+
+@unittest.skipUnless(_NUMPY_FOUND, "NumPy is not installed")
+class ODECBDTestCase(unittest.TestCase):
+	def _run(self, model, duration, solver):
+		sim = Simulator(model)
+		sim.setODESolver(solver)
+		sim.run(duration)
+		return sim
+
+	def testPreprocessorReference(self):
+		reference = RKPreprocessor(ButcherTableau.RK4(), hmin=0.05).preprocess(createGrowthModel(0.05))
+		Simulator(reference).run(5.0)
+		model = createGrowthModel(0.05)
+		self._run(model, 5.0, RungeKuttaSolver(ButcherTableau.RK4()))
+
+		expected = reference.getSignalHistory("v")
+		actual = model.getSignalHistory("v")
+		self.assertEqual(100, len(actual))
+		self.assertEqual(len(expected), len(actual))
+		for e, a in zip(expected, actual):
+			self.assertAlmostEqual(e.time, a.time)
+			self.assertAlmostEqual(e.value, a.value, 10)
+
+	def testAdaptive(self):
+		model = createGrowthModel(0.5)
+		solver = RungeKuttaSolver(ButcherTableau.DOPRI(), atol=1e-8)
+		self._run(model, 10.0, solver)
+
+		v = model.getSignalHistory("v")
+		x = model.getSignalHistory("x")
+		self.assertEqual(solver.accepted + 1, len(v))
+		self.assertLess(len(v), 100)
+		self.assertLess(v[-1].time, 10.0)
+		self.assertGreater(v[-1].time, 9.5)
+		deltas = model.getClock().getSignalHistory("delta_t")
+		for i in range(1, len(v)):
+			self.assertAlmostEqual(v[i].time - v[i - 1].time, deltas[i].value)
+			self.assertLessEqual(deltas[i].value, 0.5 + 1e-12)
+		for (t, a), (_, b) in zip(v, x):
+			self.assertAlmostEqual(5 * (math.exp(0.15 * t) - 1), a, 7)
+			self.assertAlmostEqual(5 / 0.15 * (math.exp(0.15 * t) - 1) - 5 * t, b, 7)
+
+	def testMaximalDeltaPerRun(self):
+		solver = RungeKuttaSolver(ButcherTableau.DOPRI(), atol=1e-8)
+		self._run(createGrowthModel(0.1), 10.0, solver)
+		model = createGrowthModel(0.5)
+		self._run(model, 10.0, solver)
+		# Without a configured maximum, the delta of the second run is the maximum
+		deltas = [s.value for s in model.getClock().getSignalHistory("delta_t")][1:]
+		self.assertGreater(max(deltas), 0.1 + 1e-6)
+		self.assertLessEqual(max(deltas), 0.5 + 1e-12)
+
+		solver = RungeKuttaSolver(ButcherTableau.DOPRI(), atol=1e-2, hmax=0.2)
+		model = createGrowthModel(0.5)
+		self._run(model, 10.0, solver)
+		deltas = [s.value for s in model.getClock().getSignalHistory("delta_t")]
+		self.assertLessEqual(max(deltas[1:]), 0.2 + 1e-12)
+
+	def testTimeAndOutputs(self):
+		model = createSineModel()
+		self._run(model, 5.0, RungeKuttaSolver(atol=1e-10))
+		x = model.getSignalHistory("x")
+		y = model.getSignalHistory("y")
+		self.assertEqual(len(x), len(y))
+		for (t, a), (_, b) in zip(x, y):
+			self.assertAlmostEqual(math.sin(t), a, 8)
+			self.assertAlmostEqual(a * a, b)
+
+	def testUnsupported(self):
+		model = createGrowthModel(0.1)
+		model.removeConnection("Iv", "IN1")
+		model.addBlock(DelayBlock("delay"))
+		model.addConnection("mult", "delay")
+		model.addConnection("zero", "delay", input_port_name="IC")
+		model.addConnection("delay", "Iv")
+		self.assertRaises(RuntimeError, self._run, model, 1.0, RungeKuttaSolver())
+
+		sim = Simulator(createGrowthModel(0.1))
+		sim.setODESolver(RungeKuttaSolver())
+		sim.registerStateEvent(StateEvent("v", level=1.0))
+		self.assertRaises(NotImplementedError, sim.run, 1.0)
+
+
+if __name__ == '__main__':  # pragma: no cover
+	# When this module is executed from the command-line, run all its tests
+	unittest.main(verbosity=2)
@@ -2,11 +2,39 @@
 #
 # Unit tests for all the basic CBD blocks, discrete-time CBD.
 
+import os
+import tempfile
 import unittest
+from unittest import mock
 
+import pyCBD.simulator
 from pyCBD.Core import *
 from pyCBD.lib.std import *
 from pyCBD.simulator import Simulator
+from pyCBD.scheduling import TopologicalScheduler
+from pyCBD.tracers import Tracers, TraceLevel
+from pyCBD.tracers.baseTracer import BaseTracer
+
+_NUMPY_FOUND = True
+try:
+	from pyCBD.tracers.tracerNPZ import NPZTracer, NPZTraceReader
+except ImportError:
+	_NUMPY_FOUND = False
+
+
+class CountingTracer(BaseTracer):
+	def __init__(self):
+		BaseTracer.__init__(self)
+		self.computes = 0
+		self.iterations = 0
+		self.ended = False
+
+	def openFile(self, recover=False): pass
+	def closeFile(self): pass
+	def traceCompute(self, curIt, block): self.computes += 1
+	def traceEndNewIteration(self, curIt, time): self.iterations += 1
+	def traceEndSimulation(self, stime): self.ended = True
+
 
 class OtherCBDTestCase(unittest.TestCase):
 	def setUp(self):
@@ -23,6 +51,15 @@ class OtherCBDTestCase(unittest.TestCase):
 		signal =  block.getSignalHistory(name_output = output_port)
 		return [x.value for x in signal]
 
+	def _addCountedBlocks(self):
+		child = CBD("child", ["IN1"], ["OUT1"])
+		child.addBlock(NegatorBlock("n"))
+		child.addConnection("IN1", "n")
+		child.addConnection("n", "OUT1")
+		self.CBD.addBlock(ConstantBlock("c", 1.0))
+		self.CBD.addBlock(child)
+		self.CBD.addConnection("c", "child")
+
 	def testMultiRate(self):
 		self.CBD.addBlock(TimeBlock("time"))
 		self.CBD.addBlock(ConstantBlock("two", 2.0))
@@ -37,6 +74,314 @@ class OtherCBDTestCase(unittest.TestCase):
 
 		self.assertEqual([0.0, 4.0, 8.0, 12.0, 16.0], self._getSignal("mult"))
 
+	def testMultiRateTable(self):
+		self.CBD.addBlock(TimeBlock("time"))
+		self.CBD.addBlock(NegatorBlock("slow"))
+		self.CBD.addBlock(NegatorBlock("slower"))
+		self.CBD.addConnection("time", "slow")
+		self.CBD.addConnection("time", "slower")
+
+		self.sim.setBlockRate(self.CBD.getBlockByName("slow").getPath(), 0.2)
+		self.sim.setBlockRate(self.CBD.getBlockByName("slower").getPath(), 0.3)
+
+		self._run(13, 0.1)
+
+		self.assertEqual([-0.0, -0.2, -0.4, -0.6, -0.8, -1.0, -1.2], [round(x, 6) for x in self._getSignal("slow")])
+		self.assertEqual([-0.0, -0.3, -0.6, -0.9, -1.2], [round(x, 6) for x in self._getSignal("slower")])
+		table = TopologicalScheduler().getFiringTable({None, 0.2, 0.3}, 0.1)
+		self.assertEqual(6, len(table.table))
+		self.assertEqual({None, 0.2, 0.3}, table.get(1.2))
+		self.assertEqual({None}, table.get(0.7))
+		self.assertIsNone(table.get(0.75))
+		self.assertIsNone(TopologicalScheduler().getFiringTable({0.25}, 0.1))
+
+	def testMultiRateAlignment(self):
+		self.CBD.addBlock(TimeBlock("time"))
+		self.CBD.addBlock(NegatorBlock("slow"))
+		self.CBD.addConnection("time", "slow")
+
+		self.sim.setBlockRate(self.CBD.getBlockByName("slow").getPath(), 2.5)
+		self.sim.setRateAlignment()
+
+		self._run(10)
+
+		self.assertEqual([0.0, 1.0, 2.0, 2.5, 3.5, 4.5, 5.0, 6.0, 7.0, 7.5, 8.5],
+		                 [x.value for x in self.CBD.getClock().getSignalHistory("time")])
+		self.assertEqual([-0.0, -2.5, -5.0, -7.5], self._getSignal("slow"))
+
+	def testParallel(self):
+		def createFleet(vehicles):
+			model = CBD("fleet", [], ["v%d" % i for i in range(vehicles)])
+			for i in range(vehicles):
+				plant = CBD("plant%d" % i, [], ["OUT1"])
+				plant.addBlock(ConstantBlock("c", float(i)))
+				plant.addBlock(AdderBlock("sum"))
+				plant.addBlock(ProductBlock("half"))
+				plant.addBlock(ConstantBlock("k", -0.5))
+				plant.addBlock(IntegratorBlock("int"))
+				plant.addBlock(GenericBlock("sin", "sin"))
+				plant.addConnection("c", "sum")
+				plant.addConnection("half", "sum")
+				plant.addConnection("sum", "half")
+				plant.addConnection("k", "half")
+				plant.addConnection("sum", "int")
+				plant.addConnection("c", "int", input_port_name="IC")
+				plant.addConnection("int", "sin")
+				plant.addConnection("sin", "OUT1")
+				model.addBlock(plant)
+				model.addConnection("plant%d" % i, "v%d" % i)
+			return model
+
+		def simulate(workers):
+			model = createFleet(6)
+			sim = Simulator(model)
+			sim.setDeltaT(0.1)
+			sim.setBlockRate("fleet.plant0.sin", 0.5)
+			sim.setParallel(workers)
+			sim.run(5.0)
+			return model.getSignals()
+
+		expected = simulate(None)
+		self.assertEqual(50, len(expected["v5"]))
+		self.assertEqual(expected, simulate(3))
+		self.assertEqual(expected, simulate(16))
+
+	def testTimings(self):
+		self.CBD.addBlock(ConstantBlock("c", 1.0))
+		self.CBD.addBlock(NegatorBlock("n"))
+		self.CBD.addConnection("c", "n")
+		self._run(5)
+
+		timings = self.sim.getTimings()
+		self.assertEqual({"depgraph", "schedule", "plan", "compute"}, set(timings.keys()))
+		for phase in timings:
+			self.assertGreater(timings[phase], 0.0)
+
+	def testHistoryLimit(self):
+		self.CBD.addBlock(ConstantBlock("one", 1.0))
+		self.CBD.addBlock(ConstantBlock("zero", 0.0))
+		self.CBD.addBlock(IntegratorBlock("int"))
+		self.CBD.addBlock(DerivatorBlock("der"))
+		self.CBD.addConnection("one", "int")
+		self.CBD.addConnection("zero", "int", input_port_name="IC")
+		self.CBD.addConnection("int", "der")
+		self.CBD.addConnection("zero", "der", input_port_name="IC")
+
+		dropped = []
+		self.CBD.setHistoryLimit(3, lambda port, signal: dropped.append((port.name, signal)))
+		self._run(10)
+
+		self.assertEqual(3, self.CBD.getBlockByName("int").getOutputPortByName("OUT1").getHistoryLimit())
+		self.assertEqual(3, self.CBD.getClock().getOutputPortByName("time").getHistoryLimit())
+		self.assertEqual([7.0, 8.0, 9.0], self._getSignal("int"))
+		self.assertEqual([1.0, 1.0, 1.0], self._getSignal("der"))
+		self.assertEqual(10, len(self.CBD.getBlockByName("int").getSignalHistory()))
+		self.assertIn(("OUT1", Signal(0.0, 0.0)), dropped)
+		with self.assertRaises(IndexError):
+			_ = self.CBD.getBlockByName("int").getSignalHistory()[0]
+
+	def testHistoryLimitRewind(self):
+		port = Port("OUT1", Port.Direction.OUT, None)
+		port.setHistoryLimit(2)
+		for i in range(5):
+			port.set(Signal(float(i), i))
+		port._rewind()
+		self.assertEqual(4, port.count())
+		self.assertEqual(3, port.get().value)
+		port.set(Signal(4.0, 40))
+		self.assertEqual([3, 40], [x.value for x in port.getHistory()])
+
+	def testStructureVersion(self):
+		child = CBD("child", ["IN1"], ["OUT1"])
+		child.addBlock(NegatorBlock("neg"))
+		self.CBD.addBlock(ConstantBlock("c", 1.0))
+		self.CBD.addBlock(child)
+
+		version = self.CBD.getStructureVersion()
+		child.addConnection("IN1", "neg")
+		child.addConnection("neg", "OUT1")
+		self.assertEqual(version + 2, self.CBD.getStructureVersion())
+
+		version = self.CBD.getStructureVersion()
+		self.CBD.addConnection("c", "child")
+		self.CBD.removeConnection("child", "IN1")
+		self.CBD.removeBlock(self.CBD.getBlockByName("c"))
+		self.assertEqual(version + 3, self.CBD.getStructureVersion())
+
+	def _addBouncingBall(self):
+		from pyCBD.state_events import StateEvent, Direction
+		self.CBD.addBlock(ConstantBlock("g", -9.81))
+		self.CBD.addBlock(ConstantBlock("v0", 0.0))
+		self.CBD.addBlock(ConstantBlock("y0", 10.0))
+		self.CBD.addBlock(IntegratorBlock("v"))
+		self.CBD.addBlock(IntegratorBlock("y"))
+		self.CBD.addOutputPort("height")
+		self.CBD.addConnection("g", "v")
+		self.CBD.addConnection("v", "y")
+		self.CBD.addConnection("v0", "v", input_port_name="IC")
+		self.CBD.addConnection("y0", "y", input_port_name="IC")
+		self.CBD.addConnection("y", "height")
+
+		bounces = []
+		def bounce(e, t, model):
+			bounces.append(t)
+			v = model.getBlockByName("v").getSignalHistory()[-1].value
+			model.getBlockByName("v0").setValue(-0.7 * v)
+			model.getBlockByName("y0").setValue(0.0)
+
+		self.sim.registerStateEvent(StateEvent("height", direction=Direction.FROM_ABOVE, event=bounce))
+		return bounces
+
+	def testScheduleReuseAfterStateEvent(self):
+		bounces = self._addBouncingBall()
+		with mock.patch.object(pyCBD.simulator, "createDepGraph", wraps=pyCBD.simulator.createDepGraph) as cdg:
+			self._run(100, 0.1)
+		self.assertGreater(len(bounces), 1)
+		self.assertEqual(2, cdg.call_count)
+
+	def testStateEventCone(self):
+		from pyCBD.lib.endpoints import SignalCollectorBlock
+		from pyCBD.state_events.locators import ITPStateEventLocator
+		bounces = self._addBouncingBall()
+		self.CBD.addBlock(NegatorBlock("side"))
+		self.CBD.addBlock(SignalCollectorBlock("plot"))
+		self.CBD.addConnection("v", "side")
+		self.CBD.addConnection("y", "plot")
+		stel = ITPStateEventLocator()
+		self.sim.setStateEventLocator(stel)
+
+		side = self.CBD.getBlockByName("side")
+		computes = [0, 0]
+		def compute(curIteration, compute=side.compute):
+			computes[0] += 1
+			compute(curIteration)
+		def step(do_single_step=self.sim._do_single_step):
+			computes[1] += 1
+			do_single_step()
+		side.compute = compute
+		self.sim._do_single_step = step
+		self._run(100, 0.1)
+
+		self.assertGreater(len(bounces), 1)
+		self.assertGreater(stel.evaluations, len(bounces))
+		# Only the cone of the height is computed to locate the crossing,
+		#   the remainder is computed once more at the crossing itself
+		self.assertEqual(computes[1] + len(bounces), computes[0])
+		data = self.CBD.getBlockByName("plot").data
+		self.assertEqual(computes[1], len(data))
+		self.assertGreater(min(y for _, y in data), -1e-3)
+
+	def testStateEventConeTraced(self):
+		bounces = self._addBouncingBall()
+		self.CBD.addBlock(NegatorBlock("side"))
+		self.CBD.addConnection("v", "side")
+		traced = {}
+		def traceCompute(curIt, block):
+			traced[block] = traced.get(block, 0) + 1
+		tracer = CountingTracer()
+		tracer.traceCompute = traceCompute
+		self.sim.setCustomTracer(tracer)
+		self._run(100, 0.1)
+
+		self.assertGreater(len(bounces), 1)
+		# The cone of the height is traced as well when the crossing is completed
+		counts = set(traced.values())
+		self.assertEqual(1, len(counts))
+		self.assertEqual(tracer.iterations + len(bounces), counts.pop())
+
+	def testWarmRestart(self):
+		cold = self._addBouncingBall()
+		self._run(100, 0.1)
+		self.assertGreater(len(cold), 1)
+
+		self.setUp()
+		warm = self._addBouncingBall()
+		self.sim.setWarmRestart()
+		with mock.patch.object(pyCBD.simulator, "createDepGraph", wraps=pyCBD.simulator.createDepGraph) as cdg:
+			self._run(100, 0.1)
+		self.assertEqual(2, cdg.call_count)
+		self.assertEqual(len(cold), len(warm))
+		for c, w in zip(cold, warm):
+			self.assertAlmostEqual(c, w)
+
+		# The history is kept, with the crossing and the restart at each bounce
+		height = self.CBD.getSignalHistory("height")
+		self.assertEqual(10.0, height[0].value)
+		for t in warm:
+			at = [s.value for s in height if abs(s.time - t) < 1e-9]
+			self.assertEqual(2, len(at))
+			self.assertAlmostEqual(0.0, at[0], 3)
+			self.assertEqual(0.0, at[1])
+
+	def testTraceBusBackpressure(self):
+		tracer = CountingTracer()
+		self._addCountedBlocks()
+		self.sim.setCustomTracer(tracer)
+		self.sim.setTraceBuffer(batch=2, limit=4)
+		self._run(50)
+		# c, child.n, the clock, its delta and the model itself
+		self.assertEqual(50 * 5, tracer.computes)
+		self.assertEqual(50, tracer.iterations)
+		self.assertTrue(tracer.ended)
+		self.assertEqual(0, len(self.sim._Simulator__tracer.bus))
+
+	def testNoTracers(self):
+		self._addCountedBlocks()
+		with mock.patch.object(Tracers, "trace") as trace:
+			self._run(10)
+		trace.assert_not_called()
+		self.assertEqual([-1.0] * 10, self._getSignal("child"))
+
+	def testTraceLevels(self):
+		self._addCountedBlocks()
+		tracer = CountingTracer()
+		self.sim.setCustomTracer(tracer)
+
+		self.sim.setTraceLevel(TraceLevel.STEP)
+		self._run(10)
+		self.assertEqual(10, tracer.computes)
+		self.assertEqual(10, tracer.iterations)
+
+		tracer.computes = 0
+		self.sim.setTraceLevel(TraceLevel.PATHS, ["child"])
+		self._run(10)
+		self.assertEqual(10 * 2, tracer.computes)
+
+		tracer.computes = 0
+		self.sim.setTraceLevel(TraceLevel.PATHS, ["c", "child.n"])
+		self._run(10)
+		self.assertEqual(10 * 3, tracer.computes)
+
+	@unittest.skipUnless(_NUMPY_FOUND, "NumPy is not installed")
+	def testNPZTracer(self):
+		for compress in [True, False]:
+			model = CBD("model", [], ["OUT1"])
+			model.addBlock(TimeBlock("time"))
+			model.addBlock(AdderBlock("double"))
+			model.addConnection("time", "double")
+			model.addConnection("time", "double")
+			model.addConnection("double", "OUT1")
+
+			with tempfile.TemporaryDirectory() as folder:
+				path = os.path.join(folder, "trace")
+				sim = Simulator(model)
+				sim.setCustomTracer(NPZTracer(filename=path, chunk_size=8, compress=compress))
+				sim.run(20)
+
+				reader = NPZTraceReader(path)
+				self.assertIn("OUT1", reader.getSignalNames())
+				self.assertEqual(20, len(reader))
+				self.assertEqual((0.0, 19.0), reader.getTimeRange())
+				data = reader.read()
+				self.assertEqual([float(x) for x in range(20)], data["time"].tolist())
+				self.assertEqual([2.0 * x for x in range(20)], data["OUT1"].tolist())
+
+				data = reader.read(["OUT1"], 6.5, 12.0)
+				self.assertEqual(["time", "OUT1"], list(data.keys()))
+				self.assertEqual([7.0, 8.0, 9.0, 10.0, 11.0, 12.0], data["time"].tolist())
+				self.assertEqual([14.0, 16.0, 18.0, 20.0, 22.0, 24.0], data["OUT1"].tolist())
+				self.assertEqual(0, len(reader.read(start=30.0)["OUT1"]))
+
 if __name__ == '__main__':  # pragma: no cover
 	# When this module is executed from the command-line, run all its tests
 	unittest.main(verbosity=2)
@@ -2,12 +2,13 @@
 #
 # Unit tests for the sorting of a CBD.
 
+import sys
 import unittest
 from pyCBD.Core import *
 from pyCBD.lib.std import *
 from pyCBD.depGraph import createDepGraph
 from pyCBD.simulator import Simulator
-from pyCBD.scheduling import TopologicalScheduler
+from pyCBD.scheduling import TopologicalScheduler, ExecutionPlan
 
 class SortedGraphCBDTest(unittest.TestCase):
 	def setUp(self):
@@ -161,6 +162,84 @@ class SortedGraphCBDTest(unittest.TestCase):
 		self.scheduler.recompte_at = [0, 4]
 		self.testSortedGraph()
 
+	def testTarjan(self):
+		# 0 <- 1 <-> 2 <- 3, 4 <- 4 (the arrows point to the influencers)
+		components = TopologicalScheduler.tarjan([[], [0, 2], [1], [2], [4]])
+		self.assertEqual([[0], [2, 1], [3], [4]], components)
+
+	def testTopoSort(self):
+		class ReversedScheduler(TopologicalScheduler):
+			def schedule(self, depGraph, curIt, time):
+				return [[obj] for obj in reversed(self.topoSort(depGraph.getSemanticMapping(), depGraph))]
+
+		self.CBD.addBlock(ConstantBlock("c", 1.0))
+		self.CBD.addBlock(NegatorBlock("n1"))
+		self.CBD.addBlock(NegatorBlock("n2"))
+		self.CBD.addConnection("c", "n1")
+		self.CBD.addConnection("n1", "n2")
+		depGraph = createDepGraph(self.CBD, 1)
+
+		# The mapping is ignored
+		self.assertEqual(["c", "n1", "n2"], [b.getBlockName() for b in self.scheduler.topoSort(None, depGraph)])
+		sortedGraph = ReversedScheduler().obtain(depGraph, 1, 0.0)
+		self.assertEqual(["n2", "n1", "c"], [c[0].getBlockName() for c in sortedGraph])
+
+	def testDeepChain(self):
+		# Add the blocks in the reverse order of their dependencies
+		n = 5 * sys.getrecursionlimit()
+		for i in reversed(range(n)):
+			self.CBD.addBlock(NegatorBlock("n%d" % i))
+		self.CBD.addBlock(ConstantBlock("c", 1.0))
+		self.CBD.addConnection("c", "n0")
+		for i in range(1, n):
+			self.CBD.addConnection("n%d" % (i - 1), "n%d" % i)
+
+		depGraph = createDepGraph(self.CBD, 1)
+		sortedGraph = self.scheduler.obtain(depGraph, 1, 0.0)
+		self.assertEqual(["c"] + ["n%d" % i for i in range(n)], [c[0].getBlockName() for c in sortedGraph])
+
+	def testLevels(self):
+		self.CBD.addBlock(ConstantBlock("c1", 1.0))
+		self.CBD.addBlock(ConstantBlock("c2", 2.0))
+		self.CBD.addBlock(AdderBlock("sum"))
+		self.CBD.addBlock(NegatorBlock("n1"))
+		self.CBD.addBlock(NegatorBlock("n2"))
+		self.CBD.addBlock(DelayBlock("delay"))
+		self.CBD.addConnection("c1", "sum")
+		self.CBD.addConnection("c2", "sum")
+		self.CBD.addConnection("sum", "n1")
+		self.CBD.addConnection("c2", "n2")
+		self.CBD.addConnection("n1", "delay")
+		self.CBD.addConnection("c1", "delay", input_port_name="IC")
+
+		depGraph = createDepGraph(self.CBD, 1)
+		plan = ExecutionPlan(self.scheduler.schedule(depGraph, 1, 0.0), depGraph, self.scheduler)
+		levels = [{step[2].getBlockName() for step in level} for level in plan.getLevels()]
+		self.assertEqual([{"c1", "c2", "delay"}, {"sum", "n2"}, {"n1"}], levels)
+
+	def testPartitions(self):
+		for i in range(3):
+			self.CBD.addBlock(ConstantBlock("c%d" % i, 1.0))
+			self.CBD.addBlock(NegatorBlock("n%d" % i))
+			self.CBD.addConnection("c%d" % i, "n%d" % i)
+		self.CBD.addBlock(AdderBlock("sum"))
+		self.CBD.addConnection("n1", "sum")
+		self.CBD.addConnection("n2", "sum")
+		self.CBD.addFixedRateClock("clock", 1.0)
+
+		depGraph = createDepGraph(self.CBD, 1)
+		plan = ExecutionPlan(self.scheduler.schedule(depGraph, 1, 0.0), depGraph, self.scheduler)
+		prelude, partitions = plan.getPartitions(4)
+		self.assertEqual([self.CBD.getClock()], [step[2] for step in prelude])
+		groups = sorted(sorted(step[2].getBlockName() for step in p) for p in partitions)
+		self.assertEqual([["c0", "n0"], ["c1", "c2", "n1", "n2", "sum"], ["clock-delta"]], groups)
+		for partition in partitions:
+			names = [step[2].getBlockName() for step in partition]
+			if "sum" in names:
+				self.assertEqual("sum", names[-1])
+		self.assertEqual(2, len(plan.getPartitions(2)[1]))
+		self.assertEqual(1, len(plan.getPartitions(1)[1]))
+
 if __name__ == '__main__':  # pragma: no cover
 	# When this module is executed from the command-line, run all its tests
 	unittest.main()
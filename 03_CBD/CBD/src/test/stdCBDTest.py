@@ -529,6 +529,25 @@ class StdCBDTestCase(unittest.TestCase):
 		self._run(5)
 		self.assertEqual(self._getSignal("d"), [1.0, 6.0, 11.0, 16.0, 21.0])
 
+	def testDelayBlockClone(self):
+		self.CBD.addBlock(ConstantBlock(block_name="c1", value=5.0))
+		self.CBD.addBlock(ConstantBlock(block_name="c2", value=3.0))
+		self.CBD.addBlock(DelayBlock(block_name="d"))
+		self.CBD.addConnection("c2", "d")
+		self.CBD.addConnection("c1", "d", input_port_name="IC")
+		self._run(4)
+
+		clone = self.CBD.clone()
+		# The clock of the original model is not copied along with the delay
+		self.assertIsNone(clone.getBlockByName("d")._DelayBlock__clock)
+		clone.getClock().reset()
+		sim = Simulator(clone)
+		sim.setDeltaT(1.0)
+		sim.setTerminationTime(3.0)
+		sim.run()
+		self.assertIs(clone.getClock(), clone.getBlockByName("d")._DelayBlock__clock)
+		self.assertEqual([x.value for x in clone.getBlockByName("d").getSignalHistory()], [5.0, 3.0, 3.0])
+
 	def testAddOneBlock(self):
 		self.CBD.addBlock(SequenceBlock(block_name="c", sequence=[1, 2, 5, 7, 3]))
 		self.CBD.addBlock(AddOneBlock(block_name="add1"))
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Unit tests for the parameter sweep runner.
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from pyCBD.Core import *
+from pyCBD.lib.std import *
+from pyCBD.lib.endpoints import StatisticsCollectorBlock
+from pyCBD.sweep import Sweep, ParameterGrid, RandomSampler, run_seed
+
+CREATED = []
+
+
+def factory(parameters, seed):
+	CREATED.append(parameters)
+	model = CBD("model", [], ["OUT1"])
+	model.addBlock(ConstantBlock("gain", parameters["gain"]))
+	model.addBlock(ConstantBlock("offset", parameters["offset"] + random.random()))
+	model.addBlock(TimeBlock("time"))
+	model.addBlock(ProductBlock("p"))
+	model.addBlock(AdderBlock("a"))
+	model.addBlock(StatisticsCollectorBlock("stats"))
+	model.addConnection("time", "p")
+	model.addConnection("gain", "p")
+	model.addConnection("p", "a")
+	model.addConnection("offset", "a")
+	model.addConnection("a", "OUT1")
+	model.addConnection("a", "stats")
+	return model
+
+
+class SweepCBDTestCase(unittest.TestCase):
+	def setUp(self):
+		CREATED.clear()
+		self.grid = ParameterGrid(gain=[1.0, 2.0, 3.0], offset=[0.0, 10.0])
+
+	def _sweep(self, checkpoint=None):
+		return Sweep(factory, self.grid, duration=4, outputs=["OUT1", "p"], statistics=["stats"],
+		             seed=7, checkpoint=checkpoint)
+
+	def _check(self, results):
+		self.assertEqual(list(range(6)), sorted(results.keys()))
+		for index, parameters in enumerate(self.grid):
+			res = results[index]
+			self.assertEqual(parameters, res.parameters)
+			self.assertEqual(run_seed(7, index), res.seed)
+			offset = parameters["offset"] + random.Random(res.seed).random()
+			expected = [(float(t), parameters["gain"] * t + offset) for t in range(4)]
+			self.assertEqual(len(expected), len(res.outputs["OUT1"]))
+			for (et, ev), (at, av) in zip(expected, res.outputs["OUT1"]):
+				self.assertAlmostEqual(et, at)
+				self.assertAlmostEqual(ev, av)
+			self.assertEqual([parameters["gain"] * t for t in range(4)], [v for _, v in res.outputs["p"]])
+			self.assertEqual(4, res.statistics["stats"]["count"])
+			self.assertAlmostEqual(offset, res.statistics["stats"]["min"])
+			self.assertAlmostEqual(1.5 * parameters["gain"] + offset, res.statistics["stats"]["mean"])
+
+	def testParameterGrid(self):
+		self.assertEqual(6, len(self.grid))
+		self.assertEqual({"gain": 1.0, "offset": 0.0}, list(self.grid)[0])
+		self.assertEqual({"gain": 3.0, "offset": 10.0}, list(self.grid)[-1])
+
+	def testRandomSampler(self):
+		sampler = RandomSampler(5, 3, gain=lambda rng: rng.uniform(0.0, 1.0))
+		self.assertEqual(5, len(sampler))
+		self.assertEqual(list(sampler), list(RandomSampler(5, 3, gain=lambda rng: rng.uniform(0.0, 1.0))))
+		self.assertNotEqual(list(sampler), list(RandomSampler(5, 4, gain=lambda rng: rng.uniform(0.0, 1.0))))
+
+	def testSerial(self):
+		results = {res.index: res for res in self._sweep().run(workers=0)}
+		self._check(results)
+
+	def testParallel(self):
+		results = {res.index: res for res in self._sweep().run(workers=2, chunksize=2)}
+		self._check(results)
+
+	def testResume(self):
+		with tempfile.TemporaryDirectory() as folder:
+			checkpoint = os.path.join(folder, "sweep.jsonl")
+			for i, _ in enumerate(self._sweep(checkpoint).run(workers=0)):
+				if i == 2:
+					break
+			self.assertEqual(3, len(CREATED))
+			self.assertEqual(3, len(self._sweep(checkpoint).load()))
+
+			CREATED.clear()
+			results = {res.index: res for res in self._sweep(checkpoint).run(workers=0)}
+			self.assertEqual(3, len(CREATED))
+			self._check(results)
+
+			CREATED.clear()
+			results = {res.index: res for res in self._sweep(checkpoint).run(workers=0, resume=False)}
+			self.assertEqual(6, len(CREATED))
+			self.assertEqual(6, len(self._sweep(checkpoint).load()))
+
+	def testResumeChangedParameters(self):
+		with tempfile.TemporaryDirectory() as folder:
+			checkpoint = os.path.join(folder, "sweep.jsonl")
+			list(self._sweep(checkpoint).run(workers=0))
+
+			# Other parameters for the same indices, and fewer runs
+			self.grid = ParameterGrid(gain=[1.0, 2.0], offset=[0.0, 20.0])
+			CREATED.clear()
+			results = list(self._sweep(checkpoint).run(workers=0))
+			self.assertEqual(4, len(results))
+			self.assertEqual([{"gain": 1.0, "offset": 20.0}, {"gain": 2.0, "offset": 20.0}], CREATED)
+			for index, parameters in enumerate(self.grid):
+				self.assertEqual(parameters, {res.index: res for res in results}[index].parameters)
+
+			# Another seed
+			CREATED.clear()
+			sweep = Sweep(factory, self.grid, duration=4, outputs=["OUT1"], seed=8, checkpoint=checkpoint)
+			self.assertEqual(4, len(list(sweep.run(workers=0))))
+			self.assertEqual(4, len(CREATED))
+
+	def testRandomState(self):
+		random.seed(42)
+		expected = random.random()
+		random.seed(42)
+		list(self._sweep().run(workers=0))
+		self.assertEqual(expected, random.random())
+
+	def testParallelClose(self):
+		with tempfile.TemporaryDirectory() as folder:
+			checkpoint = os.path.join(folder, "sweep.jsonl")
+			generator = self._sweep(checkpoint).run(workers=1)
+			first = next(generator)
+			generator.close()
+			loaded = self._sweep(checkpoint).load()
+			self.assertIn(first.index, loaded)
+
+			results = {res.index: res for res in self._sweep(checkpoint).run(workers=0)}
+			self._check(results)
+
+
+if __name__ == '__main__':  # pragma: no cover
+	# When this module is executed from the command-line, run all its tests
+	unittest.main(verbosity=2)
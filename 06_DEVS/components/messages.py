@@ -40,10 +40,11 @@ class Car:
     destination: str = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class Query:
     """
     Represents the driver watching to the RoadSegment in front.
+    A Query is never modified, so it is never copied when it is passed along a connection.
     """
     # The unique identifier of the Car that sends this Query.
     ID: int
@@ -0,0 +1,79 @@
+import random
+import sys
+import time
+
+from pypdevs.basesimulator import BaseSimulator
+from pypdevs.simulator import Simulator
+from other.roadstretch import RoadStretch
+
+
+def create_model(limit):
+    """
+    Creates the roadstretch model with the same constants as the roadstretch simulations.
+    :param limit: (int)
+        limit of cars
+    """
+    random.seed(42)
+    return RoadStretch("roadstretch", 5, 30, 5, 7, 30, 10, ["collector"], limit)
+
+
+def count_transitions(termination_time, limit):
+    """
+    Counts the number of transitions (events) of a single simulation run.
+    :param termination_time: (int)
+        the time at which the simulation should stop
+    :param limit: (int)
+        limit of cars
+    """
+    count = [0]
+    original = BaseSimulator.massAtomicTransitions
+
+    def counting(self, trans, clock):
+        count[0] += len(trans)
+        original(self, trans, clock)
+
+    BaseSimulator.massAtomicTransitions = counting
+    try:
+        simulate(termination_time, limit, True)
+    finally:
+        BaseSimulator.massAtomicTransitions = original
+    return count[0]
+
+
+def simulate(termination_time, limit, sequential):
+    """
+    Simulates the roadstretch model without any tracing.
+    :param termination_time: (int)
+        the time at which the simulation should stop
+    :param limit: (int)
+        limit of cars
+    :param sequential: (bool)
+        whether or not to use the lock-free sequential kernel
+    :return: (float)
+        the wall clock time of the simulation in seconds
+    """
+    sim = Simulator(create_model(limit))
+    sim.setClassicDEVS()
+    sim.setTerminationTime(termination_time)
+    original = BaseSimulator.isSequential
+    if not sequential:
+        # Force the original synchronised simulation loop
+        BaseSimulator.isSequential = lambda self: False
+    try:
+        start = time.perf_counter()
+        sim.simulate()
+        return time.perf_counter() - start
+    finally:
+        BaseSimulator.isSequential = original
+
+
+if __name__ == '__main__':
+    termination_time = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    repeats = 3
+
+    events = count_transitions(termination_time, limit)
+    print(f"Roadstretch until {termination_time} with at most {limit} cars: {events} events")
+    for name, sequential in [("runsim", False), ("sequential", True)]:
+        best = min(simulate(termination_time, limit, sequential) for _ in range(repeats))
+        print(f"\t -{name:<12} {best:8.3f} s {events / best:12.0f} events/s")
@@ -0,0 +1,30 @@
+import sys
+sys.path.append("../src/")
+
+from pypdevs.DEVS import AtomicDEVS, CoupledDEVS
+import random
+
+class Vehicle(AtomicDEVS):
+    """
+    A model that transitions after a random delay, which is clustered around a period.
+    """
+    def __init__(self, name, period, jitter):
+        AtomicDEVS.__init__(self, name)
+        self.period = period
+        self.jitter = jitter
+        self.state = round(random.uniform(0, period), 4)
+
+    def timeAdvance(self):
+        return self.state
+
+    def intTransition(self):
+        return round(self.period + random.uniform(-self.jitter, self.jitter), 4)
+
+class City(CoupledDEVS):
+    """
+    A lot of unconnected vehicles, whose time_next values are dense, but mostly distinct.
+    """
+    def __init__(self, size, period=1.0, jitter=0.1):
+        CoupledDEVS.__init__(self, "City")
+        for i in range(size):
+            self.addSubModel(Vehicle("Vehicle_%i" % i, period, jitter))
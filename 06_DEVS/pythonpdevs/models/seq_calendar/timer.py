@@ -0,0 +1,27 @@
+import sys
+import random
+sys.path.append("../src/")
+sys.path.append("seq_calendar/")
+sizes = [100, 1000, 10000, 30000]
+schedulers = ["setSchedulerHeapSet", "setSchedulerActivityHeap", "setSchedulerNoAge", "setSchedulerCalendar"]
+from pypdevs.simulator import Simulator
+import time
+iters = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+for size in sizes:
+    results = []
+    for scheduler in schedulers:
+        from model import City
+        total = 0.0
+        for _ in range(iters):
+            random.seed(1)
+            model = City(size)
+            sim = Simulator(model)
+            getattr(sim, scheduler)()
+            # Every vehicle transitions about 10 times
+            sim.setTerminationTime(10)
+            start = time.time()
+            sim.simulate()
+            total += (time.time() - start)
+        results.append(total / iters)
+    print("%s %s" % (size, " ".join(["%s=%.3f" % (s[len("setScheduler"):], r) for s, r in zip(schedulers, results)])))
@@ -0,0 +1,64 @@
+import sys
+sys.path.append("../src/")
+
+from pypdevs.infinity import INFINITY
+from pypdevs.DEVS import AtomicDEVS, CoupledDEVS
+
+class Generator(AtomicDEVS):
+    def __init__(self):
+        AtomicDEVS.__init__(self, "Generator")
+        self.state = 0
+        self.send_event1 = self.addOutPort("out_event1")
+
+    def timeAdvance(self):
+        return 1.0
+
+    def intTransition(self):
+        return self.state + 1
+
+    def outputFnc(self):
+        return {self.send_event1: [self.state]}
+
+class Echo(AtomicDEVS):
+    def __init__(self, name):
+        AtomicDEVS.__init__(self, name)
+        self.recv_event1 = self.addInPort("in_event1")
+        self.send_event1 = self.addOutPort("out_event1")
+        self.state = None
+
+    def timeAdvance(self):
+        return INFINITY if self.state is None else 0.5
+
+    def intTransition(self):
+        return None
+
+    def extTransition(self, inputs):
+        return inputs[self.recv_event1][0]
+
+    def outputFnc(self):
+        return {self.send_event1: [self.state]}
+
+class Collector(AtomicDEVS):
+    def __init__(self):
+        AtomicDEVS.__init__(self, "Collector")
+        self.recv_event1 = self.addInPort("in_event1")
+        self.state = 0
+
+    def timeAdvance(self):
+        return INFINITY
+
+    def extTransition(self, inputs):
+        return self.state + len(inputs[self.recv_event1])
+
+class FanOut(CoupledDEVS):
+    """
+    A generator broadcasts to *width* echo models, which all reply to a single collector.
+    """
+    def __init__(self, width):
+        CoupledDEVS.__init__(self, "FanOut")
+        self.generator = self.addSubModel(Generator())
+        self.collector = self.addSubModel(Collector())
+        for i in range(width):
+            echo = self.addSubModel(Echo("Echo_%i" % i))
+            self.connectPorts(self.generator.send_event1, echo.recv_event1)
+            self.connectPorts(echo.send_event1, self.collector.recv_event1)
@@ -0,0 +1,22 @@
+import sys
+sys.path.append("../src/")
+sys.path.append("seq_fanout/")
+widths = [10, 100, 1000, 5000]
+from pypdevs.simulator import Simulator
+import time
+iters = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+
+for width in widths:
+    from model import FanOut
+    total = 0.0
+    for _ in range(iters):
+        model = FanOut(width)
+        sim = Simulator(model)
+        sim.setMessageCopy('none')
+        sim.setTerminationTime(100)
+        start = time.time()
+        sim.simulate()
+        total += (time.time() - start)
+    # Every message that reached the collector was routed twice
+    events = 2 * model.collector.state
+    print("%s %s %s" % (width, total/iters, events * iters / total))
@@ -0,0 +1,51 @@
+import sys
+sys.path.append("../src/")
+
+from pypdevs.schedulers.schedulerHS import SchedulerHS
+
+# The trace of the last simulation that used the recorder
+trace = []
+
+class SchedulerRecorder(SchedulerHS):
+    """
+    A HeapSet scheduler that records every request it receives, together with its answer.
+
+    The trace consists of tuples, which are replayed by the timer:
+        * ("init", [(model_id, time_next), ...], total_models)
+        * ("schedule", model_id, time_next)
+        * ("unschedule", model_id)
+        * ("reschedule", [(model_id, time_next), ...])
+        * ("first", time_next)
+        * ("imminent", time, [model_id, ...])
+    """
+    def __init__(self, models, epsilon, total_models):
+        models = list(models)
+        del trace[:]
+        trace.append(("init", [(m.model_id, m.time_next) for m in models], total_models))
+        # The initial schedules are part of the init entry
+        self.recording = False
+        SchedulerHS.__init__(self, models, epsilon, total_models)
+        self.recording = True
+
+    def schedule(self, model):
+        if self.recording:
+            trace.append(("schedule", model.model_id, model.time_next))
+        SchedulerHS.schedule(self, model)
+
+    def unschedule(self, model):
+        trace.append(("unschedule", model.model_id))
+        SchedulerHS.unschedule(self, model)
+
+    def massReschedule(self, reschedule_set):
+        trace.append(("reschedule", [(m.model_id, m.time_next) for m in reschedule_set]))
+        SchedulerHS.massReschedule(self, reschedule_set)
+
+    def readFirst(self):
+        first = SchedulerHS.readFirst(self)
+        trace.append(("first", first))
+        return first
+
+    def getImminent(self, time):
+        imminent = SchedulerHS.getImminent(self, time)
+        trace.append(("imminent", time, sorted([m.model_id for m in imminent])))
+        return imminent
@@ -0,0 +1,330 @@
+"""
+Benchmark of all schedulers on recorded scheduler traces.
+
+Every workload is a trace of scheduler requests, recorded with the SchedulerRecorder. Synthetic workloads
+are recorded with a minimal simulation loop, real workloads by simulating a model. The trace is replayed
+on every scheduler, which reports the latency of every operation and the throughput in transitions per
+second. A scheduler that returns different imminent models than the recorded ones is marked as invalid.
+
+Finally, the selection table for the SchedulerAuto is printed. Similar workloads are merged into a single
+entry, which only selects another scheduler than the default SchedulerHS if it is clearly faster.
+
+Run from the models folder:
+    python seq_schedulers/timer.py [--sizes 100 1000 10000] [--events 20000] [--budget 2]
+"""
+import sys
+sys.path.append(".")
+sys.path.append("../src/")
+sys.path.append("seq_schedulers/")
+import argparse
+import importlib
+import math
+import random
+import time
+
+from pypdevs.simulator import Simulator
+from pypdevs.util import EPSILON
+import recorder
+
+INF = float('inf')
+
+# (name, module, class, whether the scheduler expects plain floats instead of (time, age) tuples)
+SCHEDULERS = [
+    ("AH", "schedulerAH", "SchedulerAH", False),
+    ("DH", "schedulerDH", "SchedulerDH", False),
+    ("HS", "schedulerHS", "SchedulerHS", False),
+    ("NA", "schedulerNA", "SchedulerNA", False),
+    ("ML", "schedulerML", "SchedulerML", False),
+    ("SL", "schedulerSL", "SchedulerSL", False),
+    ("CQ", "schedulerCQ", "SchedulerCQ", False),
+    ("DT", "schedulerDT", "SchedulerDT", False),
+    ("Chibi", "schedulerChibi", "SchedulerChibi", True),
+    ("ChibiList", "schedulerChibiList", "SchedulerChibiList", True),
+]
+
+# Schedulers that are correct for every model in the normal kernel:
+#   NA ignores the age, DT only works in lockstep and the Chibi schedulers only work with plain floats
+SELECTABLE = ["AH", "DH", "HS", "ML", "SL", "CQ"]
+
+OPERATIONS = ["init", "schedule", "unschedule", "reschedule", "first", "imminent"]
+
+# The scheduler that is used unless another one is clearly faster
+INCUMBENT = "HS"
+# Fraction by which another scheduler has to be faster than the incumbent to be selected
+MARGIN = 0.2
+# Workloads of the same size whose activity differs by less than this factor are merged into a single entry
+TOLERANCE = math.exp(0.5)
+
+class Model(object):
+    """
+    The only attributes of a model that are used by a scheduler.
+    """
+    __slots__ = ["model_id", "time_next"]
+
+    def __init__(self, model_id, time_next):
+        self.model_id = model_id
+        self.time_next = time_next
+
+def synthesize(size, events, delay, fanout=0):
+    """
+    Record a trace with a minimal simulation loop, without any model behaviour.
+
+    :param size: number of models
+    :param events: number of transitions to record
+    :param delay: function (model_id) returning the time advance of a model after its transition
+    :param fanout: number of random models that receive an event from every transitioning model
+    :returns: the recorded trace
+    """
+    random.seed(1)
+    models = [Model(i, (round(delay(i), 4), 1)) for i in range(size)]
+    scheduler = recorder.SchedulerRecorder(models, EPSILON, size)
+    transitions = 0
+    while transitions < events:
+        try:
+            first = scheduler.readFirst()
+        except IndexError:
+            break
+        imminent = scheduler.getImminent(first)
+        transitioning = set(imminent)
+        for model in imminent:
+            model.time_next = (round(first[0] + delay(model.model_id), 4), 1)
+        for _ in range(fanout * len(imminent)):
+            model = models[random.randrange(size)]
+            if model not in transitioning:
+                # An external transition, which makes the model reply after a fixed delay
+                model.time_next = (first[0] + 0.5, 1)
+                transitioning.add(model)
+        scheduler.massReschedule(transitioning)
+        transitions += len(transitioning)
+    return list(recorder.trace)
+
+def record(model, termination_time, classic=False):
+    """
+    Record a trace by simulating a model.
+
+    :param model: the model to simulate
+    :param termination_time: the time at which the simulation should stop
+    :param classic: whether or not to use Classic DEVS
+    :returns: the recorded trace
+    """
+    sim = Simulator(model)
+    sim.setSchedulerCustom("recorder", "SchedulerRecorder")
+    if classic:
+        sim.setClassicDEVS()
+    sim.setTerminationTime(termination_time)
+    sim.simulate()
+    return list(recorder.trace)
+
+def synthetic(size, events):
+    """
+    The synthetic workloads.
+
+    :param size: number of models
+    :param events: minimal number of transitions in every workload
+    :returns: list of (name, trace)
+    """
+    events = max(events, 10 * size)
+    generators = max(1, size // 100)
+    return [
+        # All models active, at distinct times
+        ("uniform", synthesize(size, events, lambda i: random.uniform(0.5, 1.5))),
+        # All models active, colliding at large bursts every few time units
+        ("bursty", synthesize(size, events, lambda i: random.choice([1, 2, 5, 10]))),
+        ("single-active", synthesize(size, events, lambda i: 1.0 if i == 0 else INF)),
+        ("all-active", synthesize(size, events, lambda i: 1.0)),
+        # Few generators, which all reach a tenth of the passive models
+        ("high-fanout", synthesize(size, events,
+                                   lambda i: random.uniform(0.5, 1.5) if i < generators else INF,
+                                   fanout=max(1, size // 10))),
+    ]
+
+def recorded(size):
+    """
+    The workloads that are recorded from real models.
+
+    :param size: approximate number of models
+    :returns: list of (name, trace)
+    """
+    sys.path.append("../../")
+    from seq_fanout.model import FanOut
+    from seq_calendar.model import City
+    random.seed(1)
+    workloads = [
+        ("fanout", record(FanOut(size), 100)),
+        ("city", record(City(size), 10)),
+    ]
+    try:
+        from other.roadstretch import RoadStretch
+    except ImportError:
+        # Only available when run from within the assignment
+        return workloads
+    random.seed(42)
+    model = RoadStretch("roadstretch", 5, 30, 5, 7, 30, 10, ["collector"], size)
+    workloads.append(("roadstretch", record(model, 1000, classic=True)))
+    return workloads
+
+def replay(trace, scheduler_class, floats, budget):
+    """
+    Replay a trace on a scheduler.
+
+    :param trace: the trace to replay
+    :param scheduler_class: the scheduler class
+    :param floats: whether the scheduler expects plain floats as time_next
+    :param budget: maximal number of seconds to spend on the trace
+    :returns: (timings, transitions, status) with timings a dictionary of operation to [calls, seconds]
+    """
+    clock = time.perf_counter
+    timings = dict([(operation, [0, 0.0]) for operation in OPERATIONS])
+    convert = (lambda t: t[0]) if floats else (lambda t: t)
+    _, initial, total = trace[0]
+    models = {}
+    for model_id, time_next in initial:
+        models[model_id] = Model(model_id, convert(time_next))
+    start = clock()
+    scheduler = scheduler_class(list(models.values()), EPSILON, total)
+    timings["init"] = [1, clock() - start]
+    transitions = 0
+    deadline = clock() + budget
+    try:
+        for index, request in enumerate(trace):
+            operation = request[0]
+            if operation == "schedule":
+                model = models.setdefault(request[1], Model(request[1], None))
+                model.time_next = convert(request[2])
+                start = clock()
+                scheduler.schedule(model)
+            elif operation == "unschedule":
+                model = models[request[1]]
+                start = clock()
+                scheduler.unschedule(model)
+            elif operation == "reschedule":
+                reschedule = []
+                for model_id, time_next in request[1]:
+                    model = models[model_id]
+                    model.time_next = convert(time_next)
+                    reschedule.append(model)
+                start = clock()
+                scheduler.massReschedule(reschedule)
+            elif operation == "first":
+                start = clock()
+                scheduler.readFirst()
+            elif operation == "imminent":
+                t = convert(request[1])
+                start = clock()
+                imminent = scheduler.getImminent(t)
+                timings[operation][0] += 1
+                timings[operation][1] += clock() - start
+                if sorted([m.model_id for m in imminent]) != request[2]:
+                    return timings, transitions, "invalid"
+                transitions += len(imminent)
+                continue
+            else:
+                continue
+            timings[operation][0] += 1
+            timings[operation][1] += clock() - start
+            if index % 256 == 0 and clock() > deadline:
+                return timings, transitions, "truncated"
+    except Exception as e:
+        return timings, transitions, "failed (%s)" % type(e).__name__
+    return timings, transitions, ""
+
+def activity(trace):
+    """
+    The average fraction of all models that is rescheduled at once, as gathered by the SchedulerAuto.
+
+    :param trace: the trace
+    :returns: the activity
+    """
+    sizes = [len(request[1]) for request in trace if request[0] == "reschedule"]
+    if not sizes:
+        return 0.0
+    return float(sum(sizes)) / len(sizes) / len(trace[0][1])
+
+def benchmark(name, trace, budget):
+    """
+    Benchmark all schedulers on a single workload and print the results.
+
+    :param name: name of the workload
+    :param trace: the trace of the workload
+    :param budget: maximal number of seconds to spend on the trace per scheduler
+    :returns: dictionary of scheduler name to throughput, only for the valid schedulers
+    """
+    print("%s: %i models, activity %.4f, %i requests" % (name, len(trace[0][1]), activity(trace), len(trace)))
+    print("    %-10s %s %12s" % ("scheduler", " ".join(["%11s" % o for o in OPERATIONS]), "events/s"))
+    throughputs = {}
+    for scheduler, filename, classname, floats in SCHEDULERS:
+        module = importlib.import_module("pypdevs.schedulers." + filename)
+        timings, transitions, status = replay(trace, getattr(module, classname), floats, budget)
+        latencies = []
+        for operation in OPERATIONS:
+            calls, seconds = timings[operation]
+            latencies.append("%11s" % ("%.2fus" % (seconds / calls * 1e6) if calls else "-"))
+        total = sum([seconds for _, seconds in timings.values()])
+        throughput = transitions / total if total else 0.0
+        print("    %-10s %s %12.0f %s" % (scheduler, " ".join(latencies), throughput, status))
+        if status in ["", "truncated"]:
+            throughputs[scheduler] = throughput
+    return throughputs
+
+def select(workloads):
+    """
+    Build the selection table from the benchmark results, without the noise of individual runs.
+
+    Workloads with the same number of models and an activity within the TOLERANCE are merged. For every
+    merged group, the schedulers are compared on the geometric mean of their throughput relative to the
+    INCUMBENT. Another scheduler is only selected if it beats the incumbent by the MARGIN.
+
+    :param workloads: list of (name, models, activity, throughputs)
+    :returns: list of (models, activity, scheduler file, scheduler class, names)
+    """
+    groups = []
+    for workload in sorted(workloads, key=lambda w: (w[1], w[2])):
+        _, models, act, _ = workload
+        if (groups and groups[-1][0][1] == models and
+                max(act, EPSILON) < max(groups[-1][0][2], EPSILON) * TOLERANCE):
+            groups[-1].append(workload)
+        else:
+            groups.append([workload])
+
+    table = []
+    for group in groups:
+        scores = {}
+        for scheduler in SELECTABLE:
+            if all([scheduler in w[3] and w[3].get(INCUMBENT) for w in group]):
+                logs = [math.log(max(w[3][scheduler], EPSILON) / w[3][INCUMBENT]) for w in group]
+                scores[scheduler] = math.exp(sum(logs) / len(logs))
+        best = max(scores, key=lambda s: scores[s]) if scores else INCUMBENT
+        if scores.get(best, 0.0) < 1.0 + MARGIN:
+            best = INCUMBENT
+        models = group[0][1]
+        act = math.exp(sum([math.log(max(w[2], EPSILON)) for w in group]) / len(group))
+        table.append((models, act, best, "+".join([w[0] for w in group])))
+
+    modules = dict([(s[0], (s[1], s[2])) for s in SCHEDULERS])
+    return [(models, act) + modules[best] + (names,) for models, act, best, names in table]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark all schedulers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--events", type=int, default=20000,
+                        help="minimal number of transitions in the synthetic workloads")
+    parser.add_argument("--budget", type=float, default=2.0,
+                        help="maximal number of seconds per scheduler and workload")
+    args = parser.parse_args()
+
+    workloads = []
+    for size in args.sizes:
+        for name, trace in synthetic(size, args.events) + recorded(size):
+            throughputs = benchmark("%s-%i" % (name, size), trace, args.budget)
+            if (len(trace[0][1]), name) not in [(w[1], w[0]) for w in workloads]:
+                # Models of a fixed size are only put in the table once
+                workloads.append((name, len(trace[0][1]), activity(trace), throughputs))
+    table = select(workloads)
+
+    print("")
+    print("# Generated by models/seq_schedulers/timer.py")
+    print("SELECTION = [")
+    print("    # (models, activity, scheduler file, scheduler class)")
+    for models, act, filename, classname, names in table:
+        print("    (%i, %.6f, \"%s\", \"%s\"), # %s" % (models, act, filename, classname, names))
+    print("]")
@@ -631,7 +631,7 @@ class CoupledDEVS(BaseDEVS):
         p2.inline = new_connection
         self.server.getSelfProxy().dsDisconnectPorts(p1, p2)
 
-    def connectPorts(self, p1, p2, z = None):
+    def connectPorts(self, p1, p2, z = None, copy = None):
         """
         Connects two ports together. The coupling is to begin at p1 and
         to end at p2.
@@ -640,6 +640,10 @@ class CoupledDEVS(BaseDEVS):
         :param p2: the port at the end of the new connection
         :param z: the translation function for the events
                   either input-to-input, output-to-input or output-to-output.
+        :param copy: the method to copy the events with before they are passed to
+                     the translation function, see *messageCopier* for the options.
+                     If None, the first method that is set on the remainder of the
+                     route is used, or else the one set with *setMessageCopy*.
         """
         # For a coupling to be valid, two requirements must be met:
         # 1- at least one of the DEVS the ports belong to is a child of the
@@ -685,6 +689,8 @@ class CoupledDEVS(BaseDEVS):
                                 p2.getPortName()))
 
         p1.z_functions[p2] = z
+        if copy is not None:
+            p1.copy_functions[p2] = copy
         if hasattr(self, "full_name"):
             # TODO modify
             self.server.getSelfProxy().dsConnectPorts(p1, p2)
@@ -723,11 +729,12 @@ class RootDEVS(BaseDEVS):
         self.scheduler_type = scheduler_type
         self.listeners = {}
     
-    def redoDirectConnection(self, ports):
+    def redoDirectConnection(self, ports, msg_copy=0):
         """
         Redo direct connection for a specified port, and all ports connected to it.
 
         :param ports: the ports that have changed.
+        :param msg_copy: the default message copy method for translation functions
         """
         # Find all changed ports and redo their direct connection
         worklist = list(ports)
@@ -735,13 +742,43 @@ class RootDEVS(BaseDEVS):
             worklist.extend(outport.inline)
         
         for p in set(worklist):
-            directConnectPort(p, self.listeners)
+            directConnectPort(p, self.listeners, msg_copy)
+        self.compileRouting()
 
-    def directConnect(self):
+    def directConnect(self, msg_copy=0):
         """
         Perform direct connection on the models again
-        """
-        directConnect(self.models, self.listeners)
+
+        :param msg_copy: the default message copy method for translation functions
+        """
+        directConnect(self.models, self.listeners, msg_copy)
+
+    def compileRouting(self):
+        """
+        Compile the routing outlines of the output ports of all local models into
+        flat routing tables, which separate the local destinations from the remote ones.
+        This removes all lookups from the routing of the output.
+
+        Must be redone as soon as the direct connection or the location of a model changes.
+        """
+        local_model_ids = self.local_model_ids
+        for model in self.component_set:
+            for outport in model.OPorts:
+                # Local destinations are (inport, model), or (inport, model, z) if the
+                # events are translated, remote ones are (model_id, port_id, z)
+                outport.routing_local = []
+                outport.routing_translated = []
+                outport.routing_remote = []
+                for inport, z in outport.routing_outline:
+                    aDEVS = inport.host_DEVS
+                    if aDEVS.model_id not in local_model_ids:
+                        outport.routing_remote.append((aDEVS.model_id, 
+                                                       inport.port_id, 
+                                                       z))
+                    elif z is None:
+                        outport.routing_local.append((inport, aDEVS))
+                    else:
+                        outport.routing_translated.append((inport, aDEVS, z))
 
     def setScheduler(self, scheduler_type):
         """
@@ -834,6 +871,7 @@ class Port(object):
         self.name = name
         self.is_input = is_input
         self.z_functions = {}
+        self.copy_functions = {}
 
     def getPortName(self):
         """
@@ -870,6 +908,23 @@ def appendZ(first_z, new_z):
     else:
         return lambda x: new_z(first_z(x))
 
+def copyZ(z, method, msg_copy):
+    """
+    Prefix a translation function with the copy of the events it receives,
+    as the translation function might modify them.
+
+    :param z: the (combined) translation function of a route
+    :param method: the copy method of the route, or None for the default
+    :param msg_copy: the default message copy method
+    :returns: the translation function to put in the routing outline
+    """
+    if z is None:
+        return None
+    copier = messageCopier(msg_copy if method is None else method)
+    if copier is None:
+        return z
+    return lambda x: z(copier(x))
+
 class ExternalWrapper(AtomicDEVS):
     def __init__(self, function):
         AtomicDEVS.__init__(self, "Fake")
@@ -881,11 +936,13 @@ class ExternalWrapper(AtomicDEVS):
         # Fake object is created with a single fake port, so unpack that
         self.f(self.my_input.values()[0])
 
-def directConnect(component_set, listeners):
+def directConnect(component_set, listeners, msg_copy=0):
     """
     Perform direct connection on this CoupledDEVS model
 
     :param component_set: the iterable to direct connect
+    :param listeners: the listeners that exist, potentially on the ports
+    :param msg_copy: the default message copy method for translation functions
     :returns: the direct connected component_set
     """
     new_list = []
@@ -904,27 +961,29 @@ def directConnect(component_set, listeners):
         for outport in i.OPorts:
             # The new contents of the line
             outport.routing_outline = []
-            worklist = [(p, outport.z_functions.get(p, None)) 
+            worklist = [(p, outport.z_functions.get(p, None), 
+                         outport.copy_functions.get(p, None)) 
                         for p in outport.outline]
-            for outline, z in worklist:
+            for outline, z, method in worklist:
                 if outline in listener_keys:
                     # This port is being listened on, so just add it as a fake model
                     fake_port = Port(is_input=False,name="Fake")
                     fake_port.host_DEVS = ExternalWrapper(listeners[outline])
-                    outport.routing_outline.append((fake_port, z))
+                    outport.routing_outline.append((fake_port, copyZ(z, method, msg_copy)))
                 # If it is a coupled model, we must expand this model
                 if isinstance(outline.host_DEVS, CoupledDEVS):
                     for inline in outline.outline:
                         # Add it to the current iterating list, so we can just continue
-                        entry = (inline, appendZ(z, outline.z_functions[inline]))
+                        entry = (inline, 
+                                 appendZ(z, outline.z_functions[inline]),
+                                 outline.copy_functions.get(inline, None) if method is None else method)
                         worklist.append(entry)
                         # If it is a Coupled model, we should just continue 
                         # expanding it and not add it to the finished line
                         if not isinstance(inline.host_DEVS, CoupledDEVS):
-                            entry = (inline, appendZ(z, outline.z_functions[inline]))
-                            outport.routing_outline.append(entry)
+                            outport.routing_outline.append((inline, copyZ(entry[1], entry[2], msg_copy)))
                 else:
-                    for ol, z in outport.routing_outline:
+                    for ol, _ in outport.routing_outline:
                         if ol == outline:
                             break
                     else:
@@ -932,43 +991,46 @@ def directConnect(component_set, listeners):
                         # Note that it isn't really mandatory to check for this, 
                         # it is a lot cleaner to do so.
                         # This will greatly increase the complexity of the connector though
-                        outport.routing_outline.append((outline, z))
+                        outport.routing_outline.append((outline, copyZ(z, method, msg_copy)))
     return component_set
 
-def directConnectPort(outport, listeners):
+def directConnectPort(outport, listeners, msg_copy=0):
     """
     Perform direct connection on a single port.
 
     :param outpurt: the port to reconnect
     :param listeners: the listeners that exist, potentially on this port
+    :param msg_copy: the default message copy method for translation functions
     :returns: None
     """
 
     # The new contents of the line
     outport.routing_outline = []
-    worklist = [(p, outport.z_functions.get(p, None)) 
+    worklist = [(p, outport.z_functions.get(p, None), 
+                 outport.copy_functions.get(p, None)) 
                 for p in outport.outline]
     listener_keys = set(listeners.keys())
-    for outline, z in worklist:
+    for outline, z, method in worklist:
         if outline in listener_keys:
             # This port is being listened on, so just add it as a fake model
             fake_port = Port(is_input=False,name="Fake")
             fake_port.host_DEVS = ExternalWrapper(listeners[outline])
-            outport.routing_outline.append((fake_port, z))
+            outport.routing_outline.append((fake_port, copyZ(z, method, msg_copy)))
 
         # If it is a coupled model, we must expand this model
         if isinstance(outline.host_DEVS, CoupledDEVS):
             for inline in outline.outline:
                 # Add it to the current iterating list, so we can just continue
-                entry = (inline, appendZ(z, outline.z_functions.get(inline, None)))
+                entry = (inline, 
+                         appendZ(z, outline.z_functions.get(inline, None)),
+                         outline.copy_functions.get(inline, None) if method is None else method)
                 worklist.append(entry)
                 # If it is a Coupled model, we should just continue 
                 # expanding it and not add it to the finished line
                 if not isinstance(inline.host_DEVS, CoupledDEVS):
-                    entry = (inline, appendZ(z, outline.z_functions.get(inline, None)))
-                    outport.routing_outline.append(entry)
+                    outport.routing_outline.append((inline, copyZ(entry[1], entry[2], msg_copy)))
         else:
-            for ol, z in outport.routing_outline:
+            for ol, _ in outport.routing_outline:
                 if ol == outline:
                     break
             else:
@@ -976,4 +1038,4 @@ def directConnectPort(outport, listeners):
                 # Note that it isn't really mandatory to check for this, 
                 # it is a lot cleaner to do so.
                 # This will greatly increase the complexity of the connector though
-                outport.routing_outline.append((outline, z))
+                outport.routing_outline.append((outline, copyZ(z, method, msg_copy)))
@@ -328,6 +328,7 @@ class BaseSimulator(Solver):
             self.model.local_model_ids.remove(model_id)
             self.destinations[model_id] = destination
             self.model_ids[model_id].location = destination
+        self.model.compileRouting()
 
         # Now update the time_next and time_last values here
         self.model.setTimeNext()
@@ -397,6 +398,7 @@ class BaseSimulator(Solver):
         new_model.location = self.name
         self.model.component_set.append(new_model)
         self.model.local_model_ids.add(new_model.model_id)
+        self.model.compileRouting()
         new_model.time_last = current_state[0]
         new_model.time_next = current_state[1]
         new_model.state = current_state[2]
@@ -1194,6 +1196,55 @@ class BaseSimulator(Solver):
                     self.prevtime = self.current_clock
                     self.clock = self.model.time_next
 
+    def isSequential(self):
+        """
+        Checks whether this kernel can simulate without any synchronisation.
+
+        This is the case for a local simulation on a single kernel that is not
+        realtime, does not use dynamic structure and does not make checkpoints.
+        No other thread (GVT algorithm, relocator, realtime backend or remote
+        kernel) will then ever access the kernel while it is simulating.
+
+        :returns: bool -- whether or not :func:`runsimSequential` may be used
+        """
+        return (self.irreversible and
+                not self.realtime and
+                not self.use_DSDEVS and
+                self.checkpoint_freq <= 0)
+
+    def runsimSequential(self):
+        """
+        Run a complete simulation run on a single kernel, without any locking.
+
+        This is the sequential equivalent of :func:`runsim`, which only generates
+        the output, performs the transitions and reschedules the models. It
+        takes no locks and does no bookkeeping for the time warp algorithm, as
+        no messages can arrive and no revertions can ever happen.
+        """
+        cDEVS = self.model
+        scheduler = cDEVS.scheduler
+        infinity = float('inf')
+        while 1:
+            if self.check():
+                self.prevtime_finished = True
+                break
+            tn = cDEVS.time_next
+            if tn[0] == infinity:
+                self.transitioning.clear()
+                self.prevtime_finished = True
+                break
+            self.current_clock = (round(tn[0], 6), tn[1])
+
+            reschedule = self.coupledOutputGeneration(self.current_clock)
+            self.massAtomicTransitions(self.transitioning, self.current_clock)
+            scheduler.massReschedule(reschedule)
+
+            cDEVS.setTimeNext()
+            # Reuse the dictionary instead of allocating a new one every step
+            self.transitioning.clear()
+            self.prevtime = self.current_clock
+            self.clock = cDEVS.time_next
+
     def finishRing(self, msg_sent, msg_recv, first_run=False):
         """
         Go over the ring and ask each kernel whether it is OK to stop simulation
@@ -1327,7 +1378,10 @@ class BaseSimulator(Solver):
             return
 
         while 1:
-            self.runsim()
+            if self.isSequential():
+                self.runsimSequential()
+            else:
+                self.runsim()
             if self.irreversible:
                 self.should_run.clear()
                 break
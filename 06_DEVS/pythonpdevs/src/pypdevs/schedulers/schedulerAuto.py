@@ -14,13 +14,54 @@
 # limitations under the License.
 
 """
-Automaticly polymorphic scheduler. It will automatically adapt to your scheduling requests, though at a slight overhead due to the indirection and statistics gathering. If you know what is your optimal scheduler, please choose this one. If the access pattern varies throughout the simulation, this scheduler is perfect for you. It will choose between the HeapSet and Minimal List scheduler.
+Automaticly polymorphic scheduler. It will automatically adapt to your scheduling requests, though at a slight overhead due to the indirection and statistics gathering. If you know what is your optimal scheduler, please choose this one. If the access pattern varies throughout the simulation, this scheduler is perfect for you. It will choose the scheduler that was the fastest for the most similar workload in the selection table, which is generated by the scheduler benchmark in *models/seq_schedulers/timer.py*. A workload is characterised by the number of models and the average fraction of them that is rescheduled at once. As swapping rebuilds the complete scheduler, a swap only happens if the same scheduler is selected for several windows in a row.
 
 .. warning:: Barely tested, certainly not with distribution and relocation!!! **Use with caution!!!***
 
 """
+import importlib
+import math
 from pypdevs.schedulers.schedulerHS import SchedulerHS
-from pypdevs.schedulers.schedulerML import SchedulerML
+
+# Number of mass reschedules over which the activity is measured
+WINDOW = 100
+# Number of consecutive windows that have to select the same scheduler before it is swapped to
+STABLE_WINDOWS = 3
+
+# Generated by models/seq_schedulers/timer.py
+SELECTION = [
+    # (models, activity, scheduler file, scheduler class)
+    (12, 0.173180, "schedulerDH", "SchedulerDH"), # roadstretch
+    (100, 0.010032, "schedulerDH", "SchedulerDH"), # single-active+uniform+city
+    (100, 0.221976, "schedulerHS", "SchedulerHS"), # bursty
+    (100, 0.994913, "schedulerML", "SchedulerML"), # high-fanout+all-active
+    (102, 0.990196, "schedulerML", "SchedulerML"), # fanout
+    (1000, 0.001033, "schedulerDH", "SchedulerDH"), # single-active+uniform+city
+    (1000, 0.221077, "schedulerHS", "SchedulerHS"), # bursty
+    (1000, 0.904920, "schedulerML", "SchedulerML"), # high-fanout+all-active
+    (1002, 0.999002, "schedulerML", "SchedulerML"), # fanout
+    (10000, 0.000136, "schedulerHS", "SchedulerHS"), # single-active+city+uniform
+    (10000, 0.219939, "schedulerHS", "SchedulerHS"), # bursty
+    (10000, 0.420860, "schedulerML", "SchedulerML"), # high-fanout
+    (10000, 1.000000, "schedulerML", "SchedulerML"), # all-active
+    (10002, 0.999900, "schedulerML", "SchedulerML"), # fanout
+]
+
+def selectScheduler(models, activity, table=SELECTION):
+    """
+    Select the scheduler of the most similar workload in the selection table, compared on a logarithmic scale.
+
+    :param models: the number of models
+    :param activity: the average fraction of the models that is rescheduled at once
+    :param table: the selection table, containing (models, activity, scheduler file, scheduler class) tuples
+    :returns: (filename, classname) -- the selected scheduler
+    """
+    # Prevent the logarithm of zero if nothing was rescheduled
+    models = math.log(max(models, 1))
+    activity = math.log(max(activity, 1e-9))
+    best = min(table, key=lambda entry: (math.log(entry[0]) - models) ** 2 +
+                                        (math.log(entry[1]) - activity) ** 2)
+    return best[2], best[3]
 
 class SchedulerAuto(object):
     """
@@ -43,6 +84,10 @@ class SchedulerAuto(object):
         self.total_schedules = 0
         self.colliding_schedules = 0
 
+        # The scheduler selected in the previous windows, and in how many consecutive windows
+        self.candidate = None
+        self.stable_windows = 0
+
     def swapSchedulerTo(self, scheduler):
         """
         Swap the current subscheduler to the provided one. If the scheduler is already in use, no change happens.
@@ -80,12 +125,18 @@ class SchedulerAuto(object):
         """
         self.colliding_schedules += len(reschedule_set)
         self.total_schedules += 1
-        if self.total_schedules > 100:
-            if self.colliding_schedules > 15.0 * len(self.models):
-                # This means that 5/100 of the models is scheduled in every iteration
-                self.swapSchedulerTo(SchedulerML)
-            elif self.colliding_schedules < 500:
-                self.swapSchedulerTo(SchedulerHS)
+        if self.total_schedules > WINDOW:
+            activity = float(self.colliding_schedules) / self.total_schedules / max(len(self.models), 1)
+            candidate = selectScheduler(len(self.models), activity)
+            if candidate == self.candidate:
+                self.stable_windows += 1
+            else:
+                self.candidate = candidate
+                self.stable_windows = 1
+            if self.stable_windows >= STABLE_WINDOWS:
+                filename, classname = candidate
+                module = importlib.import_module("pypdevs.schedulers." + filename)
+                self.swapSchedulerTo(getattr(module, classname))
             self.colliding_schedules = 0
             self.total_schedules = 0
         return self.subscheduler.massReschedule(reschedule_set)
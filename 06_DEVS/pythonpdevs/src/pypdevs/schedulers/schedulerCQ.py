@@ -0,0 +1,215 @@
+# Copyright 2014 Modelling, Simulation and Design Lab (MSDL) at
+# McGill University and the University of Antwerp (http://msdl.cs.mcgill.ca/)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+The Calendar Queue scheduler is based on the calendar queue of R. Brown, combined with the dictionaries of the Heapset scheduler.
+
+Just like in the Heapset scheduler, the models are mapped on their time_next and a reverse relation is kept to find their *old* time_next. Only the *unique* timestamps are put in the calendar. The calendar is a list of buckets, each covering an interval of *width* simulation time, which are used cyclically: a timestamp is put in bucket *int(time / width) % buckets*. Each bucket is a small heap.
+
+To find the first timestamp, the buckets are traversed starting from the current one, until one is found whose first timestamp lies within the interval (the 'day') of the current bucket. If the calendar is traversed completely (a 'year') without finding such a timestamp, the first timestamp of all buckets is searched directly.
+
+The number of buckets is doubled or halved as soon as the number of timestamps exceeds twice or drops below half the number of buckets. At that moment, the width is estimated again as three times the average separation of the first timestamps, so that each bucket contains only a few timestamps. Scheduling, rescheduling and finding the first timestamp therefore take an amortised constant time, independent of the number of pending timestamps.
+
+Unscheduling is done lazily by removing the model from the dictionary. Timestamps without any models are only removed from their bucket as soon as they are encountered while searching for the first timestamp.
+
+Models whose time_next is infinity are never put in the calendar.
+
+This scheduler is ideal for simulations with a large number of models whose time_next is spread over many distinct, but densely packed timestamps. If most models transition at exactly the same time, the Heapset scheduler is equally good.
+"""
+from heapq import heappush, heappop, heapify, nsmallest
+from pypdevs.logger import *
+
+class SchedulerCQ(object):
+    """
+    Scheduler class itself
+    """
+    def __init__(self, models, epsilon, total_models):
+        """
+        Constructor
+
+        :param models: all models in the simulation
+        """
+        self.reverse = [None] * total_models
+        self.mapped = {}
+        self.infinite = (float('inf'), 1)
+        # Init the basic 'inactive' entry here, to prevent scheduling in the calendar itself
+        self.mapped[self.infinite] = set()
+        self.epsilon = epsilon
+        # Number of timestamps in the calendar
+        self.count = 0
+        self.width = 1.0
+        self.buckets = [[], []]
+        # The index of the current day, which is never beyond the first timestamp
+        self.day = 0
+        for model in models:
+            self.schedule(model)
+
+    def insert(self, time_next):
+        """
+        Insert a new timestamp in the calendar
+
+        :param time_next: the timestamp to insert
+        """
+        if time_next[0] == float('inf'):
+            return
+        day = int(time_next[0] / self.width)
+        heappush(self.buckets[day % len(self.buckets)], time_next)
+        if day < self.day:
+            # Scheduled before the current day, for example after a revertion
+            self.day = day
+        self.count += 1
+        if self.count > 2 * len(self.buckets):
+            self.resize(2 * len(self.buckets))
+
+    def resize(self, size):
+        """
+        Rebuild the calendar with the specified number of buckets, and estimate a new width for them.
+
+        :param size: the new number of buckets
+        """
+        times = []
+        for bucket in self.buckets:
+            for time_next in bucket:
+                if self.mapped[time_next]:
+                    times.append(time_next)
+                else:
+                    del self.mapped[time_next]
+        self.count = len(times)
+        # Use the average separation between the first distinct timestamps
+        first = sorted(set([t for t, _ in nsmallest(25, times)]))
+        if len(first) > 1:
+            separations = [b - a for a, b in zip(first, first[1:])]
+            average = sum(separations) / len(separations)
+            # Ignore the outliers, which would make the buckets too wide
+            separations = [s for s in separations if s <= 2 * average]
+            self.width = 3 * sum(separations) / len(separations)
+        self.buckets = [[] for _ in range(size)]
+        for time_next in times:
+            self.buckets[int(time_next[0] / self.width) % size].append(time_next)
+        for bucket in self.buckets:
+            heapify(bucket)
+        self.day = int(first[0] / self.width) if first else 0
+
+    def schedule(self, model):
+        """
+        Schedule a model
+
+        :param model: the model to schedule
+        """
+        try:
+            self.mapped[model.time_next].add(model)
+        except KeyError:
+            self.mapped[model.time_next] = set([model])
+            self.insert(model.time_next)
+        try:
+            self.reverse[model.model_id] = model.time_next
+        except IndexError:
+            self.reverse.append(model.time_next)
+
+    def unschedule(self, model):
+        """
+        Unschedule a model
+
+        :param model: model to unschedule
+        """
+        try:
+            self.mapped[self.reverse[model.model_id]].remove(model)
+        except KeyError:
+            pass
+        self.reverse[model.model_id] = None
+
+    def massReschedule(self, reschedule_set):
+        """
+        Reschedule all models provided.
+        Equivalent to calling unschedule(model); schedule(model) on every element in the iterable.
+
+        :param reschedule_set: iterable containing all models to reschedule
+        """
+        for model in reschedule_set:
+            model_id = model.model_id
+            if model_id is None:
+                continue
+            try:
+                self.mapped[self.reverse[model_id]].remove(model)
+            except KeyError:
+                # Element simply not present, so don't need to unschedule it
+                pass
+            self.reverse[model_id] = tn = model.time_next
+            try:
+                self.mapped[tn].add(model)
+            except KeyError:
+                self.mapped[tn] = set((model, ))
+                self.insert(tn)
+
+    def readFirst(self):
+        """
+        Returns the time of the first model that has to transition
+
+        :returns: timestamp of the first model
+        """
+        buckets = self.buckets
+        size = len(buckets)
+        width = self.width
+        mapped = self.mapped
+        for _ in range(size):
+            bucket = buckets[self.day % size]
+            while bucket:
+                first = bucket[0]
+                if not mapped[first]:
+                    # All models of this timestamp were rescheduled
+                    del mapped[first]
+                    heappop(bucket)
+                    self.count -= 1
+                elif int(first[0] / width) <= self.day:
+                    return first
+                else:
+                    break
+            self.day += 1
+        # Nothing found in an entire year, so search the first timestamp directly
+        first = None
+        for bucket in buckets:
+            while bucket and not mapped[bucket[0]]:
+                del mapped[heappop(bucket)]
+                self.count -= 1
+            if bucket and (first is None or bucket[0] < first):
+                first = bucket[0]
+        if first is None:
+            raise IndexError("Calendar is empty")
+        self.day = int(first[0] / width)
+        return first
+
+    def getImminent(self, time):
+        """
+        Returns a list of all models that transition at the provided time, with the specified epsilon deviation allowed.
+
+        :param time: timestamp to check for models
+
+        .. warning:: For efficiency, this method only checks the **first** elements, so trying to invoke this function with a timestamp higher than the value provided with the *readFirst* method, will **always** return an empty set.
+        """
+        t, age = time
+        imm_children = set()
+        try:
+            first = self.readFirst()
+            while (abs(first[0] - t) < self.epsilon) and (first[1] == age):
+                imm_children |= self.mapped.pop(first)
+                # The first timestamp is always at the front of the current bucket
+                heappop(self.buckets[self.day % len(self.buckets)])
+                self.count -= 1
+                first = self.readFirst()
+        except IndexError:
+            pass
+        if len(self.buckets) > 2 and self.count < len(self.buckets) // 2:
+            self.resize(len(self.buckets) // 2)
+        return imm_children
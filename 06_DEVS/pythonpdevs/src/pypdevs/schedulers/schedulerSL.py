@@ -30,7 +30,7 @@ class SchedulerSL(object):
 
         :param models: all models in the simulation
         """
-        self.models = list(models)
+        self.models = sorted(models, key=lambda i: i.time_next)
         self.epsilon = epsilon
                                 
     def schedule(self, model):
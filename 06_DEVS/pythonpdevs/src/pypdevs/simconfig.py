@@ -170,7 +170,7 @@ class SimulatorConfiguration(object):
 
     def setSchedulerPolymorphic(self, locations=None):
         """
-        Use a polymorphic scheduler, which chooses at run time between the HeapSet scheduler or the Minimal List scheduler. Slight overhead due to indirection and statistics gathering.
+        Use a polymorphic scheduler, which chooses at run time the scheduler that performed best on the most similar benchmarked workload. Slight overhead due to indirection and statistics gathering.
 
         .. warning:: Still unstable, don't use!
 
@@ -233,6 +233,14 @@ class SimulatorConfiguration(object):
         """
         self.setSchedulerCustom("schedulerHS", "SchedulerHS", locations)
 
+    def setSchedulerCalendar(self, locations=None):
+        """
+        Use a calendar queue scheduler, which keeps the distinct timestamps in buckets that are resized as the number of timestamps changes. Useful for large models with lots of distinct, but densely packed, timestamps.
+
+        :param locations: if it is an iterable, the scheduler will only be applied to these locations. If it is None, all nodes will be affected.
+        """
+        self.setSchedulerCustom("schedulerCQ", "SchedulerCQ", locations)
+
     def setShowProgress(self, progress=True):
         """
         Shows progress in ASCII in case a termination_time is given
@@ -546,6 +554,8 @@ class SimulatorConfiguration(object):
 
            none
                 don't use any copying at all, unsafe though most other DEVS simulators only supply this
+
+        This method is also used to copy the events that are passed to the translation function of a connection, unless the connection specifies its own method (see *connectPorts*).
         """
         if not isinstance(copy_method, int) and not isinstance(copy_method, str):
             raise DEVSException("Message copy method should be done using an integer or a string")
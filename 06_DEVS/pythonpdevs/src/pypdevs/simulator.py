@@ -270,7 +270,9 @@ class Simulator(object):
 
         self.model.listeners = self.listeners
         if isinstance(self.model, CoupledDEVS):
-            self.model.component_set = directConnect(self.model.component_set, self.listeners)
+            self.model.component_set = directConnect(self.model.component_set, 
+                                                       self.listeners, 
+                                                       self.msg_copy)
         elif isinstance(self.model, AtomicDEVS):
             for p in self.model.IPorts:
                 p.routing_inline = []
@@ -255,8 +255,8 @@ class Solver(object):
         # self.transitioning are the models that must transition
         if len(imminent) > 1:
             # Perform all selects
-            imminent.sort(key=lambda i: i.getModelFullName())
-            pending = imminent
+            # Schedulers return either a list or a set
+            pending = sorted(imminent, key=lambda i: i.getModelFullName())
             level = 1
             while len(pending) > 1:
                 # Take the model each time, as we need to make sure that the selectHierarchy is valid everywhere
@@ -270,7 +270,7 @@ class Solver(object):
                 level += 1
             child = pending[0]
         else:
-            child = imminent[0]
+            child, = imminent
         # Recorrect the timeNext of the model that will transition
         child.time_next = (child.time_next[0], child.time_next[1] - 1)
 
@@ -278,12 +278,13 @@ class Solver(object):
         self.transitioning[child] = 1
 
         for outport in outbag:
-            for inport, z in outport.routing_outline:
-                payload = outbag[outport]
-                if z is not None:
-                    payload = [z(pickle.loads(pickle.dumps(m))) for m in payload]
-                aDEVS = inport.host_DEVS
-                aDEVS.my_input[inport] = list(payload)
+            for inport, aDEVS in outport.routing_local:
+                aDEVS.my_input[inport] = list(outbag[outport])
+                self.transitioning[aDEVS] = 2
+                reschedule.add(aDEVS)
+            for inport, aDEVS, z in outport.routing_translated:
+                # Copying the messages is part of the translation function
+                aDEVS.my_input[inport] = [z(m) for m in outbag[outport]]
                 self.transitioning[aDEVS] = 2
                 reschedule.add(aDEVS)
         # We have now generated the transitioning variable, though we need some small magic to have it work for classic DEVS
@@ -299,26 +300,35 @@ class Solver(object):
         :returns: the models that should be rescheduled
         """
         cDEVS = self.model
+        transitioning = self.transitioning
         remotes = {}
         for child in cDEVS.scheduler.getImminent(time):
             outbag = self.atomicOutputGeneration(child, time)
             for outport in outbag:
                 payload = outbag[outport]
-                if not hasattr(outport, "routing_outline"):
-                    raise Exception(outport)
-                for inport, z in outport.routing_outline:
-                    aDEVS = inport.host_DEVS
-                    if z is not None:
-                        payload = [z(pickle.loads(pickle.dumps(m))) 
-                                   for m in payload]
-                    if aDEVS.model_id in self.model.local_model_ids:
-                        # This setdefault call is responsible for our non-linear runtime in several situations...
-                        aDEVS.my_input.setdefault(inport, []).extend(payload)
-                        self.transitioning[aDEVS] |= 2
+                # The routing tables are compiled by the RootDEVS
+                for inport, aDEVS in outport.routing_local:
+                    my_input = aDEVS.my_input
+                    if inport in my_input:
+                        my_input[inport].extend(payload)
+                    else:
+                        # Never share the list with the output or other inputs
+                        my_input[inport] = payload[:]
+                    transitioning[aDEVS] |= 2
+                for inport, aDEVS, z in outport.routing_translated:
+                    # Copying the messages is part of the translation function
+                    msgs = [z(m) for m in payload]
+                    my_input = aDEVS.my_input
+                    if inport in my_input:
+                        my_input[inport].extend(msgs)
                     else:
-                        remotes.setdefault(aDEVS.model_id, 
-                                           {}).setdefault(inport.port_id, 
-                                                          []).extend(payload)
+                        my_input[inport] = msgs
+                    transitioning[aDEVS] |= 2
+                for model_id, port_id, z in outport.routing_remote:
+                    msgs = payload if z is None else [z(m) for m in payload]
+                    remotes.setdefault(model_id, 
+                                       {}).setdefault(port_id, 
+                                                      []).extend(msgs)
         for destination in remotes:
             self.send(destination, time, remotes[destination])
         return self.transitioning
@@ -338,6 +348,7 @@ class Solver(object):
         # NOTE do not immediately assign to the timeNext, as this is used in the GVT algorithm to see whether a node has finished
         cDEVS.time_next = time_next
         self.model.setScheduler(self.model.scheduler_type)
+        self.model.compileRouting()
         self.server.flushQueuedMessages()
 
     def performDSDEVS(self, transitioning):
@@ -372,4 +383,4 @@ class Solver(object):
             # Don't update the iterlist while we are iterating over it
             iterlist = new_iterlist
         if self.dc_altered:
-            self.model.redoDirectConnection(self.dc_altered)
+            self.model.redoDirectConnection(self.dc_altered, self.msg_copy)
@@ -19,6 +19,15 @@ Common utility functions used in PyPDEVS
 import pypdevs.middleware as middleware
 from pypdevs.MPIRedirect import MPIRedirect
 from collections import defaultdict
+import copy
+try:
+    import dataclasses
+except ImportError:
+    dataclasses = None
+try:
+    import enum
+except ImportError:
+    enum = None
 
 EPSILON = 1E-6
 
@@ -27,6 +36,20 @@ try:
 except ImportError:
     import pickle
 
+# Message copy methods, as accepted by setMessageCopy and connectPorts
+MESSAGE_COPY = {"pickle": 0, "custom": 1, "none": 2, "shallow": 3}
+
+# Types whose instances can never be modified, so they never have to be copied
+IMMUTABLE_TYPES = {type(None): True,
+                   bool: True,
+                   int: True,
+                   float: True,
+                   complex: True,
+                   str: True,
+                   bytes: True,
+                   frozenset: True,
+                   range: True}
+
 def broadcastModel(data, proxies, allow_reinit, scheduler_locations):
     """
     Broadcast the model to simulate to the provided proxies
@@ -57,6 +80,59 @@ def broadcastModel(data, proxies, allow_reinit, scheduler_locations):
         proxies[0].setPickledData(pickled_data)
         middleware.COMM_WORLD.barrier()
 
+def isImmutable(cls):
+    """
+    Checks whether instances of a class can never be modified, in which case
+    messages of this class don't have to be copied. Next to the immutable
+    builtins, this holds for frozen dataclasses and enumerations.
+
+    The result is cached per class, as this is called for every message.
+
+    :param cls: the class of the message
+    :returns: bool -- whether or not messages of this class can be shared
+    """
+    try:
+        return IMMUTABLE_TYPES[cls]
+    except KeyError:
+        immutable = False
+        if dataclasses is not None and dataclasses.is_dataclass(cls):
+            immutable = cls.__dataclass_params__.frozen
+        elif enum is not None and issubclass(cls, enum.Enum):
+            immutable = True
+        IMMUTABLE_TYPES[cls] = immutable
+        return immutable
+
+def messageCopier(method):
+    """
+    Returns the function that copies a single message with the provided method.
+
+    :param method: either a function to copy a message with, or an ID or name of
+                   the method (see *MESSAGE_COPY*). Shallow copies are made with
+                   the *copy* module.
+    :returns: function -- the copy function, or None if no copy must be made
+
+    .. note:: messages of an immutable class (see *isImmutable*) are never copied, unless a function is provided
+    """
+    if callable(method):
+        return method
+    method = MESSAGE_COPY.get(method, method)
+    if method == 2:
+        return None
+    elif method == 0:
+        copier = lambda msg: pickle.loads(pickle.dumps(msg, pickle.HIGHEST_PROTOCOL))
+    elif method == 1:
+        copier = lambda msg: msg.copy()
+    elif method == 3:
+        copier = copy.copy
+    else:
+        raise DEVSException("Message copy option %s not recognized" % method)
+
+    def copyMessage(msg):
+        if isImmutable(msg.__class__):
+            return msg
+        return copier(msg)
+    return copyMessage
+
 def broadcastCancel():
     """
     Cancel the broadcast receiving in a nice way, to prevent MPI errors
@@ -15,6 +15,25 @@
 
 from testutils import *
 from pypdevs.util import *
+from pypdevs.DEVS import AtomicDEVS, CoupledDEVS
+import dataclasses
+
+@dataclasses.dataclass(frozen=True)
+class Frozen(object):
+    value: int
+
+@dataclasses.dataclass
+class Mutable(object):
+    value: list
+
+    def copy(self):
+        return Mutable(["custom"])
+
+class Atomic(AtomicDEVS):
+    pass
+
+class Coupled(CoupledDEVS):
+    pass
 
 class TestHelpers(unittest.TestCase):
     # Tests the externalInput function, which takes messages of the form:
@@ -56,6 +75,75 @@ class TestHelpers(unittest.TestCase):
         addDict(a, b)
         self.assertTrue(a == {"a": 0, "b": 0, "c": 0, "d": -9, "def": 5})
 
+    def test_helper_message_copier(self):
+        frozen = Frozen(1)
+        mutable = Mutable([1])
+        for method in ["pickle", "custom", "shallow", 0, 1, 3]:
+            copier = messageCopier(method)
+            self.assertTrue(copier(frozen) is frozen)
+            self.assertTrue(copier(5) == 5)
+            self.assertFalse(copier(mutable) is mutable)
+        self.assertTrue(messageCopier("none") is None)
+        self.assertTrue(messageCopier(2) is None)
+        self.assertTrue(messageCopier("custom")(mutable).value == ["custom"])
+        self.assertTrue(messageCopier("shallow")(mutable).value is mutable.value)
+        self.assertFalse(messageCopier("pickle")(mutable).value is mutable.value)
+        self.assertTrue(messageCopier(len)(mutable.value) == 1)
+        self.assertRaises(DEVSException, messageCopier, "deep")
+
+    def test_helper_connection_copy(self):
+        from pypdevs.DEVS import directConnect
+        copied = []
+        def counting(msg):
+            copied.append(msg)
+            return msg
+
+        root = Coupled("root")
+        source = root.addSubModel(Atomic("source"))
+        out1 = source.addOutPort("out1")
+        out2 = source.addOutPort("out2")
+        coupled = root.addSubModel(Coupled("coupled"))
+        inner = coupled.addInPort("in")
+        sink1 = coupled.addSubModel(Atomic("sink1")).addInPort("in")
+        sink2 = coupled.addSubModel(Atomic("sink2")).addInPort("in")
+        root.connectPorts(out1, inner, lambda x: x + 1)
+        root.connectPorts(out2, inner, lambda x: x + 1, "none")
+        coupled.connectPorts(inner, sink1)
+        coupled.connectPorts(inner, sink2, lambda x: x * 2, counting)
+        directConnect(root.component_set, {}, "none")
+
+        routes = dict(out1.routing_outline)
+        self.assertTrue(routes[sink1](1) == 2)
+        self.assertTrue(copied == [])
+        self.assertTrue(routes[sink2](1) == 4)
+        self.assertTrue(copied == [1])
+
+        # The copy method closest to the source is used
+        routes = dict(out2.routing_outline)
+        self.assertTrue(routes[sink2](1) == 4)
+        self.assertTrue(copied == [1])
+
+    def test_helper_compile_routing(self):
+        from pypdevs.DEVS import RootDEVS, directConnect
+        root = Coupled("root")
+        source = root.addSubModel(Atomic("source"))
+        out = source.addOutPort("out")
+        sinks = [root.addSubModel(Atomic("sink%d" % i)) for i in range(3)]
+        ports = [sink.addInPort("in") for sink in sinks]
+        root.connectPorts(out, ports[0])
+        root.connectPorts(out, ports[1], lambda x: x, "none")
+        root.connectPorts(out, ports[2])
+        models = directConnect(root.component_set, {})
+        for model_id, model in enumerate(models):
+            model.model_id = model_id
+
+        # The last sink is simulated remotely
+        rootDEVS = RootDEVS(models[:-1], models, None)
+        rootDEVS.compileRouting()
+        self.assertTrue(out.routing_local == [(ports[0], sinks[0])])
+        self.assertTrue([e[:2] for e in out.routing_translated] == [(ports[1], sinks[1])])
+        self.assertTrue([e[:2] for e in out.routing_remote] == [(sinks[2].model_id, ports[2].port_id)])
+
     def test_helper_all_zero_dict(self):
 
         a = {"a": 0}
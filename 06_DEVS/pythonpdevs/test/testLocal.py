@@ -102,6 +102,28 @@ class TestLocal(unittest.TestCase):
             self.fail()
         removeFile("model.dot")
 
+    def test_local_sequential(self):
+        # The lock-free kernel must produce exactly the same trace as runsim
+        from pypdevs.simulator import Simulator
+        try:
+            from unittest import mock
+        except ImportError:
+            import mock
+
+        def simulate(outfile):
+            removeFile(outfile)
+            sim = Simulator(Chain_local(0.66))
+            sim.setTerminationTime(40)
+            sim.setVerbose(outfile)
+            sim.simulate()
+            return sim.controller
+
+        controller = simulate("output/sequential")
+        self.assertTrue(controller.isSequential())
+        with mock.patch.object(BaseSimulator, "isSequential", return_value=False):
+            simulate("output/sequential_locked")
+        self.assertTrue(filecmp.cmp("output/sequential", "output/sequential_locked", shallow=False))
+
     def test_local_reinit(self):
         removeFile("output/reinit1")
         removeFile("output/reinit2")
@@ -15,6 +15,11 @@
 
 from testutils import *
 from pypdevs.schedulers.schedulerAH import SchedulerAH
+from pypdevs.schedulers.schedulerHS import SchedulerHS
+from pypdevs.schedulers.schedulerCQ import SchedulerCQ
+from pypdevs.schedulers.schedulerSL import SchedulerSL
+from pypdevs.schedulers.schedulerAuto import SchedulerAuto, selectScheduler
+import random
 
 class TestScheduler(unittest.TestCase):
     def setUp(self):
@@ -85,3 +90,115 @@ class TestScheduler(unittest.TestCase):
         # List should be completely empty now
         res = self.scheduler.getImminent((1, 1))
         self.assertTrue(res == [])
+
+    def test_scheduler_sorted_list(self):
+        # The initial models are not necessarily sorted
+        self.models.reverse()
+        scheduler = SchedulerSL(self.models, 1e-9, len(self.models))
+        self.assertTrue(scheduler.readFirst() == (1, 1))
+        self.assertTrue(len(scheduler.getImminent((1, 1))) == 10)
+
+    def test_scheduler_auto_selection(self):
+        table = [(100, 0.01, "schedulerHS", "SchedulerHS"),
+                 (100, 1.0, "schedulerML", "SchedulerML"),
+                 (10000, 1.0, "schedulerSL", "SchedulerSL")]
+        self.assertTrue(selectScheduler(50, 0.02, table) == 
+                        ("schedulerHS", "SchedulerHS"))
+        self.assertTrue(selectScheduler(200, 0.5, table) == 
+                        ("schedulerML", "SchedulerML"))
+        self.assertTrue(selectScheduler(20000, 1.0, table) == 
+                        ("schedulerSL", "SchedulerSL"))
+        # Nothing rescheduled
+        self.assertTrue(selectScheduler(100, 0.0, table) == 
+                        ("schedulerHS", "SchedulerHS"))
+
+    def test_scheduler_auto_swap(self):
+        scheduler = SchedulerAuto(self.models, 1e-9, len(self.models))
+        self.assertTrue(scheduler.scheduler_type == SchedulerHS)
+        # Half of the models was rescheduled every time
+        filename, classname = selectScheduler(20, 0.5)
+        self.assertTrue(classname != "SchedulerHS")
+        for _ in range(2):
+            for _ in range(101):
+                scheduler.massReschedule(self.models[:10])
+            # Not yet stable for long enough
+            self.assertTrue(scheduler.scheduler_type == SchedulerHS)
+        for _ in range(101):
+            scheduler.massReschedule(self.models[:10])
+        self.assertTrue(scheduler.scheduler_type.__name__ == classname)
+        self.assertTrue(scheduler.readFirst() == (1, 1))
+        self.assertTrue(len(scheduler.getImminent((1, 1))) == 10)
+
+    def test_scheduler_auto_noise(self):
+        scheduler = SchedulerAuto(self.models, 1e-9, len(self.models))
+        self.assertTrue(selectScheduler(20, 1.0) != selectScheduler(20, 0.05))
+        # Alternate between a high and a low activity every window
+        for window in range(10):
+            reschedule = self.models if window % 2 == 0 else self.models[:1]
+            for _ in range(101):
+                scheduler.massReschedule(reschedule)
+        self.assertTrue(scheduler.scheduler_type == SchedulerHS)
+        self.assertTrue(scheduler.readFirst() == (1, 1))
+
+class TestSchedulerCQ(unittest.TestCase):
+    def setUp(self):
+        random.seed(1)
+        self.models = []
+        for i in range(200):
+            ne = Processor()
+            ne.model_id = i
+            ne.time_next = (float('inf'), 1)
+            self.models.append(ne)
+
+    def tearDown(self):
+        pass
+
+    def simulate(self, scheduler_type, times):
+        # Reschedule the imminent models at the provided time offsets
+        for model, time_next in zip(self.models, times):
+            model.time_next = time_next
+        scheduler = scheduler_type(self.models, 1e-6, len(self.models))
+        offsets = iter(times[len(self.models):])
+        result = []
+        while len(result) < 500:
+            try:
+                time_next = scheduler.readFirst()
+            except IndexError:
+                break
+            imminent = sorted(scheduler.getImminent(time_next), 
+                              key=lambda i: i.model_id)
+            result.append((time_next, [m.model_id for m in imminent]))
+            for model in imminent:
+                offset = next(offsets)
+                if offset[0] == 0.0:
+                    model.time_next = (time_next[0], time_next[1] + 1)
+                else:
+                    model.time_next = (time_next[0] + offset[0], 1)
+            scheduler.massReschedule(imminent)
+        return result
+
+    def test_scheduler_calendar_dense(self):
+        # Lots of distinct, but close, timestamps
+        times = [(round(random.uniform(0, 10), 2), 1) for _ in range(5000)]
+        self.assertTrue(self.simulate(SchedulerCQ, times) == 
+                        self.simulate(SchedulerHS, times))
+
+    def test_scheduler_calendar_sparse(self):
+        # Widely spread timestamps, zero time advances and inactive models
+        times = [(random.choice([0.0, 0.001, 5.0, 1000.0, float('inf')]), 1) 
+                 for _ in range(5000)]
+        self.assertTrue(self.simulate(SchedulerCQ, times) == 
+                        self.simulate(SchedulerHS, times))
+
+    def test_scheduler_calendar_unschedule(self):
+        for i, model in enumerate(self.models):
+            model.time_next = (float(i % 10), 1)
+        scheduler = SchedulerCQ(self.models, 1e-6, len(self.models))
+        for model in self.models:
+            if model.model_id % 10 < 5:
+                scheduler.unschedule(model)
+        self.assertTrue(scheduler.readFirst() == (5.0, 1))
+        self.assertTrue(len(scheduler.getImminent((5.0, 1))) == 20)
+        for model in self.models:
+            scheduler.unschedule(model)
+        self.assertRaises(IndexError, scheduler.readFirst)
@@ -19,7 +19,7 @@ import os
 import sys
 
 from testMessageScheduler import TestMessageScheduler
-from testScheduler import TestScheduler
+from testScheduler import TestScheduler, TestSchedulerCQ
 from testActions import TestActions
 from testHelpers import TestHelpers
 from testGVT import TestGVT
@@ -39,6 +39,7 @@ if __name__ == '__main__':
     wait = unittest.TestLoader().loadTestsFromTestCase(TestWait)
     helpers = unittest.TestLoader().loadTestsFromTestCase(TestHelpers)
     scheduler = unittest.TestLoader().loadTestsFromTestCase(TestScheduler)
+    calendar = unittest.TestLoader().loadTestsFromTestCase(TestSchedulerCQ)
     mscheduler = unittest.TestLoader().loadTestsFromTestCase(TestMessageScheduler)
     testutils = unittest.TestLoader().loadTestsFromTestCase(TestTestUtils)
     logger = unittest.TestLoader().loadTestsFromTestCase(TestLogger)
@@ -52,6 +53,7 @@ if __name__ == '__main__':
     allTests.addTest(exceptions)
     allTests.addTest(wait)
     allTests.addTest(scheduler)
+    allTests.addTest(calendar)
     allTests.addTest(logger)
     allTests.addTest(local)
 